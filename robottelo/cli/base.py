@@ -1,12 +1,18 @@
 # -*- encoding: utf-8 -*-
 """Generic base class for cli hammer commands."""
+import atexit
 import logging
 import re
+import threading
 
+from contextlib import contextmanager
 from robottelo import ssh
 from robottelo.cli import hammer
 from robottelo.config import settings
 
+_local = threading.local()
+_main_thread = threading.current_thread()
+
 
 class CLIError(Exception):
     """Indicates that a CLI command could not be run."""
@@ -61,6 +67,187 @@ class CLIDataBaseError(CLIBaseError):
     """
 
 
+def get_hammer_session():
+    """Return the persistent :class:`robottelo.ssh.SSHSession` used by the
+    current thread to run hammer commands.
+
+    A session is available inside a :func:`hammer_session` block. When the
+    ``hammer_session`` option of the ``robottelo`` configuration section is
+    enabled the main thread also keeps one session until the interpreter
+    exits. Other threads, like the workers of a thread pool, only get a
+    session inside a :func:`hammer_session` block, so no connection outlives
+    them.
+
+    :return: the current thread session or ``None`` if hammer commands should
+        open their own connection.
+    """
+    session = getattr(_local, 'session', None)
+    if (session is None and settings.hammer_session is True and
+            threading.current_thread() is _main_thread):
+        session = _local.session = ssh.SSHSession()
+    return session
+
+
+def _close_hammer_session():
+    """Close the session the main thread opened for the whole run"""
+    session = getattr(_local, 'session', None)
+    if session is not None:
+        _local.session = None
+        session.close()
+
+
+atexit.register(_close_hammer_session)
+
+
+@contextmanager
+def hammer_session(hostname=None):
+    """Run all hammer commands issued by the current thread through a single
+    persistent remote shell::
+
+        with hammer_session():
+            Org.list()
+            Product.create({'organization-id': org_id})
+
+    The results returned by :class:`Base` methods are the same as when every
+    command opens its own connection.
+
+    :param str hostname: The server to run hammer on. If it is ``None``
+        ``hostname`` from configuration's ``server`` section will be used.
+    """
+    previous = getattr(_local, 'session', None)
+    session = _local.session = ssh.SSHSession(hostname=hostname)
+    try:
+        yield session
+    finally:
+        session.close()
+        _local.session = previous
+
+
+def get_cli_backend():
+    """Return the name of the backend used by the current thread for the
+    ``create``, ``info``, ``list``, ``update`` and ``delete`` methods of the
+    CLI entity classes, either ``hammer`` or ``rest``.
+    """
+    return getattr(_local, 'backend', 'hammer')
+
+
+@contextmanager
+def cli_backend(name):
+    """Use the given backend for the entity methods called by the current
+    thread::
+
+        with cli_backend('rest'):
+            org = Org.create({'name': 'org1'})
+
+    With the ``rest`` backend the classes defining ``rest_path`` are created,
+    updated and deleted through :mod:`robottelo.cli.rest`, other commands,
+    classes and unsupported options still go through hammer.
+
+    :param str name: ``hammer`` or ``rest``.
+    """
+    previous = get_cli_backend()
+    _local.backend = name
+    try:
+        yield
+    finally:
+        _local.backend = previous
+
+
+class LazyInfo(dict):
+    """Information of a newly created entity, read with ``info`` on first
+    use.
+
+    ``create`` only outputs a few attributes of the entity. This dictionary
+    starts with them and answers reads of ``id`` and ``name`` without running
+    ``info``. Reading any other key, iterating, comparing or changing the
+    dictionary first replaces its contents with the ``info`` output.
+
+    :param dict data: the attributes output by ``create``.
+    :param fetch: callable returning the ``info`` output of the entity.
+    """
+    #: Keys answered from the ``create`` output
+    create_keys = (u'id', u'name')
+
+    def __init__(self, data, fetch):
+        super(LazyInfo, self).__init__(data)
+        self._fetch = fetch
+
+    def _load(self):
+        """Replace the ``create`` output with the ``info`` output."""
+        if self._fetch is None:
+            return
+        fetch, self._fetch = self._fetch, None
+        info = fetch()
+        # like the eager create, keep the create output if info is empty
+        if len(info) > 0:
+            dict.clear(self)
+            dict.update(self, info)
+
+    @property
+    def loaded(self):
+        """Whether ``info`` has already been run."""
+        return self._fetch is None
+
+    def __getitem__(self, key):
+        if key not in self.create_keys or not dict.__contains__(self, key):
+            self._load()
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        if key not in self.create_keys or not dict.__contains__(self, key):
+            self._load()
+        return dict.__contains__(self, key)
+
+    def __bool__(self):
+        # both the create and the info outputs hold the entity
+        return dict.__len__(self) > 0
+
+    __nonzero__ = __bool__
+
+    def __eq__(self, other):
+        self._load()
+        if isinstance(other, LazyInfo):
+            other._load()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # copies and pickles are plain dictionaries
+        self._load()
+        return (dict, (dict(self),))
+
+
+def _loading(name):
+    """Return a :class:`LazyInfo` method running ``info`` before calling the
+    ``dict`` method ``name``."""
+    method = getattr(dict, name)
+
+    def wrapper(self, *args, **kwargs):
+        self._load()
+        return method(self, *args, **kwargs)
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in ('__delitem__', '__iter__', '__len__', '__repr__',
+              '__setitem__', 'clear', 'copy', 'items', 'keys', 'pop',
+              'popitem', 'setdefault', 'update', 'values', 'iteritems',
+              'iterkeys', 'itervalues', 'has_key', 'viewitems', 'viewkeys',
+              'viewvalues'):
+    if hasattr(dict, _name):
+        setattr(LazyInfo, _name, _loading(_name))
+
+
 class Base(object):
     """
     @param command_base: base command of hammer.
@@ -124,8 +311,18 @@ class Base(object):
     @since: 27.Nov.2013
     """
     command_base = None  # each inherited instance should define this
-    command_sub = None  # specific to instance, like: create, update, etc
+    # Deprecated: subcommands are passed to ``_construct_command`` instead.
+    # Kept as a fallback for code which still sets it before building a
+    # command, which is not safe when a class is shared between threads.
+    command_sub = None
     command_requires_org = False  # True when command requires organization-id
+    # API path of the entity, like ``katello/api/v2/products``, enables the
+    # ``rest`` backend for the class. See :mod:`robottelo.cli.rest`.
+    rest_path = None
+    # Key wrapping the entity attributes in Foreman API payloads
+    rest_resource = None
+    # Create and update options mapped to their API parameter
+    rest_options = {}
 
     logger = logging.getLogger('robottelo')
     _db_error_regex = re.compile(
@@ -133,7 +330,7 @@ class Base(object):
     )
 
     @classmethod
-    def _handle_response(cls, response, ignore_stderr=None):
+    def _handle_response(cls, response, ignore_stderr=None, command=None):
         """Verify ``return_code`` of the CLI command.
 
         Check for a non-zero return code or any stderr contents.
@@ -142,16 +339,19 @@ class Base(object):
             :mod:`robottelo.ssh.command`.
         :param ignore_stderr: indicates whether to throw a warning in logs if
             ``stderr`` is not empty.
+        :param command: the hammer command which produced ``response``, its
+            options are left out from the error message.
         :returns: contents of ``stdout``.
         :raises robottelo.cli.base.CLIReturnCodeError: If return code is
             different from zero.
         """
         if response.return_code != 0:
+            if command is None:
+                command = u'{0} {1}'.format(cls.command_base, cls.command_sub)
             full_msg = (
-                u'Command "{0} {1}" finished with return_code {2}\n'
-                'stderr contains following message:\n{3}'.format(
-                    cls.command_base,
-                    cls.command_sub,
+                u'Command "{0}" finished with return_code {1}\n'
+                'stderr contains following message:\n{2}'.format(
+                    command.split(u' --', 1)[0].strip(),
                     response.return_code,
                     response.stderr
                 )
@@ -168,31 +368,59 @@ class Base(object):
             )
         return response.stdout
 
+    @classmethod
+    def _get_rest_backend(cls, options, command_sub):
+        """Return the :mod:`robottelo.cli.rest` module if ``command_sub``
+        should go through the API instead of hammer, ``None`` otherwise.
+        """
+        if cls.rest_path is None or get_cli_backend() != 'rest':
+            return None
+        from robottelo.cli import rest
+        if rest.supports(cls, options, command_sub):
+            return rest
+        return None
+
     @classmethod
     def add_operating_system(cls, options=None):
         """
         Adds OS to record.
         """
 
-        cls.command_sub = 'add-operatingsystem'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'add-operatingsystem'))
 
         return result
 
+    @classmethod
+    def _invalidate_cached(cls, options):
+        """Drop the factory objects cached for the entity selected by
+        ``options`` as it was deleted or updated."""
+        from robottelo.decorators import invalidate_cached
+        if not options:
+            return
+        if options.get('id') is not None:
+            invalidate_cached(entity_id=options['id'])
+        elif options.get('name') is not None:
+            invalidate_cached(entity_name=options['name'])
+
     @classmethod
     def create(cls, options=None):
         """
         Creates a new record using the arguments passed via dictionary.
         """
 
-        cls.command_sub = 'create'
-
         if options is None:
             options = {}
 
-        result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+        backend = cls._get_rest_backend(options, 'create')
+        if backend is not None:
+            # the entity information is read with hammer below
+            result = [backend.create(cls, options)]
+        else:
+            result = cls.execute(
+                cls._construct_command(options, 'create'),
+                output_format='csv'
+            )
 
         # Extract new object ID if it was successfully created
         if len(result) > 0 and 'id' in result[0]:
@@ -207,6 +435,11 @@ class Base(object):
                     raise CLIError(tmpl.format(cls.__name__))
                 info_options[u'organization-id'] = options[u'organization-id']
 
+            if settings.cli_lazy_info is True:
+                # only read the whole object when it is used
+                return LazyInfo(
+                    result[0], lambda: cls.info(info_options))
+
             new_obj = cls.info(info_options)
             # stdout should be a dictionary containing the object
             if len(new_obj) > 0:
@@ -217,11 +450,16 @@ class Base(object):
     @classmethod
     def delete(cls, options=None):
         """Deletes existing record."""
-        cls.command_sub = 'delete'
-        return cls.execute(
-            cls._construct_command(options),
-            ignore_stderr=True,
-        )
+        backend = cls._get_rest_backend(options, 'delete')
+        if backend is not None:
+            result = backend.delete(cls, options)
+        else:
+            result = cls.execute(
+                cls._construct_command(options, 'delete'),
+                ignore_stderr=True,
+            )
+        cls._invalidate_cached(options)
+        return result
 
     @classmethod
     def delete_parameter(cls, options=None):
@@ -229,9 +467,8 @@ class Base(object):
         Deletes parameter from record.
         """
 
-        cls.command_sub = 'delete-parameter'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'delete-parameter'))
 
         return result
 
@@ -241,9 +478,7 @@ class Base(object):
         Displays the content for existing partition table.
         """
 
-        cls.command_sub = 'dump'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'dump'))
 
         return result
 
@@ -282,26 +517,36 @@ class Base(object):
         if settings.performance:
             time_hammer = settings.performance.time_hammer
 
-        # add time to measure hammer performance
-        cmd = u'LANG={0} {1} hammer -v -u {2} -p {3} {4} {5}'.format(
+        cmd = u'LANG={0} hammer -v -u {1} -p {2} {3} {4}'.format(
             settings.locale,
-            u'time -p' if time_hammer else '',
             user,
             password,
             u'--output={0}'.format(output_format) if output_format else u'',
             command,
         )
-        response = ssh.command(
-            cmd.encode('utf-8'),
-            output_format=output_format,
-            timeout=timeout,
-        )
+        session = get_hammer_session()
+        if session is not None:
+            response = session.run(
+                cmd.encode('utf-8'),
+                output_format=output_format,
+                timeout=timeout,
+                remote_timing=time_hammer,
+            )
+        else:
+            # measure hammer performance on the server when asked
+            response = ssh.command(
+                cmd.encode('utf-8'),
+                output_format=output_format,
+                timeout=timeout,
+                remote_timing=time_hammer,
+            )
         if return_raw_response:
             return response
         else:
             return cls._handle_response(
                 response,
                 ignore_stderr=ignore_stderr,
+                command=command,
             )
 
     @classmethod
@@ -333,7 +578,6 @@ class Base(object):
     @classmethod
     def info(cls, options=None, output_format=None):
         """Reads the entity information."""
-        cls.command_sub = 'info'
 
         if options is None:
             options = {}
@@ -346,7 +590,7 @@ class Base(object):
             )
 
         result = cls.execute(
-            command=cls._construct_command(options),
+            command=cls._construct_command(options, 'info'),
             output_format=output_format
         )
         if output_format != 'json':
@@ -360,8 +604,6 @@ class Base(object):
         @param options: ID (sometimes name works as well) to retrieve info.
         """
 
-        cls.command_sub = 'list'
-
         if options is None:
             options = {}
 
@@ -376,7 +618,7 @@ class Base(object):
             )
 
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'list'), output_format='csv')
 
         return result
 
@@ -386,10 +628,10 @@ class Base(object):
         Lists all puppet classes.
         """
 
-        cls.command_sub = 'puppet-classes'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'puppet-classes'),
+            output_format='csv',
+        )
 
         return result
 
@@ -399,9 +641,8 @@ class Base(object):
         Removes OS from record.
         """
 
-        cls.command_sub = 'remove-operatingsystem'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'remove-operatingsystem'))
 
         return result
 
@@ -411,10 +652,8 @@ class Base(object):
         Lists all smart class parameters.
         """
 
-        cls.command_sub = 'sc-params'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'sc-params'), output_format='csv')
 
         return result
 
@@ -424,9 +663,7 @@ class Base(object):
         Creates or updates parameter for a record.
         """
 
-        cls.command_sub = 'set-parameter'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'set-parameter'))
 
         return result
 
@@ -436,12 +673,15 @@ class Base(object):
         Updates existing record.
         """
 
-        cls.command_sub = 'update'
-
-        result = cls.execute(
-            cls._construct_command(options),
-            output_format='csv'
-        )
+        backend = cls._get_rest_backend(options, 'update')
+        if backend is not None:
+            result = backend.update(cls, options)
+        else:
+            result = cls.execute(
+                cls._construct_command(options, 'update'),
+                output_format='csv'
+            )
+        cls._invalidate_cached(options)
 
         return result
 
@@ -464,8 +704,17 @@ class Base(object):
         return Wrapper
 
     @classmethod
-    def _construct_command(cls, options=None):
-        """Build a hammer cli command based on the options passed"""
+    def _construct_command(cls, options=None, command_sub=None):
+        """Build a hammer cli command based on the options passed
+
+        :param dict options: the command options, ``True`` values become flags
+            and ``None`` or ``False`` values are left out.
+        :param str command_sub: the subcommand to run, like ``create`` or
+            ``version info``. It is passed along instead of being stored on
+            the class so commands can be built concurrently from many threads.
+        """
+        if command_sub is None:
+            command_sub = cls.command_sub
         tail = u''
 
         if options is None:
@@ -482,7 +731,7 @@ class Base(object):
                 tail += u' --{0}="{1}"'.format(key, val)
         cmd = u'{0} {1} {2}'.format(
             cls.command_base,
-            cls.command_sub,
+            command_sub,
             tail.strip()
         )
 
@@ -29,3 +29,12 @@ class Domain(Base):
     """
 
     command_base = 'domain'
+    rest_path = 'api/v2/domains'
+    rest_resource = 'domain'
+    rest_options = {
+        u'description': u'description',
+        u'dns-id': u'dns_id',
+        u'location-ids': u'location_ids',
+        u'name': u'name',
+        u'organization-ids': u'organization_ids',
+    }
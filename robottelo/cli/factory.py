@@ -3,11 +3,16 @@
 Factory object creation for all CLI methods
 """
 
+import atexit
 import datetime
 import json
 import logging
 import os
 import random
+import six
+import sys
+import threading
+import time
 
 from fauxfactory import (
     gen_alphanumeric,
@@ -17,11 +22,16 @@ from fauxfactory import (
     gen_netmask,
     gen_string,
 )
+from multiprocessing.pool import ThreadPool
 from os import chmod
 from robottelo import manifests, ssh
 from robottelo.cli.activationkey import ActivationKey
 from robottelo.cli.architecture import Architecture
-from robottelo.cli.base import CLIReturnCodeError
+from robottelo.cli.base import (
+    cli_backend,
+    CLIReturnCodeError,
+    get_cli_backend,
+)
 from robottelo.cli.computeresource import ComputeResource
 from robottelo.cli.contentview import (
     ContentView,
@@ -82,6 +92,7 @@ from robottelo.helpers import (
     update_dictionary, default_url_on_new_port, get_available_capsule_port
 )
 from robottelo.ssh import upload_file
+from six.moves import queue
 from tempfile import mkstemp
 from time import sleep
 
@@ -90,6 +101,15 @@ logger = logging.getLogger(__name__)
 ORG_KEYS = ['organization', 'organization-id', 'organization-label']
 CONTENT_VIEW_KEYS = ['content-view', 'content-view-id']
 LIFECYCLE_KEYS = ['lifecycle-environment', 'lifecycle-environment-id']
+#: Number of organizations kept ready by :class:`OrgPool`
+ORG_POOL_SIZE = 3
+#: Environment variable overriding the size of the pools of
+#: :func:`get_pooled_org`, ``0`` creates organizations on demand
+ORG_POOL_SIZE_ENV = 'ROBOTTELO_ORG_POOL_SIZE'
+#: Number of entities created at once by :func:`make_bulk`
+BULK_WORKERS = 8
+#: Number of entities created by :func:`make_bulk` between two progress logs
+BULK_PROGRESS_INTERVAL = 100
 
 
 class CLIFactoryError(Exception):
@@ -119,7 +139,8 @@ def create_object(cli_object, options, values):
             )
     update_dictionary(options, values)
     try:
-        result = cli_object.create(options)
+        with cli_backend(settings.cli_factory_backend):
+            result = cli_object.create(options)
     except CLIReturnCodeError as err:
         # If the object is not created, raise exception, stop the show.
         raise CLIFactoryError(
@@ -138,6 +159,438 @@ def create_object(cli_object, options, values):
     return result
 
 
+class EntityRef(object):
+    """Reference to an attribute of an entity created by an other step of
+    :func:`make_entities`, see :func:`ref`."""
+
+    def __init__(self, name, attribute=u'id'):
+        self.name = name
+        self.attribute = attribute
+
+    def __repr__(self):
+        return u'ref({0!r}, {1!r})'.format(self.name, self.attribute)
+
+
+def ref(name, attribute=u'id'):
+    """Refer to the ``attribute`` of the entity created by the ``name`` step
+    of a :func:`make_entities` plan. The step runs after ``name`` and the
+    reference is replaced by the attribute value."""
+    return EntityRef(name, attribute)
+
+
+def _plan_refs(value):
+    """Return the names of the steps referenced in an option value."""
+    if isinstance(value, EntityRef):
+        return {value.name}
+    if isinstance(value, dict):
+        value = value.values()
+    elif not isinstance(value, (list, tuple, set)):
+        return set()
+    refs = set()
+    for item in value:
+        refs |= _plan_refs(item)
+    return refs
+
+
+def _resolve_refs(value, entities):
+    """Replace the references in an option value by the created entities
+    attributes."""
+    if isinstance(value, EntityRef):
+        return entities[value.name][value.attribute]
+    if isinstance(value, dict):
+        return {
+            key: _resolve_refs(item, entities) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return type(value)(_resolve_refs(item, entities) for item in value)
+    return value
+
+
+def _plan_dependencies(plan):
+    """Return the steps each step of a plan depends on, checking that they
+    exist and do not form a cycle."""
+    dependencies = {}
+    for name, step in plan.items():
+        after = step[2] if len(step) > 2 else ()
+        dependencies[name] = _plan_refs(step[1]) | set(after)
+        unknown = dependencies[name].difference(plan)
+        if unknown:
+            raise CLIFactoryError(
+                u'Step {0} depends on unknown steps {1}'.format(
+                    name, sorted(unknown)))
+    resolved = set()
+    remaining = dict(dependencies)
+    while remaining:
+        ready = [
+            name for name, deps in remaining.items() if deps <= resolved]
+        if not ready:
+            raise CLIFactoryError(
+                u'Steps {0} depend on each other'.format(sorted(remaining)))
+        resolved.update(ready)
+        for name in ready:
+            del remaining[name]
+    return dependencies
+
+
+def make_entities(plan, workers=4):
+    """Create entities concurrently following their dependencies.
+
+    ``plan`` maps a step name to a ``(function, options)`` tuple, usually a
+    ``make_*`` function and its options. Options can hold references to the
+    entities created by other steps using :func:`ref`, a step starts as soon
+    as the steps it references are done and independent steps run at the
+    same time in a pool of ``workers`` threads. A third ``after`` item lists
+    the steps to wait for without referencing them::
+
+        entities = make_entities({
+            'org': (make_org, {}),
+            'lce': (make_lifecycle_environment, {
+                'organization-id': ref('org')}),
+            'product': (make_product, {'organization-id': ref('org')}),
+            'repo': (make_repository, {'product-id': ref('product')}),
+            'sync': (Repository.synchronize, {'id': ref('repo')}),
+            'cv': (make_content_view, {'organization-id': ref('org')}),
+        })
+        entities['repo']['id']
+
+    The CLI backend selected by the caller thread with
+    :func:`robottelo.cli.base.cli_backend` is used by the workers too.
+
+    :param dict plan: the steps to run.
+    :param int workers: maximum number of steps running at once.
+    :return: a dictionary mapping each step name to the value returned by its
+        function.
+    :raise robottelo.cli.factory.CLIFactoryError: if a step references an
+        unknown step or steps depend on each other. If a step raises, the
+        running steps are waited for, no other step is started and the
+        exception is raised again.
+    """
+    dependencies = _plan_dependencies(plan)
+    backend = get_cli_backend()
+    done = queue.Queue()
+    entities = {}
+    pending = set(plan)
+    running = set()
+    error = None
+
+    def run(name, function, options):
+        try:
+            with cli_backend(backend):
+                return name, function(options), None
+        except Exception:
+            return name, None, sys.exc_info()
+
+    pool = ThreadPool(workers)
+    try:
+        while pending or running:
+            if error is None:
+                for name in sorted(pending):
+                    if dependencies[name].issubset(entities):
+                        pending.remove(name)
+                        running.add(name)
+                        options = _resolve_refs(plan[name][1], entities)
+                        pool.apply_async(
+                            run, (name, plan[name][0], options),
+                            callback=done.put
+                        )
+            if not running:
+                break
+            name, result, exc_info = done.get()
+            running.remove(name)
+            if exc_info is not None:
+                logger.error(u'Step %s of the entities plan failed', name)
+                error = error or exc_info
+            else:
+                entities[name] = result
+    finally:
+        pool.close()
+        pool.join()
+    if error is not None:
+        six.reraise(*error)
+    return entities
+
+
+class OrgPool(object):
+    """Keep ready to use organizations created in background threads.
+
+    Creating an organization, importing a manifest and synchronizing a
+    repository take a while. The pool creates ``size`` organizations ahead
+    of time and creates a new one each time an organization is handed out,
+    so tests only wait when the pool is drained::
+
+        pool = OrgPool(manifest=True, custom_repo_url=FAKE_0_YUM_REPO)
+        org = pool.get()
+        org['id'], org['repository-id']
+
+    Most callers should use :func:`get_pooled_org` which shares pools within
+    the process.
+
+    Pools are not shared between processes: organizations created ahead
+    are only useful to processes handing out several of them. A pool of
+    ``size`` 0 creates each organization on demand in the calling thread,
+    without any background work.
+
+    :param int size: number of organizations kept ready.
+    :param bool manifest: whether to upload a cloned manifest to the
+        organizations.
+    :param str custom_repo_url: when set, the organizations are set up with
+        :func:`setup_org_for_a_custom_repo` for this URL and the ids it
+        returns are added to the organization information.
+    :param int workers: number of organizations created at once.
+    """
+
+    def __init__(self, size=ORG_POOL_SIZE, manifest=False,
+                 custom_repo_url=None, workers=2):
+        self.size = size
+        self.manifest = manifest
+        self.custom_repo_url = custom_repo_url
+        self._backend = get_cli_backend()
+        self._ready = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._closed = False
+        self._pool = ThreadPool(workers) if size > 0 else None
+
+    def _create(self):
+        """Create an organization set up as requested."""
+        with cli_backend(self._backend):
+            org = make_org()
+            if self.manifest:
+                manifest = manifests.Manifest(
+                    filename=u'/tmp/manifest-{0}.zip'.format(
+                        gen_alphanumeric()))
+                with manifest:
+                    upload_file(manifest.content, manifest.filename)
+                try:
+                    Subscription.upload({
+                        u'file': manifest.filename,
+                        u'organization-id': org['id'],
+                    })
+                except CLIReturnCodeError as err:
+                    raise CLIFactoryError(
+                        u'Failed to upload manifest\n{0}'.format(err.msg))
+            if self.custom_repo_url is not None:
+                org.update(setup_org_for_a_custom_repo({
+                    u'url': self.custom_repo_url,
+                    u'organization-id': org['id'],
+                }))
+        return org
+
+    def _done(self, result):
+        with self._lock:
+            self._pending -= 1
+        self._ready.put(result)
+
+    def _fill(self):
+        """Start creating organizations until ``size`` are ready or being
+        created."""
+        def run():
+            try:
+                return self._create(), None
+            except Exception:
+                logger.exception(u'Failed to create a pooled organization')
+                return None, sys.exc_info()
+
+        with self._lock:
+            if self._closed or self._pool is None:
+                return
+            missing = self.size - self._ready.qsize() - self._pending
+            self._pending += max(missing, 0)
+        for _ in range(missing):
+            self._pool.apply_async(run, callback=self._done)
+
+    def start(self):
+        """Start filling the pool, returns immediately."""
+        self._fill()
+        return self
+
+    def get(self, timeout=None):
+        """Return a ready organization, waiting for one if the pool is
+        drained, and start creating its replacement.
+
+        :param timeout: seconds to wait for an organization, ``None`` waits
+            forever.
+        :raise robottelo.cli.factory.CLIFactoryError: if no organization is
+            ready within ``timeout``.
+        """
+        if self._pool is None:
+            return self._create()
+        self._fill()
+        try:
+            org, exc_info = self._ready.get(timeout=timeout)
+        except queue.Empty:
+            raise CLIFactoryError(
+                u'No pooled organization ready after {0} seconds'.format(
+                    timeout))
+        self._fill()
+        if exc_info is not None:
+            six.reraise(*exc_info)
+        return org
+
+    def close(self):
+        """Stop creating organizations and wait for the running creations.
+        The organizations left in the pool are not deleted."""
+        with self._lock:
+            self._closed = True
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+
+
+_org_pools = {}
+_org_pools_lock = threading.Lock()
+
+
+def get_pooled_org(manifest=False, custom_repo_url=None):
+    """Return a ready to use organization from a pool shared by the
+    process, see :class:`OrgPool`.
+
+    The pool for the given set up is started on first use, so following
+    calls are served from organizations created in the background. Pools
+    hold :data:`ORG_POOL_SIZE` organizations unless the
+    :data:`ORG_POOL_SIZE_ENV` environment variable is set. It is set to 0
+    when tests run ``--boxed``: every test runs in a forked process which
+    exits without waiting for the organizations created ahead, so they
+    are created on demand instead.
+
+    :param bool manifest: whether the organization must have a manifest.
+    :param str custom_repo_url: URL of a custom repository to set up in the
+        organization, see :func:`setup_org_for_a_custom_repo`.
+    :return: the organization information, with the ids returned by
+        :func:`setup_org_for_a_custom_repo` if ``custom_repo_url`` is set.
+    """
+    key = (manifest, custom_repo_url)
+    with _org_pools_lock:
+        pool = _org_pools.get(key)
+        if pool is None:
+            pool = _org_pools[key] = OrgPool(
+                size=int(os.environ.get(ORG_POOL_SIZE_ENV, ORG_POOL_SIZE)),
+                manifest=manifest,
+                custom_repo_url=custom_repo_url,
+            ).start()
+            atexit.register(pool.close)
+    return pool.get()
+
+
+class BulkResult(list):
+    """Records created by :func:`make_bulk`, in the order they were
+    requested, failed creations excluded.
+
+    :ivar list errors: ``(index, options, exception)`` tuples of the failed
+        creations.
+    :ivar float duration: Wall clock seconds taken by the whole creation.
+    """
+
+    duration = 0.0
+
+    def __init__(self, *args):
+        super(BulkResult, self).__init__(*args)
+        self.errors = []
+
+
+def make_bulk(factory, count, options=None, workers=BULK_WORKERS,
+              progress=None):
+    """Create ``count`` entities with ``factory`` in a bounded pool of
+    worker threads.
+
+    hammer commands run on connections borrowed from the shared
+    :class:`robottelo.ssh.SSHConnectionPool`, and through the API when
+    called in a :func:`robottelo.cli.base.cli_backend` block, so ``workers``
+    should not exceed the number of connections the server accepts at once.
+    Failed creations are recorded instead of being raised::
+
+        users = make_bulk(make_user, 1000, {'admin': 'true'})
+        if users.errors:
+            logger.warning('%d users failed', len(users.errors))
+
+    :param factory: a ``make_*`` function.
+    :param int count: number of entities to create.
+    :param options: options for each entity, either a dictionary, copied for
+        each call, or a callable taking the entity index and returning its
+        options.
+    :param int workers: maximum number of entities created at once.
+    :param progress: a callable called after each creation with the number
+        of created entities, failed creations and ``count``.
+    :return: a :class:`BulkResult` with the created records.
+    """
+    backend = get_cli_backend()
+
+    def run(index):
+        if callable(options):
+            item_options = options(index)
+        else:
+            item_options = dict(options or {})
+        try:
+            with cli_backend(backend):
+                return index, item_options, factory(item_options), None
+        except Exception as err:
+            return index, item_options, None, err
+
+    start = time.time()
+    records = {}
+    result = BulkResult()
+    pool = ThreadPool(min(workers, count) or 1)
+    try:
+        for index, item_options, record, error in pool.imap_unordered(
+                run, range(count)):
+            if error is None:
+                records[index] = record
+            else:
+                logger.warning(
+                    u'Failed to create entity %d with %s: %s',
+                    index, factory.__name__, error)
+                result.errors.append((index, item_options, error))
+            done = len(records) + len(result.errors)
+            if progress is not None:
+                progress(len(records), len(result.errors), count)
+            if done % BULK_PROGRESS_INTERVAL == 0 or done == count:
+                logger.info(
+                    u'%s: %d/%d created, %d failed, %.1f per second',
+                    factory.__name__, len(records), count,
+                    len(result.errors), done / max(time.time() - start, 0.001))
+    finally:
+        pool.close()
+        pool.join()
+    result.extend(records[index] for index in sorted(records))
+    result.errors.sort(key=lambda error: error[0])
+    result.duration = time.time() - start
+    return result
+
+
+def make_users(count, options=None, **kwargs):
+    """Create ``count`` users, see :func:`make_bulk` and :func:`make_user`.
+    """
+    return make_bulk(make_user, count, options, **kwargs)
+
+
+def make_host_collections(count, options=None, **kwargs):
+    """Create ``count`` host collections, see :func:`make_bulk` and
+    :func:`make_host_collection`.
+    """
+    return make_bulk(make_host_collection, count, options, **kwargs)
+
+
+def make_activation_keys(count, options=None, **kwargs):
+    """Create ``count`` activation keys, see :func:`make_bulk` and
+    :func:`make_activation_key`.
+    """
+    return make_bulk(make_activation_key, count, options, **kwargs)
+
+
+def make_fake_hosts(count, options=None, **kwargs):
+    """Create ``count`` fake hosts, see :func:`make_bulk` and
+    :func:`make_fake_host`.
+
+    The organization, location, domain, architecture, operating system,
+    partition table and medium missing from ``options`` are looked up or
+    created once and shared by all the hosts.
+    """
+    if callable(options):
+        raise CLIFactoryError(
+            u'make_fake_hosts needs a dictionary of options')
+    options = _fake_host_options(dict(options or {}))
+    return make_bulk(make_host, count, options, **kwargs)
+
+
 @cacheable
 def make_activation_key(options=None):
     """
@@ -1372,6 +1825,12 @@ def make_fake_host(options=None):
     """Wrapper function for make_host to pass all required options for creation
     of a fake host
     """
+    return make_host(_fake_host_options(options))
+
+
+def _fake_host_options(options=None):
+    """Fill the options of a fake host with default Satellite entities or
+    newly created ones."""
     if options is None:
         options = {}
 
@@ -1448,7 +1907,7 @@ def make_fake_host(options=None):
             'organizations': options.get('organization'),
         })['id']
 
-    return make_host(options)
+    return options
 
 
 @cacheable
@@ -2773,25 +3232,45 @@ def configure_env_for_provision(org=None, loc=None):
     :return: List of created entities that can be re-used further in
         provisioning or validation procedure (e.g. hostgroup or subnet)
     """
-    # Create new organization and location in case they were not passed
+    # Create the organization and location in case they were not passed, a
+    # Lifecycle environment, a synchronized Product and Repository for custom
+    # content, a Content View and a puppet environment. Independent entities
+    # are created concurrently.
+    plan = {}
     if org is None:
-        org = make_org()
+        plan['org'] = (make_org, {})
+        org_id = ref('org')
+    else:
+        org_id = org['id']
     if loc is None:
-        loc = make_location()
-
-    # Create a new Lifecycle environment
-    lce = make_lifecycle_environment({'organization-id': org['id']})
-
-    # Create a Product, Repository for custom content and sync it
-    new_product = make_product({'organization-id': org['id']})
-    new_repo = make_repository({
-        'product-id': new_product['id'],
-        'url': settings.rhel7_os,
+        plan['loc'] = (make_location, {})
+        loc_id = ref('loc')
+    else:
+        loc_id = loc['id']
+    plan.update({
+        'lce': (make_lifecycle_environment, {'organization-id': org_id}),
+        'product': (make_product, {'organization-id': org_id}),
+        'repo': (make_repository, {
+            'product-id': ref('product'),
+            'url': settings.rhel7_os,
+        }),
+        'sync': (Repository.synchronize, {'id': ref('repo')}),
+        'cv': (make_content_view, {'organization-id': org_id}),
+        # Create puppet environment and associate organization and location
+        'env': (make_environment, {
+            'location-ids': loc_id,
+            'organization-ids': org_id,
+        }),
     })
-    Repository.synchronize({'id': new_repo['id']})
+    entities = make_entities(plan)
+    org = entities.get('org', org)
+    loc = entities.get('loc', loc)
+    lce = entities['lce']
+    new_repo = entities['repo']
+    env = entities['env']
 
     # Content View should be promoted to be used with LC Env
-    cv = make_content_view({'organization-id': org['id']})
+    cv = entities['cv']
     ContentView.add_repository({
         'id': cv['id'],
         'organization-id': org['id'],
@@ -2804,12 +3283,6 @@ def configure_env_for_provision(org=None, loc=None):
         'to-lifecycle-environment-id': lce['id'],
     })
 
-    # Create puppet environment and associate organization and location
-    env = make_environment({
-        'location-ids': loc['id'],
-        'organization-ids': org['id'],
-    })
-
     # Search for SmartProxy, and associate location
     puppet_proxy = Proxy.info({'id': Proxy.list()[0]['id']})
     Proxy.update({
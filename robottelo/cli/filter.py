@@ -28,6 +28,7 @@ class Filter(Base):
 
     @classmethod
     def available_permissions(cls, options=None):
-        cls.command_sub = 'available-permissions'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'available-permissions'),
+            output_format='csv',
+        )
@@ -1,9 +1,11 @@
 """Helpers to interact with hammer command line utility."""
 import csv
+import io
 import json
 
 import re
 import six
+import sys
 from six import text_type
 from six.moves import cStringIO as StringIO
 from six.moves import zip
@@ -20,61 +22,106 @@ def _csv_reader(output):
         Also, there are currently some issues regarding ASCII NUL characters.
         Accordingly, all input should be UTF-8 or printable ASCII to be safe;"
 
-    On Python 3 this generator is not needed because the default string type is
-    unicode.
+    On Python 3 the csv module reader is returned as it is, reading the
+    output text or lines directly.
 
-    :param output: can be any object which supports the iterator protocol and
-    returns a unicode string each time its next() method is called.
-    :return: generator that will yield a list of unicode string values.
+    :param output: either the whole output as a unicode string or any object
+        which supports the iterator protocol and returns a unicode string,
+        without line terminator, each time its next() method is called.
+    :return: iterator that will yield a list of unicode string values.
 
     """
-    data = '\n'.join(output)
     if six.PY2:
-        data = data.encode('utf8')
-    handler = StringIO(data)
+        return _py2_csv_reader(output)
+    if isinstance(output, six.string_types):
+        return csv.reader(io.StringIO(output, newline=''))
+    # keep the line terminator so quoted values spanning many lines are
+    # rebuilt as they were printed
+    return csv.reader(line + '\n' for line in output)
+
+
+def _py2_csv_reader(output):  # pragma: no cover
+    """Python 2 version of :func:`_csv_reader` encoding the output."""
+    data = output
+    if not isinstance(output, six.string_types):
+        data = '\n'.join(output)
+    for row in csv.reader(StringIO(data.encode('utf8'))):
+        yield [value.decode('utf8') for value in row]
 
-    for row in csv.reader(handler):  # pragma: no cover
-        if six.PY2:
-            yield [value.decode('utf8') for value in row]
-        else:
-            yield row
+
+_normalized_keys = {}
 
 
 def _normalize(header):
     """Replace empty spaces with '-' and lower all chars
+
+    Results are cached and, on Python 3, interned so every row parsed shares
+    the same key objects.
     """
-    return header.replace(' ', '-').lower()
+    key = _normalized_keys.get(header)
+    if key is None:
+        key = header.replace(' ', '-').lower()
+        if six.PY3:
+            key = sys.intern(key)
+        _normalized_keys[header] = key
+    return key
+
+
+def _normalize_pairs(pairs):
+    """Build a dictionary from the pairs decoded from a JSON object while
+    normalizing its keys."""
+    return {_normalize(key): value for key, value in pairs}
 
 
 def parse_json(stdout):
     """Parse JSON output from Hammer CLI and convert it to python dictionary
     while normalizing keys.
+
+    Keys are normalized and integers converted to strings, to conform to the
+    csv parser, while the JSON is decoded instead of walking the decoded data
+    again.
     """
-    parsed = json.loads(stdout)
-    return _normalize_obj(parsed)
+    return json.loads(
+        stdout,
+        object_pairs_hook=_normalize_pairs,
+        parse_int=text_type,
+    )
 
 
-def _normalize_obj(obj):
-    """Normalize all dict's keys replacing empty spaces with "-" and lowering
-    chars
+def _csv_rows(output):
+    """Return the normalized keys and the row values iterator of a CSV
+    output, ``None`` keys if it has no header."""
+    reader = _csv_reader(output)
+    header = next(reader, None)
+    if header is None:
+        return None, reader
+    # Generate the key names, spaces will be converted to dashes "-"
+    return [_normalize(name) for name in header], reader
+
+
+def iter_csv(output):
+    """Parse CSV output from Hammer CLI and yield a dictionary for each row.
+
+    :param output: the output as a unicode string or a list of lines.
     """
-    if isinstance(obj, dict):
-        return {_normalize(k): _normalize_obj(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [_normalize_obj(v) for v in obj]
-    # doing this to conform to csv parser
-    elif isinstance(obj, int) and not isinstance(obj, bool):
-        return text_type(obj)
-    return obj
+    keys, reader = _csv_rows(output)
+    if keys is None:
+        return
+    for values in reader:
+        if values:
+            yield dict(zip(keys, values))
 
 
 def parse_csv(output):
-    """Parse CSV output from Hammer CLI and convert it to python dictionary."""
-    reader = _csv_reader(output)
-    # Generate the key names, spaces will be converted to dashes "-"
-    keys = [_normalize(header) for header in next(reader)]
+    """Parse CSV output from Hammer CLI and convert it to python dictionary.
+
+    :param output: the output as a unicode string or a list of lines.
+    """
+    keys, reader = _csv_rows(output)
+    if keys is None:
+        return []
     # For each entry, create a dict mapping each key with each value
-    return [dict(zip(keys, values)) for values in reader if len(values) > 0]
+    return [dict(zip(keys, values)) for values in reader if values]
 
 
 def parse_help(output):
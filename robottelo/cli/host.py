@@ -46,23 +46,26 @@ class Host(Base):
     @classmethod
     def errata_apply(cls, options):
         """Schedule errata for installation"""
-        cls.command_sub = 'errata apply'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'errata apply'),
+            output_format='csv',
+        )
 
     @classmethod
     def errata_info(cls, options):
         """Retrieve a single errata for a system"""
-        cls.command_sub = 'errata info'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'errata info'),
+            output_format='csv',
+        )
 
     @classmethod
     def errata_list(cls, options):
         """List errata available for the content host."""
-        cls.command_sub = 'errata list'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'errata list'),
+            output_format='csv',
+        )
 
     @classmethod
     def facts(cls, options=None):
@@ -83,10 +86,9 @@ class Host(Base):
             --search SEARCH               filter results
             -h, --help                    print help
         """
-        cls.command_sub = 'facts'
 
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'facts'), output_format='csv')
 
         facts = []
 
@@ -98,44 +100,50 @@ class Host(Base):
     @classmethod
     def package_install(cls, options):
         """Install packages remotely."""
-        cls.command_sub = 'package install'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'package install'),
+            output_format='csv',
+        )
 
     @classmethod
     def package_remove(cls, options):
         """Uninstall packages remotely."""
-        cls.command_sub = 'package remove'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'package remove'),
+            output_format='csv',
+        )
 
     @classmethod
     def package_upgrade(cls, options):
         """Update packages remotely."""
-        cls.command_sub = 'package upgrade'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'package upgrade'),
+            output_format='csv',
+        )
 
     @classmethod
     def package_upgrade_all(cls, options):
         """Update all packages remotely."""
-        cls.command_sub = 'package upgrade-all'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'package upgrade-all'),
+            output_format='csv',
+        )
 
     @classmethod
     def package_group_install(cls, options):
         """Install package groups remotely."""
-        cls.command_sub = 'package-group install'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'package-group install'),
+            output_format='csv',
+        )
 
     @classmethod
     def package_group_remove(cls, options):
         """Uninstall package groups remotely."""
-        cls.command_sub = 'package-group remove'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'package-group remove'),
+            output_format='csv',
+        )
 
     @classmethod
     def puppetrun(cls, options=None):
@@ -153,9 +161,7 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = 'puppetrun'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'puppetrun'))
 
         return result
 
@@ -175,9 +181,7 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = 'reboot'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'reboot'))
 
         return result
 
@@ -201,10 +205,8 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = 'reports'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'reports'), output_format='csv')
 
         reports = []
 
@@ -229,9 +231,7 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = 'start'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'start'))
 
         return result
 
@@ -251,9 +251,7 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = 'status'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'status'))
 
         return result
 
@@ -274,9 +272,7 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = 'stop'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'stop'))
 
         return result
 
@@ -333,9 +329,10 @@ class Host(Base):
                                                                 generated if
                                                                 not provided
         """
-        cls.command_sub = 'subscription register'
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'subscription register'),
+            output_format='csv',
+        )
         if isinstance(result, list):
             result = result[0]
         return result
@@ -353,8 +350,8 @@ class Host(Base):
             --host HOST_NAME              Name to search by
             --host-id HOST_ID             Host ID
         """
-        cls.command_sub = 'subscription unregister'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'subscription unregister'))
 
     @classmethod
     def subscription_attach(cls, options=None):
@@ -372,8 +369,8 @@ class Host(Base):
                                               add. Defaults to 1
             --subscription-id SUBSCRIPTION_ID ID of subscription
         """
-        cls.command_sub = 'subscription attach'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'subscription attach'))
 
     @classmethod
     def subscription_remove(cls, options=None):
@@ -392,8 +389,8 @@ class Host(Base):
                                                 and quantity
             --subscription-id SUBSCRIPTION_ID   ID of subscription
         """
-        cls.command_sub = 'subscription remove'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'subscription remove'))
 
     @classmethod
     def subscription_auto_attach(cls, options=None):
@@ -409,8 +406,8 @@ class Host(Base):
             --host-id HOST_ID
             -h, --help                    print help
         """
-        cls.command_sub = 'subscription auto-attach'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'subscription auto-attach'))
 
     @classmethod
     def sc_params(cls, options=None):
@@ -429,9 +426,8 @@ class Host(Base):
             --per-page PER_PAGE           number of entries per request
             --search SEARCH               filter results
         """
-        cls.command_sub = 'sc-params'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'sc-params'), output_format='csv')
 
     @classmethod
     def smart_variables(cls, options=None):
@@ -450,9 +446,10 @@ class Host(Base):
             --per-page PER_PAGE           number of entries per request
             --search SEARCH               filter results
         """
-        cls.command_sub = 'smart-variables'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'smart-variables'),
+            output_format='csv',
+        )
 
 
 class HostInterface(Base):
@@ -473,5 +470,5 @@ class HostInterface(Base):
     @classmethod
     def create(cls, options=None):
         """Create new network interface for host"""
-        cls.command_sub = 'create'
-        cls.execute(cls._construct_command(options), output_format='csv')
+        cls.execute(
+            cls._construct_command(options, 'create'), output_format='csv')
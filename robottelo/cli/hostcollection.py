@@ -32,18 +32,25 @@ class HostCollection(Base):
     """Manipulates Katello engine's host-collection command."""
 
     command_base = 'host-collection'
+    rest_path = 'katello/api/v2/host_collections'
+    rest_options = {
+        u'description': u'description',
+        u'host-ids': u'host_ids',
+        u'max-hosts': u'max_hosts',
+        u'name': u'name',
+        u'organization-id': u'organization_id',
+        u'unlimited-hosts': u'unlimited_hosts',
+    }
 
     @classmethod
     def add_host(cls, options=None):
         """Add host to the host collection"""
-        cls.command_sub = 'add-host'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-host'))
 
     @classmethod
     def remove_host(cls, options=None):
         """Remove hosts from the host collection"""
-        cls.command_sub = 'remove-host'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'remove-host'))
 
     @classmethod
     def hosts(cls, options=None):
@@ -76,20 +83,21 @@ class HostCollection(Base):
              --search SEARCH                         filter results
              -h, --help                              print help
         """
-        cls.command_sub = 'hosts'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'hosts'), output_format='csv')
 
     @classmethod
     def erratum_install(cls, options):
         """Schedule errata for installation"""
-        cls.command_sub = 'erratum install'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'erratum install'),
+            output_format='csv',
+        )
 
     @classmethod
     def package_install(cls, options):
         """Schedule package for installation"""
-        cls.command_sub = 'package install'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'package install'),
+            output_format='csv',
+        )
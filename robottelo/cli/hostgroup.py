@@ -49,9 +49,8 @@ class HostGroup(Base):
             --per-page PER_PAGE               number of entries per request
             --search SEARCH                   filter results
         """
-        cls.command_sub = 'sc-params'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'sc-params'), output_format='csv')
 
     @classmethod
     def smart_variables(cls, options=None):
@@ -71,6 +70,7 @@ class HostGroup(Base):
             --per-page PER_PAGE               number of entries per request
             --search SEARCH                   filter results
         """
-        cls.command_sub = 'smart-variables'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'smart-variables'),
+            output_format='csv',
+        )
@@ -28,6 +28,14 @@ class LifecycleEnvironment(Base):
 
     command_base = 'lifecycle-environment'
     command_requires_org = True
+    rest_path = 'katello/api/v2/environments'
+    rest_options = {
+        u'description': u'description',
+        u'label': u'label',
+        u'name': u'name',
+        u'organization-id': u'organization_id',
+        u'prior-id': u'prior_id',
+    }
 
     @classmethod
     def list(cls, options=None, per_page=False):
@@ -38,5 +46,4 @@ class LifecycleEnvironment(Base):
 
     @classmethod
     def paths(cls, options=None):
-        cls.command_sub = 'paths'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'paths'))
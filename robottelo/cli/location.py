@@ -46,163 +46,136 @@ class Location(Base):
     """Manipulates Foreman's Locations"""
 
     command_base = 'location'
+    rest_path = 'api/v2/locations'
+    rest_resource = 'location'
+    rest_options = {
+        u'description': u'description',
+        u'name': u'name',
+    }
 
     @classmethod
     def add_compute_resource(cls, options=None):
         """Associate a compute resource"""
 
-        cls.command_sub = 'add-compute-resource'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'add-compute-resource'))
 
     @classmethod
     def add_config_template(cls, options=None):
         """Associate a configuration template"""
 
-        cls.command_sub = 'add-config-template'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'add-config-template'))
 
     @classmethod
     def add_domain(cls, options=None):
         """Associate a domain"""
 
-        cls.command_sub = 'add-domain'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-domain'))
 
     @classmethod
     def add_environment(cls, options=None):
         """Associate an environment"""
 
-        cls.command_sub = 'add-environment'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-environment'))
 
     @classmethod
     def add_hostgroup(cls, options=None):
         """Associate a hostgroup"""
 
-        cls.command_sub = 'add-hostgroup'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-hostgroup'))
 
     @classmethod
     def add_medium(cls, options=None):
         """Associate a medium"""
 
-        cls.command_sub = 'add-medium'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-medium'))
 
     @classmethod
     def add_organization(cls, options=None):
         """Associate an organization"""
 
-        cls.command_sub = 'add-organization'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-organization'))
 
     @classmethod
     def add_smart_proxy(cls, options=None):
         """Associate a smart proxy"""
 
-        cls.command_sub = 'add-smart-proxy'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-smart-proxy'))
 
     @classmethod
     def add_subnet(cls, options=None):
         """Associate a subnet"""
 
-        cls.command_sub = 'add-subnet'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-subnet'))
 
     @classmethod
     def add_user(cls, options=None):
         """Associate a user"""
 
-        cls.command_sub = 'add-user'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-user'))
 
     @classmethod
     def remove_compute_resource(cls, options=None):
         """Disassociate a compute resource"""
 
-        cls.command_sub = 'remove-compute-resource'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'remove-compute-resource'))
 
     @classmethod
     def remove_config_template(cls, options=None):
         """Disassociate a configuration template"""
 
-        cls.command_sub = 'remove-config-template'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'remove-config-template'))
 
     @classmethod
     def remove_domain(cls, options=None):
         """Disassociate a domain"""
 
-        cls.command_sub = 'remove-domain'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'remove-domain'))
 
     @classmethod
     def remove_environment(cls, options=None):
         """Disassociate an environment"""
 
-        cls.command_sub = 'remove-environment'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'remove-environment'))
 
     @classmethod
     def remove_hostgroup(cls, options=None):
         """Disassociate a hostgroup"""
 
-        cls.command_sub = 'remove-hostgroup'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'remove-hostgroup'))
 
     @classmethod
     def remove_medium(cls, options=None):
         """Disassociate a medium"""
 
-        cls.command_sub = 'remove-medium'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'remove-medium'))
 
     @classmethod
     def remove_organization(cls, options=None):
         """Disassociate an organization"""
 
-        cls.command_sub = 'remove-organization'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'remove-organization'))
 
     @classmethod
     def remove_smart_proxy(cls, options=None):
         """Disassociate a smart proxy"""
 
-        cls.command_sub = 'remove-smart-proxy'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'remove-smart-proxy'))
 
     @classmethod
     def remove_subnet(cls, options=None):
         """Disassociate a subnet"""
 
-        cls.command_sub = 'remove-subnet'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'remove-subnet'))
 
     @classmethod
     def remove_user(cls, options=None):
         """Disassociate a user"""
 
-        cls.command_sub = 'remove-user'
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'remove-user'))
@@ -48,123 +48,116 @@ class Org(Base):
     """Manipulates Foreman's Organizations"""
 
     command_base = 'organization'
+    rest_path = 'api/v2/organizations'
+    rest_resource = 'organization'
+    rest_options = {
+        u'description': u'description',
+        u'label': u'label',
+        u'name': u'name',
+    }
 
     @classmethod
     def add_compute_resource(cls, options=None):
         """Adds a computeresource to an org"""
-        cls.command_sub = 'add-compute-resource'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'add-compute-resource'))
 
     @classmethod
     def remove_compute_resource(cls, options=None):
         """Removes a computeresource from an org"""
-        cls.command_sub = 'remove-compute-resource'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'remove-compute-resource'))
 
     @classmethod
     def add_config_template(cls, options=None):
         """Adds a configtemplate to an org"""
-        cls.command_sub = 'add-config-template'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'add-config-template'))
 
     @classmethod
     def remove_config_template(cls, options=None):
         """Removes a configtemplate from an org"""
-        cls.command_sub = 'remove-config-template'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'remove-config-template'))
 
     @classmethod
     def add_domain(cls, options=None):
         """Adds a domain to an org"""
-        cls.command_sub = 'add-domain'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-domain'))
 
     @classmethod
     def remove_domain(cls, options=None):
         """Removes a domain from an org"""
-        cls.command_sub = 'remove-domain'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'remove-domain'))
 
     @classmethod
     def add_environment(cls, options=None):
         """Adds an environment to an org"""
-        cls.command_sub = 'add-environment'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-environment'))
 
     @classmethod
     def remove_environment(cls, options=None):
         """Removes an environment from an org"""
-        cls.command_sub = 'remove-environment'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'remove-environment'))
 
     @classmethod
     def add_hostgroup(cls, options=None):
         """Adds a hostgroup to an org"""
-        cls.command_sub = 'add-hostgroup'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-hostgroup'))
 
     @classmethod
     def remove_hostgroup(cls, options=None):
         """Removes a hostgroup from an org"""
-        cls.command_sub = 'remove-hostgroup'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'remove-hostgroup'))
 
     @classmethod
     def add_location(cls, options=None):
         """Adds a location to an org"""
-        cls.command_sub = 'add-location'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-location'))
 
     @classmethod
     def remove_location(cls, options=None):
         """Removes a location from an org"""
-        cls.command_sub = 'remove-location'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'remove-location'))
 
     @classmethod
     def add_medium(cls, options=None):
         """Adds a medium to an org"""
-        cls.command_sub = 'add-medium'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-medium'))
 
     @classmethod
     def remove_medium(cls, options=None):
         """Removes a medium from an org"""
-        cls.command_sub = 'remove-medium'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'remove-medium'))
 
     @classmethod
     def add_smart_proxy(cls, options=None):
         """Adds a smartproxy to an org"""
-        cls.command_sub = 'add-smart-proxy'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-smart-proxy'))
 
     @classmethod
     def remove_smart_proxy(cls, options=None):
         """Removes a smartproxy from an org"""
-        cls.command_sub = 'remove-smart-proxy'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'remove-smart-proxy'))
 
     @classmethod
     def add_subnet(cls, options=None):
         """Adds existing subnet to an org"""
-        cls.command_sub = 'add-subnet'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-subnet'))
 
     @classmethod
     def remove_subnet(cls, options=None):
         """Removes a subnet from an org"""
-        cls.command_sub = 'remove-subnet'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'remove-subnet'))
 
     @classmethod
     def add_user(cls, options=None):
         """Adds an user to an org"""
-        cls.command_sub = 'add-user'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-user'))
 
     @classmethod
     def remove_user(cls, options=None):
         """Removes an user from an org"""
-        cls.command_sub = 'remove-user'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'remove-user'))
@@ -31,6 +31,15 @@ class Product(Base):
 
     command_base = 'product'
     command_requires_org = True
+    rest_path = 'katello/api/v2/products'
+    rest_options = {
+        u'description': u'description',
+        u'gpg-key-id': u'gpg_key_id',
+        u'label': u'label',
+        u'name': u'name',
+        u'organization-id': u'organization_id',
+        u'sync-plan-id': u'sync_plan_id',
+    }
 
     @classmethod
     def remove_sync_plan(cls, options=None):
@@ -38,9 +47,8 @@ class Product(Base):
         Delete assignment sync plan and product.
         """
 
-        cls.command_sub = 'remove-sync-plan'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'remove-sync-plan'))
 
         return result
 
@@ -50,17 +58,14 @@ class Product(Base):
         Assign sync plan to product.
         """
 
-        cls.command_sub = 'set-sync-plan'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'set-sync-plan'))
 
         return result
 
     @classmethod
     def synchronize(cls, options=None):
         """Synchronize a product."""
-        cls.command_sub = 'synchronize'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'synchronize'),
             ignore_stderr=True,
         )
@@ -31,6 +31,20 @@ class Repository(Base):
 
     command_base = 'repository'
     command_requires_org = True
+    rest_path = 'katello/api/v2/repositories'
+    rest_options = {
+        u'checksum-type': u'checksum_type',
+        u'content-type': u'content_type',
+        u'docker-upstream-name': u'docker_upstream_name',
+        u'download-policy': u'download_policy',
+        u'gpg-key-id': u'gpg_key_id',
+        u'label': u'label',
+        u'name': u'name',
+        u'organization-id': u'organization_id',
+        u'product-id': u'product_id',
+        u'publish-via-http': u'publish_via_http',
+        u'url': u'url',
+    }
 
     @classmethod
     def create(cls, options=None):
@@ -47,9 +61,8 @@ class Repository(Base):
     @classmethod
     def export(cls, options=None):
         """Export a repository"""
-        cls.command_sub = 'export'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'export'),
             output_format='csv',
             ignore_stderr=True,
         )
@@ -69,9 +82,8 @@ class Repository(Base):
     @classmethod
     def synchronize(cls, options, return_raw_response=None):
         """Synchronizes a repository."""
-        cls.command_sub = 'synchronize'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'synchronize'),
             output_format='csv',
             ignore_stderr=True,
             return_raw_response=return_raw_response,
@@ -80,9 +92,8 @@ class Repository(Base):
     @classmethod
     def remove_content(cls, options):
         """Remove content from a repository"""
-        cls.command_sub = 'remove-content'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'remove-content'),
             output_format='csv',
             ignore_stderr=True,
         )
@@ -90,9 +101,8 @@ class Repository(Base):
     @classmethod
     def upload_content(cls, options):
         """Upload content to repository."""
-        cls.command_sub = 'upload-content'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'upload-content'),
             output_format='csv',
             ignore_stderr=True,
         )
@@ -0,0 +1,209 @@
+# -*- encoding: utf-8 -*-
+"""Direct Foreman and Katello API backend for the CLI entity classes.
+
+Fixture setup often only needs an entity to exist. This backend maps
+``create``, ``update`` and ``delete`` of the classes defining
+:attr:`robottelo.cli.base.Base.rest_path` to HTTP calls made through a
+pooled ``requests`` session, skipping the hammer start up cost.
+
+The API output does not have the keys and nesting of the hammer ``info``
+output the tests expect, so it is never returned as the entity information:
+:meth:`robottelo.cli.base.Base.create` only takes the ``id`` and ``name`` of
+the created entity from it and reads the rest with hammer ``info``, lazily
+when ``cli_lazy_info`` is enabled. ``info`` and ``list`` always use hammer.
+The dictionaries returned by this module use the same normalized keys as
+the parsers of :mod:`robottelo.cli.hammer`, lower case and dashes instead
+of spaces or underscores, and integer values are converted to strings.
+Nested dictionaries and lists are normalized the same way.
+
+The backend is used only inside a :func:`robottelo.cli.base.cli_backend`
+block and only when all the options given are listed in
+:attr:`robottelo.cli.base.Base.rest_options`, hammer is used otherwise::
+
+    with cli_backend('rest'):
+        org = Org.create({'name': 'org1'})
+
+"""
+import logging
+import threading
+import time
+
+import requests
+import six
+
+from robottelo.cli.base import CLIReturnCodeError
+from robottelo.config import settings
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+#: Commands run through the API
+COMMANDS = ('create', 'update', 'delete')
+#: Options understood by the ``delete`` call of every entity mapped to their
+#: API parameter
+QUERY_OPTIONS = {
+    u'id': u'id',
+    u'organization-id': u'organization_id',
+}
+#: Number of connections kept per host by the ``requests`` session
+POOL_SIZE = 10
+#: Seconds to wait for an asynchronous API task to finish
+TASK_TIMEOUT = 300
+#: Seconds between two polls of an asynchronous API task
+TASK_POLL_INTERVAL = 1
+
+
+def get_session():
+    """Return the ``requests.Session`` of the current thread, creating it
+    on first use.
+
+    The session keeps its connections alive so following calls skip the TCP
+    and TLS handshakes.
+    """
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'Accept': 'application/json',
+            'Content-Type': 'application/json',
+        })
+        session.verify = False
+        _local.session = session
+    session.auth = settings.server.get_credentials()
+    return session
+
+
+def supports(cls, options, command_sub):
+    """Whether ``command_sub`` of the CLI class ``cls`` can be run with the
+    given options by this backend.
+    """
+    if cls.rest_path is None or command_sub not in COMMANDS:
+        return False
+    if command_sub in ('update', 'delete') and not (
+            options and options.get(u'id')):
+        # entities are only looked up by their id
+        return False
+    allowed = QUERY_OPTIONS
+    if command_sub in ('create', 'update'):
+        allowed = dict(cls.rest_options, id=u'id')
+    return all(
+        name in allowed
+        for name, value in (options or {}).items()
+        if value is not None
+    )
+
+
+def _params(options, allowed):
+    """Convert hammer options to API parameters."""
+    params = {}
+    for name, value in (options or {}).items():
+        if value is None:
+            continue
+        if (name.endswith(u'-ids') and
+                isinstance(value, six.string_types)):
+            value = [item.strip() for item in value.split(u',')]
+        params[allowed[name]] = value
+    return params
+
+
+def _normalize(obj):
+    """Normalize API data keys and values like the hammer output parsers."""
+    if isinstance(obj, dict):
+        return {
+            key.replace(u'_', u'-').replace(u' ', u'-').lower():
+                _normalize(value)
+            for key, value in obj.items()
+        }
+    if isinstance(obj, list):
+        return [_normalize(value) for value in obj]
+    if isinstance(obj, six.integer_types) and not isinstance(obj, bool):
+        return six.text_type(obj)
+    return obj
+
+
+def _raise_for_status(response, method, path):
+    """Raise a :class:`robottelo.cli.base.CLIReturnCodeError` for failed
+    requests so callers handle them as failed hammer commands.
+    """
+    if response.ok:
+        return
+    msg = u'{0} {1} finished with status {2}\n{3}'.format(
+        method, path, response.status_code, response.text)
+    raise CLIReturnCodeError(response.status_code, response.text, msg)
+
+
+def _wait_for_task(task):
+    """Wait for an asynchronous API task to finish."""
+    path = u'foreman_tasks/api/tasks/{0}'.format(task['id'])
+    deadline = time.time() + TASK_TIMEOUT
+    while task.get('state') != 'stopped':
+        if time.time() > deadline:
+            raise CLIReturnCodeError(
+                -1, u'', u'Timed out waiting for task {0}'.format(task['id']))
+        time.sleep(TASK_POLL_INTERVAL)
+        task = request('GET', path)
+    if task.get('result') != 'success':
+        msg = u'Task {0} finished with result {1}: {2}'.format(
+            task['id'], task.get('result'), task.get('humanized'))
+        raise CLIReturnCodeError(1, msg, msg)
+    return task
+
+
+def request(method, path, params=None, payload=None):
+    """Call the API of the configured server.
+
+    :param str method: the HTTP method.
+    :param str path: the API path, like ``katello/api/v2/products``.
+    :param dict params: the query string parameters.
+    :param dict payload: the JSON body.
+    :return: the decoded JSON response. Asynchronous tasks started by the
+        call are waited for.
+    """
+    url = u'{0}/{1}'.format(settings.server.get_url(), path)
+    logger.info('>>> %s %s %s %s', method, url, params or '', payload or '')
+    response = get_session().request(
+        method, url, params=params, json=payload)
+    _raise_for_status(response, method, path)
+    if not response.content:
+        return {}
+    data = response.json()
+    if response.status_code == 202 and 'state' in data and 'id' in data:
+        data = _wait_for_task(data)
+    return data
+
+
+def _entity_path(cls, options):
+    return u'{0}/{1}'.format(cls.rest_path, options[u'id'])
+
+
+def _payload(cls, options):
+    params = _params(options, cls.rest_options)
+    if cls.rest_resource is not None:
+        params = {cls.rest_resource: params}
+    return params
+
+
+def create(cls, options):
+    """Create an entity and return its normalized ``id`` and ``name``, like
+    the hammer ``create`` output."""
+    data = _normalize(request('POST', cls.rest_path, payload=_payload(
+        cls, options)))
+    return {key: data[key] for key in (u'id', u'name') if key in data}
+
+
+def update(cls, options):
+    """Update an entity and return its normalized information."""
+    options = dict(options)
+    path = _entity_path(cls, options)
+    del options[u'id']
+    return _normalize(request('PUT', path, payload=_payload(cls, options)))
+
+
+def delete(cls, options):
+    """Delete an entity."""
+    return _normalize(request('DELETE', _entity_path(cls, options)))
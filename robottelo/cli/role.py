@@ -26,6 +26,5 @@ class Role(Base):
 
     @classmethod
     def filters(cls, options=None):
-        cls.command_sub = 'filters'
         return cls.execute(
-            cls._construct_command(options), output_format='json')
+            cls._construct_command(options, 'filters'), output_format='json')
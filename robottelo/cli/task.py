@@ -36,8 +36,7 @@ class Task(Base):
             --id ID                       UUID of the task
             --name NAME                   Name to search by
         """
-        cls.command_sub = 'progress'
-        return cls.execute(cls._construct_command(options),
+        return cls.execute(cls._construct_command(options, 'progress'),
                            return_raw_response=return_raw_response)
 
     @classmethod
@@ -52,5 +51,4 @@ class Task(Base):
             --task-ids TASK_IDS           Comma separated list of values.
             --tasks TASK_NAMES            Comma separated list of values.
         """
-        cls.command_sub = 'resume'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'resume'))
@@ -37,10 +37,9 @@ class Template(Base):
     @classmethod
     def kinds(cls, options=None):
         """Returns list of types of templates."""
-        cls.command_sub = 'kinds'
 
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'kinds'), output_format='csv')
 
         kinds = []
         if result:
@@ -51,33 +50,35 @@ class Template(Base):
     @classmethod
     def add_operatingsystem(cls, options=None):
         """Adds operating system, requires "id" and "operatingsystem-id"."""
-        cls.command_sub = 'add-operatingsystem'
 
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'add-operatingsystem'),
+            output_format='csv',
+        )
 
         return result
 
     @classmethod
     def remove_operatingsystem(cls, options=None):
         """Remove operating system, requires "id" and "operatingsystem-id"."""
-        cls.command_sub = 'remove-operatingsystem'
 
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'remove-operatingsystem'),
+            output_format='csv',
+        )
 
         return result
 
     @classmethod
     def clone(cls, options=None):
         """Clone provided provisioning template"""
-        cls.command_sub = 'clone'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'clone'), output_format='csv')
 
     @classmethod
     def build_pxe_default(cls, options=None):
         """Build PXE default template"""
-        cls.command_sub = 'build-pxe-default'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'build-pxe-default'),
+            output_format='csv',
+        )
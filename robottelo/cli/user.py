@@ -29,17 +29,32 @@ class User(Base):
     """
 
     command_base = 'user'
+    rest_path = 'api/v2/users'
+    rest_resource = 'user'
+    rest_options = {
+        u'admin': u'admin',
+        u'auth-source-id': u'auth_source_id',
+        u'default-location-id': u'default_location_id',
+        u'default-organization-id': u'default_organization_id',
+        u'firstname': u'firstname',
+        u'lastname': u'lastname',
+        u'location-ids': u'location_ids',
+        u'login': u'login',
+        u'mail': u'mail',
+        u'organization-ids': u'organization_ids',
+        u'password': u'password',
+    }
 
     @classmethod
     def add_role(cls, options=None):
         """Add a role to a user."""
-        cls.command_sub = 'add-role'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'add-role'), output_format='csv')
 
     @classmethod
     def remove_role(cls, options=None):
         """Remove a role from user."""
-        cls.command_sub = 'remove-role'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'remove-role'),
+            output_format='csv',
+        )
@@ -0,0 +1,137 @@
+# coding: utf-8
+"""
+This module contains commands to work with recorded performance results
+
+Commands included:
+
+Runs
+----
+
+A command to list the runs recorded in the results store written by the
+performance tests::
+
+    $ manage perf runs
+
+Compare
+-------
+
+A command to compare the latencies and throughputs of two runs and flag the
+statistically significant regressions, exiting with status 1 if any is
+found::
+
+    $ manage perf compare <baseline run> <candidate run>
+
+Dashboard
+---------
+
+A command to write the HTML dashboard of a run, rewriting it every
+``--refresh`` seconds while a run is in progress when ``--watch`` is given::
+
+    $ manage perf dashboard <run> --watch
+
+Please take a look at :doc:`commands package </features/commands>` page
+in documentation for more details.
+
+"""
+import click
+import datetime
+import time
+
+from robottelo.performance.constants import (
+    DASHBOARD_FILE_NAME,
+    DASHBOARD_REFRESH,
+    RESULTS_DB_FILE_NAME,
+)
+from robottelo.performance.dashboard import write_dashboard
+from robottelo.performance.results import (
+    compare_runs,
+    COMPARE_ALPHA,
+    COMPARE_THRESHOLD,
+    ResultsStore,
+)
+
+
+@click.command()
+@click.option('--db', default=RESULTS_DB_FILE_NAME, show_default=True,
+              type=click.Path(exists=True, dir_okay=False),
+              help='results store written by the performance tests')
+def runs(db):
+    """Lists the recorded runs, oldest first\n
+        example: $ manage perf runs --db perf-results.sqlite\n
+    """
+    for run, sat_version, created in ResultsStore(db).runs():
+        click.echo(u'{0}  {1}  {2}'.format(
+            run,
+            datetime.datetime.fromtimestamp(created).strftime(
+                '%Y-%m-%d %H:%M:%S'),
+            sat_version or u'unknown version',
+        ))
+
+
+@click.command()
+@click.option('--db', default=RESULTS_DB_FILE_NAME, show_default=True,
+              type=click.Path(exists=True, dir_okay=False),
+              help='results store written by the performance tests')
+@click.option('--alpha', default=COMPARE_ALPHA, show_default=True,
+              help='significance level of the tests')
+@click.option('--threshold', default=COMPARE_THRESHOLD, show_default=True,
+              help='relative change of the median to ignore')
+@click.argument('baseline')
+@click.argument('candidate')
+def compare(baseline, candidate, db, alpha, threshold):
+    """Compares a candidate run to a baseline run:\n
+    Latencies and throughputs of every test case run in both are compared
+    with a Mann-Whitney U test.\n
+        example: $ manage perf compare 20170101-100000-1a2b3c4d
+                 20170201-100000-5e6f7a8b\n
+                 Exits with status 1 when a regression is found\n
+    """
+    comparisons = compare_runs(
+        ResultsStore(db), baseline, candidate, alpha, threshold)
+    if not comparisons:
+        raise click.ClickException(
+            'No test case found in both runs {0} and {1}'.format(
+                baseline, candidate))
+    for comparison in comparisons:
+        status = u''
+        if comparison.regressed:
+            status = click.style(u'REGRESSED', fg='red')
+        elif comparison.improved:
+            status = click.style(u'improved', fg='green')
+        click.echo(
+            u'{0:40} {1:>4} {2:10} {3:>10.4f} {4:>10.4f} {5:>+8.1%} '
+            u'p={6:<8.4f} {7}'.format(
+                comparison.test_case, comparison.threads, comparison.metric,
+                comparison.baseline, comparison.candidate, comparison.change,
+                comparison.p_value, status
+            )
+        )
+    if any(comparison.regressed for comparison in comparisons):
+        raise SystemExit(1)
+
+
+@click.command()
+@click.option('--db', default=RESULTS_DB_FILE_NAME, show_default=True,
+              type=click.Path(exists=True, dir_okay=False),
+              help='results store written by the performance tests')
+@click.option('--output', default=DASHBOARD_FILE_NAME, show_default=True,
+              type=click.Path(dir_okay=False),
+              help='HTML page to write')
+@click.option('--refresh', default=DASHBOARD_REFRESH, show_default=True,
+              help='seconds after which the page is reloaded')
+@click.option('--watch', is_flag=True,
+              help='rewrite the page every --refresh seconds')
+@click.argument('run')
+def dashboard(run, db, output, refresh, watch):
+    """Writes the HTML dashboard of a run:\n
+    Summary, envelope of the timings and server CPU usage of every test
+    case.\n
+        example: $ manage perf dashboard 20170101-100000-1a2b3c4d --watch\n
+    """
+    store = ResultsStore(db)
+    while True:
+        write_dashboard(store, run, output, refresh if watch else 0)
+        click.echo(u'{0} written'.format(output))
+        if not watch:
+            break
+        time.sleep(refresh)
@@ -658,6 +658,9 @@ class PerformanceSettings(FeatureSettings):
         self.sync_count = None
         self.sync_type = None
         self.repos = None
+        self.driver_processes = None
+        self.sample_resources = None
+        self.dashboard_refresh = None
 
     def read(self, reader):
         """Read performance settings."""
@@ -679,6 +682,12 @@ class PerformanceSettings(FeatureSettings):
             'performance', 'sync_type', 'sync')
         self.repos = reader.get(
             'performance', 'repos', cast=list)
+        self.driver_processes = reader.get(
+            'performance', 'driver_processes', 0, int)
+        self.sample_resources = reader.get(
+            'performance', 'sample_resources', False, bool)
+        self.dashboard_refresh = reader.get(
+            'performance', 'dashboard_refresh', 0, int)
 
     def validate(self):
         """Validate performance settings."""
@@ -788,6 +797,9 @@ class Settings(object):
         self._validation_errors = []
         self.browser = None
         self.cdn = None
+        self.cli_factory_backend = None
+        self.cli_lazy_info = None
+        self.hammer_session = None
         self.locale = None
         self.project = None
         self.reader = None
@@ -891,6 +903,12 @@ class Settings(object):
         self.browser = self.reader.get(
             'robottelo', 'browser', 'selenium')
         self.cdn = self.reader.get('robottelo', 'cdn', True, bool)
+        self.cli_factory_backend = self.reader.get(
+            'robottelo', 'cli_factory_backend', 'hammer')
+        self.cli_lazy_info = self.reader.get(
+            'robottelo', 'cli_lazy_info', False, bool)
+        self.hammer_session = self.reader.get(
+            'robottelo', 'hammer_session', False, bool)
         self.locale = self.reader.get('robottelo', 'locale', 'en_US.UTF-8')
         self.project = self.reader.get('robottelo', 'project', 'sat')
         self.rhel6_repo = self.reader.get('robottelo', 'rhel6_repo', None)
@@ -933,12 +951,18 @@ class Settings(object):
         """Validate Robottelo's general settings."""
         validation_errors = []
         browsers = ('selenium', 'docker', 'saucelabs')
+        cli_backends = ('hammer', 'rest')
         webdrivers = ('chrome', 'edge', 'firefox', 'ie', 'phantomjs', 'remote')
         if self.browser not in browsers:
             validation_errors.append(
                 '[robottelo] browser should be one of {0}.'
                 .format(', '.join(browsers))
             )
+        if self.cli_factory_backend not in cli_backends:
+            validation_errors.append(
+                '[robottelo] cli_factory_backend should be one of {0}.'
+                .format(', '.join(cli_backends))
+            )
         if self.webdriver not in webdrivers:
             validation_errors.append(
                 '[robottelo] webdriver should be one of {0}.'
@@ -1,9 +1,13 @@
 # -*- encoding: utf-8 -*-
 """Implements various decorators"""
 import logging
+import threading
+import time
 from functools import partial, wraps
 
+import cachetools
 import pytest
+import six
 import unittest2
 
 from robottelo.config import settings
@@ -16,7 +20,12 @@ from robozilla.decorators import (  # noqa
 )
 
 LOGGER = logging.getLogger(__name__)
-OBJECT_CACHE = {}
+#: Maximum number of objects kept by :data:`OBJECT_CACHE`, the least recently
+#: used ones are evicted first
+OBJECT_CACHE_MAXSIZE = 256
+#: Seconds an object is kept by :data:`OBJECT_CACHE`, ``None`` keeps it until
+#: it is evicted or invalidated
+OBJECT_CACHE_TTL = None
 
 # Test Tier Decorators
 # CRUD tests
@@ -166,8 +175,164 @@ def stubbed(reason=None):
     return wrapper
 
 
+def _canonical(value):
+    """Return a hashable value equal for equivalent factory options.
+
+    Dictionaries and sets are sorted and scalars compared by their text, so
+    ``{'organization-id': 1}`` and ``{u'organization-id': u'1'}`` match.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted(
+            (six.text_type(key), _canonical(item))
+            for key, item in value.items()
+            if item is not None
+        ))
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_canonical(item) for item in value))
+    if value is None:
+        return None
+    return six.text_type(value)
+
+
+class ObjectCache(object):
+    """Thread safe cache of the objects created by :func:`cacheable`
+    functions.
+
+    Objects are stored by function name and options. The least recently
+    used objects are evicted once ``maxsize`` is reached and, when ``ttl``
+    is set, objects older than ``ttl`` seconds, as measured by ``timer``,
+    are dropped. ``hits`` and ``misses`` count the lookups.
+    """
+
+    def __init__(self, maxsize=OBJECT_CACHE_MAXSIZE, ttl=OBJECT_CACHE_TTL,
+                 timer=time.time):
+        if ttl is None:
+            self._cache = cachetools.LRUCache(maxsize)
+        else:
+            self._cache = cachetools.TTLCache(maxsize, ttl, timer=timer)
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(name, options):
+        """Return the cache key of the object created by the ``name``
+        function with ``options``."""
+        return name, _canonical(options or {})
+
+    def get(self, name, options):
+        """Return the object created by ``name`` with ``options`` or
+        ``None`` if it is not cached."""
+        with self._lock:
+            obj = self._cache.get(self.key(name, options))
+            if obj is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return obj
+
+    def set(self, name, options, obj):
+        """Cache the object created by ``name`` with ``options``."""
+        with self._lock:
+            self._cache[self.key(name, options)] = obj
+
+    def invalidate(self, name=None, options=None, entity_id=None,
+                   entity_name=None):
+        """Drop cached objects.
+
+        Call it when a cached entity is deleted or updated so following
+        calls create a new one. With no argument the whole cache is cleared.
+
+        :param str name: only drop objects created by this function, like
+            ``org`` for ``make_org``.
+        :param dict options: only drop the object created with these
+            options, requires ``name``.
+        :param entity_id: only drop objects with this ``id``.
+        :param entity_name: only drop objects with this ``name``.
+        :return: the number of dropped objects.
+
+        Identifiers are read from the data already held by the objects, a
+        :class:`robottelo.cli.base.LazyInfo` is never loaded while the cache
+        is locked.
+        """
+        with self._lock:
+            if name is not None and options is not None:
+                keys = [self.key(name, options)]
+            else:
+                keys = list(self._cache)
+            dropped = 0
+            for key in keys:
+                obj = self._cache.get(key)
+                if obj is None:
+                    continue
+                if name is not None and key[0] != name:
+                    continue
+                if ((entity_id is not None or entity_name is not None) and
+                        not isinstance(obj, dict)):
+                    continue
+                if entity_id is not None and (
+                        six.text_type(dict.get(obj, 'id')) !=
+                        six.text_type(entity_id)):
+                    continue
+                if entity_name is not None and (
+                        dict.get(obj, 'name') != entity_name):
+                    continue
+                del self._cache[key]
+                dropped += 1
+            return dropped
+
+    def clear(self):
+        """Drop all the cached objects and reset the counters."""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return a dictionary with the ``hits``, ``misses`` and ``size`` of
+        the cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._cache),
+            }
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    def __len__(self):
+        return len(self._cache)
+
+
+#: Cache of the objects created by :func:`cacheable` functions
+OBJECT_CACHE = ObjectCache()
+
+
+def invalidate_cached(entity_id=None, entity_name=None):
+    """Drop the cached objects with the given ``id`` or ``name``.
+
+    Called when an entity is deleted or updated. Objects created by
+    different factories can share an id, all of them are dropped, which
+    only costs a new object on the next cached call.
+    """
+    if entity_id is None and entity_name is None:
+        return 0
+    return OBJECT_CACHE.invalidate(
+        entity_id=entity_id, entity_name=entity_name)
+
+
 def cacheable(func):
-    """Decorator that makes an optional object cache available"""
+    """Decorator that makes an optional object cache available.
+
+    Functions called with ``cached=True`` return the object created by an
+    earlier cached call with the same options, see :class:`ObjectCache`.
+    The decorated function also gets an ``invalidate(options=None)``
+    attribute dropping its cached objects.
+    """
+    object_key = func.__name__.replace('make_', '')
 
     @wraps(func)
     def cacheable_function(options=None, cached=False):
@@ -175,14 +340,22 @@ def cacheable(func):
         This is the function being returned.
         Requires input function's name start with 'make_'
         """
-        object_key = func.__name__.replace('make_', '')
-        if cached is True and object_key in OBJECT_CACHE:
-            return OBJECT_CACHE[object_key]
-        new_object = func(options)
-        if cached is True:
-            OBJECT_CACHE[object_key] = new_object
+        if cached is not True:
+            return func(options)
+        # factories may update the options they are given
+        cache_options = dict(options or {})
+        new_object = OBJECT_CACHE.get(object_key, cache_options)
+        if new_object is None:
+            new_object = func(options)
+            OBJECT_CACHE.set(object_key, cache_options, new_object)
         return new_object
 
+    def invalidate(options=None):
+        """Drop the objects cached by this function, only the one created
+        with ``options`` if given."""
+        return OBJECT_CACHE.invalidate(object_key, options)
+
+    cacheable_function.invalidate = invalidate
     return cacheable_function
 
 
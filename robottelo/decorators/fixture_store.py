@@ -0,0 +1,202 @@
+# -*- encoding: utf-8 -*-
+"""Share fixture entities between the pytest xdist workers of a run.
+
+:mod:`robottelo.decorators.func_locker` serializes the creation of costly
+entities but every worker still creates its own. The store keeps the value
+returned by the first worker creating a fixture, usually a dictionary of
+entity ids, in a sqlite database next to the function locks. The other
+workers wait for the fixture lock and reuse the published value.
+
+The entities are kept until the end of the run, whatever the workers using
+them: :func:`teardown_fixtures` is called by the ``pytest_sessionfinish``
+hook of the process starting the run, the xdist controller, and deletes
+them with the ``delete`` function given on creation. That function is
+called in an other process than the one creating the fixture, so it must
+be a module level function.
+
+Usage::
+
+    from robottelo.decorators.fixture_store import acquire_fixture
+
+    def make_manifest_org():
+        org = make_org()
+        upload_manifest(org['id'])
+        return {'id': org['id'], 'name': org['name']}
+
+    def delete_manifest_org(org):
+        Org.delete({'id': org['id']})
+
+    class SomeTestCase(TestCase):
+
+        @classmethod
+        def setUpClass(cls):
+            cls.org = acquire_fixture(
+                'manifest_org', make_manifest_org, delete_manifest_org)
+
+Values must be serializable to JSON. Fixtures are shared only between the
+processes of a same run, identified by the ``ROBOTTELO_FIXTURE_STORE_RUN``
+environment variable which is set by the first process using the store and
+inherited by the workers it starts. Set it explicitly to share fixtures
+between separate runs, they are then only deleted by an explicit call to
+:func:`teardown_fixtures`.
+"""
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+import uuid
+
+from contextlib import closing, contextmanager
+
+from pytest_services.locks import file_lock
+
+from robottelo.decorators.func_locker import _get_temp_lock_function_dir
+
+logger = logging.getLogger(__name__)
+
+#: Environment variable identifying the run sharing the fixtures
+RUN_ID_ENV = 'ROBOTTELO_FIXTURE_STORE_RUN'
+#: Name of the sqlite database in the function locks directory
+STORE_FILE_NAME = 'fixture_store.sqlite'
+#: Seconds a worker waits for an other worker creating a fixture
+LOCK_TIMEOUT = 3600
+#: Seconds after which the fixtures of other runs are dropped from the store
+STORE_MAX_AGE = 86400
+
+
+def get_run_id():
+    """Return the identifier of the current run, generating it on first
+    use so the processes started afterwards share it."""
+    run_id = os.environ.get(RUN_ID_ENV)
+    if not run_id:
+        run_id = uuid.uuid4().hex
+        os.environ[RUN_ID_ENV] = run_id
+    return run_id
+
+
+def _get_store_path():
+    """Return the path of the sqlite database"""
+    return os.path.join(_get_temp_lock_function_dir(), STORE_FILE_NAME)
+
+
+def _get_fixture_lock_path(name):
+    """Return the path of the file to lock while using the fixture"""
+    return os.path.join(
+        _get_temp_lock_function_dir(),
+        'fixture_store.{0}.{1}'.format(get_run_id(), name)
+    )
+
+
+def _function_path(function):
+    """Return the ``module:name`` path of a module level function"""
+    path = u'{0}:{1}'.format(function.__module__, function.__name__)
+    if _import_function(path) is not function:
+        raise ValueError(
+            'The delete function of a shared fixture must be a module '
+            'level function, got {0!r}'.format(function))
+    return path
+
+
+def _import_function(path):
+    """Return the function of a path returned by :func:`_function_path`"""
+    module_name, name = path.split(u':', 1)
+    __import__(module_name)
+    return getattr(sys.modules[module_name], name, None)
+
+
+def _connect():
+    """Open the store, creating its table and dropping outdated runs."""
+    connection = sqlite3.connect(_get_store_path(), timeout=60)
+    with connection:
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS shared_fixtures ('
+            'run TEXT, name TEXT, value TEXT, teardown TEXT, '
+            'created REAL, PRIMARY KEY (run, name))'
+        )
+        connection.execute(
+            'DELETE FROM shared_fixtures WHERE run != ? AND created < ?',
+            (get_run_id(), time.time() - STORE_MAX_AGE)
+        )
+    return connection
+
+
+@contextmanager
+def _locked_store(name):
+    """Lock the fixture ``name`` and yield a connection to the store"""
+    lock_file_path = _get_fixture_lock_path(name)
+    with file_lock(lock_file_path, timeout=LOCK_TIMEOUT):
+        logger.info('locking fixture using file path:{}'.format(
+            lock_file_path))
+        with closing(_connect()) as connection:
+            with connection:
+                yield connection
+
+
+def acquire_fixture(name, create, delete=None):
+    """Return the value of the shared fixture ``name``.
+
+    The first call of the run creates the fixture with ``create()`` and
+    publishes the returned value, following calls from any worker return
+    that value. Workers calling it while the fixture is created wait for it.
+
+    :param str name: the name of the fixture, unique for the run.
+    :param create: a callable with no argument creating the fixture and
+        returning a value serializable to JSON.
+    :param delete: a module level function called with the value by
+        :func:`teardown_fixtures` at the end of the run, to delete the
+        entities of the fixture.
+    :return: the value returned by ``create``.
+    :raises ValueError: if ``delete`` is not a module level function.
+    """
+    teardown = None if delete is None else _function_path(delete)
+    with _locked_store(name) as connection:
+        row = connection.execute(
+            'SELECT value FROM shared_fixtures WHERE run = ? AND name = ?',
+            (get_run_id(), name)
+        ).fetchone()
+        if row is not None:
+            logger.info('reusing shared fixture %s', name)
+            return json.loads(row[0])
+        value = create()
+        connection.execute(
+            'INSERT INTO shared_fixtures VALUES (?, ?, ?, ?, ?)',
+            (get_run_id(), name, json.dumps(value), teardown, time.time())
+        )
+        logger.info('created shared fixture %s', name)
+        return value
+
+
+def teardown_fixtures():
+    """Delete the entities of all the shared fixtures of the run and remove
+    them from the store.
+
+    To be called once the workers of the run are done. Failures to delete a
+    fixture are logged and the fixture removed anyway.
+
+    :return: the names of the removed fixtures.
+    """
+    with closing(_connect()) as connection:
+        with connection:
+            rows = connection.execute(
+                'SELECT name, value, teardown FROM shared_fixtures '
+                'WHERE run = ? ORDER BY created DESC',
+                (get_run_id(),)
+            ).fetchall()
+    names = []
+    for name, value, teardown in rows:
+        with _locked_store(name) as connection:
+            if teardown is not None:
+                try:
+                    _import_function(teardown)(json.loads(value))
+                except Exception as err:
+                    logger.error(
+                        'failed to delete shared fixture %s: %s', name, err)
+            connection.execute(
+                'DELETE FROM shared_fixtures WHERE run = ? AND name = ?',
+                (get_run_id(), name)
+            )
+        logger.info('removed shared fixture %s', name)
+        names.append(name)
+    return names
@@ -398,10 +398,15 @@ def get_func_name(func):
     return '{0}.{1}'.format(func.__module__, func.__name__)
 
 
-def get_services_status():
-    """Check if core services are running"""
-    major_version = get_host_info()[1]
-    services = (
+def get_services(major_version=None):
+    """Return the names of the core services of the Satellite
+
+    :param int major_version: The RHEL major version of the server, read from
+        the server when ``None``
+    """
+    if major_version is None:
+        major_version = get_host_info()[1]
+    return (
         'foreman-proxy',
         'foreman-tasks',
         'httpd',
@@ -418,6 +423,12 @@ def get_services_status():
         'tomcat6' if major_version == RHEL_6_MAJOR_VERSION else 'tomcat',
     )
 
+
+def get_services_status():
+    """Check if core services are running"""
+    major_version = get_host_info()[1]
+    services = get_services(major_version)
+
     # check `services` status using service command
     if major_version >= RHEL_7_MAJOR_VERSION:
         status_format = '''(for i in {0}; do systemctl status $i; rc=$?;
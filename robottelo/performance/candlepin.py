@@ -2,15 +2,19 @@
 
 Part of functionalities of Candlepin are defined in this module
 and have utilities of single register by activation-key, single
-register and attach, single subscription deletion.
+register and attach, single subscription deletion, and a load generator
+registering synthetic consumers straight to the server.
 
 """
 import logging
 import requests
 import time
 
+from multiprocessing.pool import ThreadPool
 from robottelo import ssh
+from robottelo.cli import rest
 from robottelo.config import settings
+from robottelo.system_facts import generate_system_facts
 from six.moves.urllib.parse import urljoin
 
 LOGGER = logging.getLogger(__name__)
@@ -23,18 +27,14 @@ class Candlepin(object):
     """
     @staticmethod
     def get_real_time(result):
-        """Parse stderr and extract out real time value
+        """Return the real time of a command run with ``remote_timing``
 
-        :param str result: Standard Error
+        :param result: The :class:`robottelo.ssh.SSHCommandResult` of the
+            command
         :return: The real timing value
 
         """
-        real_time = [
-            real
-            for real in result.split('\n')
-            if real.startswith('real')
-        ]
-        return float(real_time[0].split(' ')[1])
+        return result.timing.real
 
     @classmethod
     def single_register_activation_key(cls, ak_name, default_org, vm_ip):
@@ -43,16 +43,17 @@ class Candlepin(object):
         # note: must create ssh keys for vm if running on local
         result = ssh.command('subscription-manager clean', hostname=vm_ip)
         result = ssh.command(
-            'time -p subscription-manager register --activationkey={0} '
+            'subscription-manager register --activationkey={0} '
             '--org={1}'.format(ak_name, default_org),
-            hostname=vm_ip
+            hostname=vm_ip,
+            remote_timing=True
         )
 
         if result.return_code != 0:
             LOGGER.error('Fail to subscribe {0} by ak!'.format(vm_ip))
         else:
             LOGGER.info('Subscribe client {0} successfully'.format(vm_ip))
-        return cls.get_real_time(result.stderr)
+        return cls.get_real_time(result)
 
     @classmethod
     def single_register_attach(cls, sub_id, default_org, environment, vm_ip):
@@ -69,7 +70,7 @@ class Candlepin(object):
     def sub_mgr_register_authentication(cls, default_org, environment, vm_ip):
         """subscription-manager register -u -p --org --environment"""
         result = ssh.command(
-            'time -p subscription-manager register --username={0} '
+            'subscription-manager register --username={0} '
             '--password={1} '
             '--org={2} '
             '--environment={3}'
@@ -79,7 +80,8 @@ class Candlepin(object):
                 default_org,
                 environment
             ),
-            hostname=vm_ip
+            hostname=vm_ip,
+            remote_timing=True
         )
 
         if result.return_code != 0:
@@ -88,21 +90,22 @@ class Candlepin(object):
             )
         else:
             LOGGER.info('Register client {0} successfully'.format(vm_ip))
-        return cls.get_real_time(result.stderr)
+        return cls.get_real_time(result)
 
     @classmethod
     def sub_mgr_attach(cls, pool_id, vm_ip):
         """subscription-manager attach --pool=pool_id"""
         result = ssh.command(
-            'time -p subscription-manager attach --pool={0}'.format(pool_id),
-            hostname=vm_ip
+            'subscription-manager attach --pool={0}'.format(pool_id),
+            hostname=vm_ip,
+            remote_timing=True
         )
 
         if result.return_code != 0:
             LOGGER.error('Fail to attach client {0}'.format(vm_ip))
         else:
             LOGGER.info('Attach client {0} successfully'.format(vm_ip))
-        return cls.get_real_time(result.stderr)
+        return cls.get_real_time(result)
 
     @classmethod
     def single_delete(cls, id, thread_id):
@@ -129,3 +132,159 @@ class Candlepin(object):
         end = time.time()
         LOGGER.info('real  {0}s'.format(end-start))
         return end - start
+
+
+class VirtualConsumer(object):
+    """A synthetic consumer registered by :class:`ConsumerLoadGenerator`
+
+    :ivar str name: The consumer host name
+    :ivar dict facts: The system facts sent when registering
+    :ivar str uuid: The consumer uuid, ``None`` until registered
+
+    """
+    def __init__(self, name=None):
+        self.facts = generate_system_facts(name)
+        self.name = self.facts['network.hostname']
+        self.uuid = None
+
+
+class ConsumerLoadGenerator(object):
+    """Register, attach and delete synthetic consumers through the
+    Candlepin API exposed by Katello, without a virtual machine per client
+
+    Requests go through pooled ``requests`` sessions, one per thread, and
+    each latency is stored in the ``time_result_dict`` shape used by
+    :class:`robottelo.test.ConcurrentTestCase`::
+
+        generator = ConsumerLoadGenerator(org_label, activation_key='ak-1')
+        consumers = [VirtualConsumer() for _ in range(5000)]
+        time_result_dict_ak = generator.register(consumers, num_threads=10)
+        time_result_dict_del = generator.delete(consumers, num_threads=10)
+
+    :param str org_label: Label of the organization, the Candlepin owner
+    :param str activation_key: Name of the activation key used to register,
+        consumers are registered with the admin credentials when ``None``
+    :param str environment: Id of the lifecycle environment and content view
+        to register to when no activation key is given
+
+    """
+    def __init__(self, org_label, activation_key=None, environment=None):
+        self.org_label = org_label
+        self.activation_key = activation_key
+        self.environment = environment
+        #: Number of failed requests per action
+        self.errors = {}
+
+    def _request(self, action, method, path, **kwargs):
+        """Send a request and return its response and latency"""
+        url = urljoin(settings.server.get_url(), path)
+        start = time.time()
+        response = rest.get_session().request(method, url, **kwargs)
+        latency = time.time() - start
+        if not response.ok:
+            self.errors[action] = self.errors.get(action, 0) + 1
+            LOGGER.error(
+                '{0} {1} failed with status {2}: {3}'.format(
+                    method, path, response.status_code, response.text)
+            )
+            return None, latency
+        return response, latency
+
+    def register_consumer(self, consumer):
+        """Register a consumer
+
+        :return: The request latency, ``None`` if it failed
+
+        """
+        params = {'owner': self.org_label}
+        if self.activation_key is not None:
+            params['activation_keys'] = self.activation_key
+        elif self.environment is not None:
+            params['environment'] = self.environment
+        response, latency = self._request(
+            'register', 'POST', '/rhsm/consumers', params=params, json={
+                'name': consumer.name,
+                'type': 'system',
+                'facts': consumer.facts,
+                'installedProducts': [],
+            }
+        )
+        if response is None:
+            return None
+        consumer.uuid = response.json()['uuid']
+        return latency
+
+    def attach_consumer(self, consumer, pool_id):
+        """Attach a subscription pool to a registered consumer
+
+        :return: The request latency, ``None`` if it failed
+
+        """
+        response, latency = self._request(
+            'attach', 'POST',
+            '/rhsm/consumers/{0}/entitlements'.format(consumer.uuid),
+            params={'pool': pool_id}
+        )
+        return None if response is None else latency
+
+    def delete_consumer(self, consumer):
+        """Delete a registered consumer
+
+        :return: The request latency, ``None`` if it failed
+
+        """
+        response, latency = self._request(
+            'delete', 'DELETE', '/rhsm/consumers/{0}'.format(consumer.uuid))
+        if response is None:
+            return None
+        consumer.uuid = None
+        return latency
+
+    def _run(self, func, consumers, num_threads, *args):
+        """Split consumers among threads and call ``func`` on each of them
+
+        :return: The latencies of the successful requests of each thread,
+            keyed by ``thread-<index>``
+        :rtype: dict
+
+        """
+        def run_thread(thread_id):
+            time_points = []
+            for consumer in consumers[thread_id::num_threads]:
+                time_point = func(consumer, *args)
+                if time_point is not None:
+                    time_points.append(time_point)
+            return time_points
+
+        pool = ThreadPool(num_threads)
+        try:
+            results = pool.map(run_thread, range(num_threads))
+        finally:
+            pool.close()
+            pool.join()
+        return dict(
+            ('thread-{0}'.format(thread_id), time_points)
+            for thread_id, time_points in enumerate(results)
+        )
+
+    def register(self, consumers, num_threads):
+        """Register consumers from ``num_threads`` threads"""
+        return self._run(self.register_consumer, consumers, num_threads)
+
+    def attach(self, consumers, pool_id, num_threads):
+        """Attach a subscription pool to registered consumers from
+        ``num_threads`` threads"""
+        return self._run(
+            self.attach_consumer,
+            [consumer for consumer in consumers if consumer.uuid],
+            num_threads,
+            pool_id
+        )
+
+    def delete(self, consumers, num_threads):
+        """Delete registered consumers from ``num_threads`` threads"""
+        return self._run(
+            self.delete_consumer,
+            [consumer for consumer in consumers if consumer.uuid],
+            num_threads
+        )
@@ -31,3 +31,19 @@ STAT_SYNC_FILE_NAME = 'perf-statistics-sync.csv'
 
 # parameters for number of threads/clients
 NUM_THREADS = '1,2,4,6,8,10'
+
+# parameters for the pipelined sync driver
+SYNC_POLL_INTERVAL = 5
+SYNC_POLL_BATCH = 50
+SYNC_TIMEOUT = 14400
+
+# parameter for the results store
+RESULTS_DB_FILE_NAME = 'perf-results.sqlite'
+
+# parameters for the resource sampler
+SAMPLER_INTERVAL = 5
+
+# parameters for the charts and the dashboard
+CHART_MAX_POINTS = 200
+DASHBOARD_FILE_NAME = 'perf-dashboard.html'
+DASHBOARD_REFRESH = 30
@@ -0,0 +1,197 @@
+"""HTML dashboard of a performance run refreshed from the results store
+
+:func:`write_dashboard` renders a single HTML page with the summary, the
+timings envelope and the server CPU usage of every test case recorded for a
+run in a :class:`robottelo.performance.results.ResultsStore`. Charts are
+downsampled and inlined, and the page asks the browser to reload it, so
+rewriting it periodically with :class:`DashboardWriter` gives a live view of
+a run in progress::
+
+    writer = DashboardWriter(ResultsStore(), get_run_id())
+    writer.start()
+    ...
+    writer.stop()
+
+"""
+import logging
+import os
+import threading
+import time
+
+from robottelo.performance.constants import (
+    DASHBOARD_FILE_NAME,
+    DASHBOARD_REFRESH,
+)
+from robottelo.performance.graph import (
+    line_chart_envelope,
+    StreamingEnvelope,
+    xy_chart_resources,
+)
+from robottelo.performance.stat import LatencyHistogram
+from xml.sax.saxutils import escape
+
+LOGGER = logging.getLogger(__name__)
+
+_PAGE = u'''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+{refresh}<title>Performance run {run}</title>
+<style>
+body {{ font-family: sans-serif; }}
+table {{ border-collapse: collapse; }}
+td, th {{ border: 1px solid #ccc; padding: 2px 8px; text-align: right; }}
+figure {{ display: inline-block; width: 48%; margin: 0; }}
+</style>
+</head>
+<body>
+<h1>Performance run {run}</h1>
+<p>Updated {updated}</p>
+<table>
+<tr><th>test case</th><th>clients</th><th>samples</th><th>median</th>
+<th>95%</th><th>max</th></tr>
+{rows}
+</table>
+{sections}
+</body>
+</html>
+'''
+_ROW = (
+    u'<tr><td>{0}</td><td>{1}</td><td>{2}</td><td>{3:.3f}</td>'
+    u'<td>{4:.3f}</td><td>{5:.3f}</td></tr>'
+)
+
+
+def _svg(chart):
+    """Return a chart rendered to be inlined in a HTML page"""
+    return chart.render(is_unicode=True, disable_xml_declaration=True)
+
+
+def render_dashboard(store, run_id, refresh=DASHBOARD_REFRESH):
+    """Return the dashboard of a run as a HTML page
+
+    :param store: The :class:`robottelo.performance.results.ResultsStore`
+        the run is recorded in
+    :param str run_id: The run to show
+    :param int refresh: Seconds after which the browser reloads the page,
+        ``0`` to never reload it
+    :rtype: str
+
+    """
+    rows = []
+    sections = []
+    for (test_case, threads), clients in sorted(
+            store.samples(run_id).items()):
+        histogram = LatencyHistogram()
+        envelope = StreamingEnvelope()
+        envelope.record_many({
+            'thread-{0}'.format(client): latencies
+            for client, latencies in enumerate(clients)
+        })
+        for latencies in clients:
+            histogram.record_many(latencies)
+        if histogram.count == 0:
+            continue
+        name = escape(test_case)
+        rows.append(_ROW.format(
+            name, threads, histogram.count, histogram.median,
+            histogram.percentile(95), histogram.max))
+        figures = [_svg(line_chart_envelope(
+            envelope, u'{0} - {1} clients'.format(test_case, threads)))]
+        timeline = store.timeline(run_id, test_case, threads)
+        if timeline:
+            resources = store.resources(
+                run_id, timeline[0][0] - timeline[0][2], timeline[-1][0])
+            figures.append(_svg(xy_chart_resources(
+                timeline,
+                {
+                    key: values for key, values in resources.items()
+                    if key[1] == 'cpu'
+                },
+                u'Server CPU usage (%) - {0} clients'.format(threads),
+            )))
+        sections.append(
+            u'<h2>{0} - {1} clients</h2>\n{2}'.format(
+                name,
+                threads,
+                u'\n'.join(
+                    u'<figure>{0}</figure>'.format(figure)
+                    for figure in figures
+                ),
+            )
+        )
+    return _PAGE.format(
+        run=escape(run_id),
+        refresh=(
+            u'<meta http-equiv="refresh" content="{0}">\n'.format(refresh)
+            if refresh else u''
+        ),
+        updated=time.strftime('%Y-%m-%d %H:%M:%S'),
+        rows=u'\n'.join(rows),
+        sections=u'\n'.join(sections),
+    )
+
+
+def write_dashboard(store, run_id, filename=DASHBOARD_FILE_NAME,
+                    refresh=DASHBOARD_REFRESH):
+    """Write the dashboard of a run, see :func:`render_dashboard`
+
+    The page is written next to ``filename`` and renamed over it, so a
+    browser never loads a page being written.
+
+    """
+    temporary = '{0}.tmp'.format(filename)
+    with open(temporary, 'wb') as handler:
+        handler.write(
+            render_dashboard(store, run_id, refresh).encode('utf-8'))
+    os.rename(temporary, filename)
+
+
+class DashboardWriter(object):
+    """Rewrite the dashboard of a run in a background thread
+
+    :param store: The :class:`robottelo.performance.results.ResultsStore`
+        the run is recorded in
+    :param str run_id: The run to show
+    :param str filename: The name of the HTML page
+    :param int refresh: Seconds between two writes, and after which the
+        browser reloads the page
+
+    """
+    def __init__(self, store, run_id, filename=DASHBOARD_FILE_NAME,
+                 refresh=DASHBOARD_REFRESH):
+        self.store = store
+        self.run_id = run_id
+        self.filename = filename
+        self.refresh = refresh
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start rewriting the dashboard in a background thread"""
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop rewriting the dashboard and write it a last time"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+    def write(self):
+        """Write the dashboard, logging failures"""
+        try:
+            write_dashboard(
+                self.store, self.run_id, self.filename, self.refresh)
+        except Exception as err:
+            LOGGER.error('Failed to write the dashboard {0}: {1}'.format(
+                self.filename, err))
+
+    def _run(self):
+        """Write the dashboard every ``refresh`` seconds until stopped"""
+        while not self._stopping.wait(self.refresh):
+            self.write()
@@ -1,6 +1,107 @@
-"""Test utilities for generating charts for both Candlepin and Pulp tests"""
+"""Test utilities for generating charts for both Candlepin and Pulp tests
+
+Charts of raw timings draw one point per timing up to ``CHART_MAX_POINTS``
+iterations. Longer runs are downsampled to a :class:`StreamingEnvelope`:
+the min, median, 95th percentile and max of the timings of all the clients
+over windows of consecutive iterations, which keeps the SVG files small
+whatever the number of iterations. An envelope can also be fed while a run
+is in progress and rendered at any time::
+
+    envelope = StreamingEnvelope()
+    for timings in iterations:
+        envelope.record(timings)
+    generate_line_chart_envelope(envelope, 'Timings', 'timings.svg')
+
+"""
 import pygal
 
+from robottelo.performance.constants import CHART_MAX_POINTS
+from robottelo.performance.stat import LatencyHistogram
+from six.moves import zip_longest
+
+#: Percentiles drawn by envelope charts, after the min and before the max
+ENVELOPE_PERCENTILES = (50, 95)
+#: Number of major labels shown on the x-axis of long charts
+CHART_MAJOR_LABELS = 10
+
+
+class StreamingEnvelope(object):
+    """Timings of consecutive iterations summarized by windows in bounded
+    memory
+
+    Each window holds a :class:`robottelo.performance.stat.LatencyHistogram`
+    of the timings of its iterations. When ``max_points`` windows are full,
+    pairs of neighbouring windows are merged and the window size doubles, so
+    iterations can be recorded as they complete without knowing their total
+    number.
+
+    :param int max_points: The maximum number of windows, rounded down to an
+        even number
+
+    """
+    def __init__(self, max_points=CHART_MAX_POINTS):
+        self.max_points = max(2, max_points - max_points % 2)
+        self.window = 1
+        self.iterations = 0
+        self.histograms = []
+
+    def record(self, values):
+        """Record the timings of the next iteration, one per client"""
+        index = self.iterations // self.window
+        if index == len(self.histograms):
+            if index == self.max_points:
+                self.histograms = [
+                    self.histograms[i].merge(self.histograms[i + 1])
+                    for i in range(0, self.max_points, 2)
+                ]
+                self.window *= 2
+                index = self.iterations // self.window
+            if index == len(self.histograms):
+                self.histograms.append(LatencyHistogram())
+        self.histograms[index].record_many(values)
+        self.iterations += 1
+
+    def record_many(self, time_result_dict):
+        """Record the timings of all the clients, iteration by iteration
+
+        :param dict time_result_dict: The timings of each client, keyed by
+            ``thread-<index>``
+
+        """
+        time_lists = [
+            time_result_dict.get('thread-{0}'.format(thread), [])
+            for thread in range(len(time_result_dict))
+        ]
+        for values in zip_longest(*time_lists):
+            self.record(value for value in values if value is not None)
+
+    def labels(self):
+        """Return the ``first-last`` iterations of each window, 1-based"""
+        return [
+            '{0}-{1}'.format(
+                index * self.window + 1,
+                min((index + 1) * self.window, self.iterations),
+            )
+            for index in range(len(self.histograms))
+        ]
+
+    def series(self):
+        """Return the min, percentiles and max lines of the envelope
+
+        :return: A list of ``(legend, values)`` tuples, one value per window
+
+        """
+        series = [('min', [histogram.min for histogram in self.histograms])]
+        for percent in ENVELOPE_PERCENTILES:
+            series.append((
+                'median' if percent == 50 else '{0}%'.format(percent),
+                [histogram.percentile(percent)
+                 for histogram in self.histograms],
+            ))
+        series.append(
+            ('max', [histogram.max for histogram in self.histograms]))
+        return series
+
 
 def generate_bar_chart_stat(stat_dict, head, filename, legend):
     """Generate Bar chart for stat on concurrent subscription
@@ -66,8 +167,17 @@ def generate_line_chart_raw(time_result_dict, head, filename, line_chart):
     :param str filename: The name of output svg chart
     :param obj line_chart: Line chart object from either Pulp or Candlepin
 
+    More than ``CHART_MAX_POINTS`` iterations are drawn as the envelope of
+    the timings of all the clients, see :class:`StreamingEnvelope`.
+
     """
-    max_label = len(time_result_dict.get('thread-0'))
+    max_label = max(
+        len(time_list) for time_list in time_result_dict.values())
+    if max_label > CHART_MAX_POINTS:
+        envelope = StreamingEnvelope()
+        envelope.record_many(time_result_dict)
+        generate_line_chart_envelope(envelope, head, filename, line_chart)
+        return
     line_chart.x_labels = [str(i) for i in range(1, max_label + 1)]
     line_chart.title = head
     line_chart.x_title = 'Iterations'
@@ -80,6 +190,41 @@ def generate_line_chart_raw(time_result_dict, head, filename, line_chart):
     line_chart.render_to_file(filename)
 
 
+def line_chart_envelope(envelope, head, line_chart=None):
+    """Return a Line chart of the envelope of raw timings
+
+    :param envelope: The :class:`StreamingEnvelope` of the timings
+    :param str head: Title of charts
+    :param obj line_chart: Line chart object to draw on, a new one without
+        dots by default
+
+    """
+    if line_chart is None:
+        line_chart = pygal.Line(show_dots=False)
+    line_chart.x_labels = envelope.labels()
+    line_chart.x_labels_major_count = CHART_MAJOR_LABELS
+    line_chart.show_minor_x_labels = False
+    line_chart.title = head
+    line_chart.x_title = 'Iterations'
+    line_chart.y_title = 'Time (s)'
+    for legend, values in envelope.series():
+        line_chart.add(legend, values)
+    return line_chart
+
+
+def generate_line_chart_envelope(envelope, head, filename, line_chart=None):
+    """Generate Line chart of the envelope of raw timings
+
+    :param envelope: The :class:`StreamingEnvelope` of the timings
+    :param str head: Title of charts
+    :param str filename: The name of output svg chart
+    :param obj line_chart: Line chart object to draw on, a new one without
+        dots by default
+
+    """
+    line_chart_envelope(envelope, head, line_chart).render_to_file(filename)
+
+
 def generate_line_chart_raw_pulp(time_result_dict, head, filename):
     """Generate Normal Line chart for raw data of sync/resync"""
     line_chart = pygal.Line()
@@ -169,3 +314,71 @@ def generate_line_chart_stat_pulp(stat_dict, head, filename, max_num_tests):
     line_chart.x_title = '# of Repos Synced'
     line_chart.y_title = 'Time (s)'
     generate_line_chart_stat(stat_dict, filename, line_chart)
+
+
+def xy_chart_resources(timeline, resources, head):
+    """Return XY chart overlaying resource usage on the raw timings
+
+    Timings are plotted against the time they ended, resource usage samples
+    against the time they were taken on the secondary axis, both in seconds
+    since the first timing ended. More than ``CHART_MAX_POINTS`` timings are
+    drawn as the median and max of windows of consecutive timings, at the
+    time the last of them ended.
+
+    :param list timeline: ``(time, client, latency)`` tuples as returned by
+        :meth:`robottelo.performance.results.ResultsStore.timeline`
+    :param dict resources: ``(source, metric)`` keys mapped to lists of
+        ``(time, value)`` tuples, as returned by
+        :meth:`robottelo.performance.results.ResultsStore.resources`
+    :param str head: Title of charts
+
+    """
+    origin = timeline[0][0]
+    xy_chart = pygal.XY(show_dots=False)
+    xy_chart.title = head
+    xy_chart.x_title = 'Time (s)'
+    xy_chart.y_title = 'Time (s)'
+    if len(timeline) > CHART_MAX_POINTS:
+        window = -(-len(timeline) // CHART_MAX_POINTS)
+        windows = [
+            timeline[index:index + window]
+            for index in range(0, len(timeline), window)
+        ]
+        histograms = [
+            LatencyHistogram(latency for _, _, latency in samples)
+            for samples in windows
+        ]
+        xy_chart.add('latency median', [
+            (samples[-1][0] - origin, histogram.median)
+            for samples, histogram in zip(windows, histograms)
+        ])
+        xy_chart.add('latency max', [
+            (samples[-1][0] - origin, histogram.max)
+            for samples, histogram in zip(windows, histograms)
+        ])
+    else:
+        xy_chart.add(
+            'latency',
+            [(ended - origin, latency) for ended, _, latency in timeline],
+            show_dots=True,
+            stroke=False,
+        )
+    for (source, metric), values in sorted(resources.items()):
+        xy_chart.add(
+            '{0} {1}'.format(source, metric),
+            [(sample_time - origin, value) for sample_time, value in values],
+            secondary=True,
+        )
+    return xy_chart
+
+
+def generate_xy_chart_resources(timeline, resources, head, filename):
+    """Generate XY chart overlaying resource usage on the raw timings, see
+    :func:`xy_chart_resources`
+
+    :param str filename: The name of output svg chart
+
+    """
+    if not timeline:
+        return
+    xy_chart_resources(timeline, resources, head).render_to_file(filename)
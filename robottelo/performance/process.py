@@ -0,0 +1,224 @@
+"""Run the clients of performance tests in several processes
+
+The clients of :mod:`robottelo.performance.thread` all run in the test
+process, so once they spend their time in paramiko crypto, output parsing
+and stat collection the GIL caps the load whatever the number of clients.
+:class:`ProcessDriver` shards the clients across worker processes, each
+running its clients as threads with its own ssh connections. Every timing
+a client appends to its ``time_result_dict`` list is streamed back to the
+coordinating process, which merges them into a single dictionary for the
+stat and graph writers::
+
+    def make_thread(thread_id, thread_name, result_dicts):
+        return SubscribeAKThread(
+            thread_id, thread_name, result_dicts['time'], 100, 'ak-1',
+            'Default_Organization', vm_list[thread_id])
+
+    time_result_dict = run_clients(make_thread, 10, processes=4)['time']
+
+Worker processes are always forked, whatever the default start method of
+:mod:`multiprocessing` is, so they inherit the configuration and
+``make_thread`` is called in them and does not need to be picklable. The
+platforms without ``fork`` are not supported.
+
+The timings are collected in :class:`TimedList` objects, which also record
+the wall clock time each timing was appended at, when its operation ended.
+
+"""
+import logging
+import multiprocessing
+import time
+
+from robottelo import ssh
+from six.moves import queue
+
+LOGGER = logging.getLogger(__name__)
+
+# markers sent by the workers in place of a result name
+_DONE = '__done__'
+_ERROR = '__error__'
+
+
+class TimedList(list):
+    """List of timings of a client recording when each timing was appended
+
+    :ivar list ended: The ``time.time()`` each timing was appended at
+
+    """
+    def __init__(self, *args):
+        super(TimedList, self).__init__(*args)
+        self.ended = [None] * len(self)
+
+    def append(self, value, ended=None):
+        """Append a timing, ended now unless ``ended`` is given"""
+        super(TimedList, self).append(value)
+        self.ended.append(time.time() if ended is None else ended)
+
+
+class _StreamingList(TimedList):
+    """List of timings of a client, sending each appended timing to the
+    coordinating process"""
+    def __init__(self, results, name, thread_name):
+        super(_StreamingList, self).__init__()
+        self._results = results
+        self._name = name
+        self._thread_name = thread_name
+
+    def append(self, value, ended=None):
+        super(_StreamingList, self).append(value, ended)
+        self._results.put(
+            (self._name, self._thread_name, value, self.ended[-1]))
+
+
+def _get_context():
+    """Return the :mod:`multiprocessing` context forking the workers"""
+    get_context = getattr(multiprocessing, 'get_context', None)
+    if get_context is None:  # Python 2 always forks
+        return multiprocessing
+    return get_context('fork')
+
+
+def _thread_name(index):
+    """Return the key of a client in ``time_result_dict``"""
+    return 'thread-{0}'.format(index)
+
+
+def _run_threads(make_thread, clients, result_dicts):
+    """Run the threads of ``clients`` and wait for them"""
+    threads = [
+        make_thread(index, _thread_name(index), result_dicts)
+        for index in clients
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def _run_shard(make_thread, clients, result_names, results):
+    """Run a shard of the clients in a worker process"""
+    ssh.reset_pool()
+    try:
+        _run_threads(make_thread, clients, {
+            name: {
+                _thread_name(index): _StreamingList(
+                    results, name, _thread_name(index))
+                for index in clients
+            }
+            for name in result_names
+        })
+    except Exception as err:
+        LOGGER.exception('Worker of clients {0} failed'.format(clients))
+        results.put((_ERROR, None, repr(err), None))
+    finally:
+        ssh.get_pool().clear()
+        results.put((_DONE, None, None, None))
+
+
+class ProcessDriver(object):
+    """Run clients sharded across worker processes
+
+    :param make_thread: A callable returning the thread of a client, called
+        with the client index, its ``thread-<index>`` name and a dictionary
+        mapping each result name to the ``time_result_dict`` to append the
+        timings to
+    :param int num_clients: The number of clients
+    :param result_names: The names of the ``time_result_dict`` of each client
+    :param int processes: The number of worker processes, defaults to the
+        number of CPUs. Clients are dealt to the workers in turn.
+
+    """
+    def __init__(self, make_thread, num_clients, result_names=('time',),
+                 processes=None):
+        self.make_thread = make_thread
+        self.num_clients = num_clients
+        self.result_names = tuple(result_names)
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        self.processes = max(1, min(processes, num_clients))
+
+    def shards(self):
+        """Return the client indexes run by each worker"""
+        return [
+            list(range(worker, self.num_clients, self.processes))
+            for worker in range(self.processes)
+        ]
+
+    def run(self):
+        """Run all the clients and wait for them
+
+        :return: A dictionary mapping each result name to the merged
+            ``time_result_dict`` of all the clients, of :class:`TimedList`
+        :rtype: dict
+        :raises RuntimeError: If a worker failed
+
+        """
+        context = _get_context()
+        results = context.Queue()
+        merged = {
+            name: {
+                _thread_name(index): TimedList()
+                for index in range(self.num_clients)
+            }
+            for name in self.result_names
+        }
+        workers = [
+            context.Process(
+                target=_run_shard,
+                args=(self.make_thread, clients, self.result_names, results)
+            )
+            for clients in self.shards()
+        ]
+        for worker in workers:
+            worker.start()
+        errors = []
+        done = 0
+        while done < len(workers):
+            try:
+                name, thread_name, value, ended = results.get(timeout=1)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    errors.append('a worker exited without reporting')
+                    break
+                continue
+            if name == _DONE:
+                done += 1
+            elif name == _ERROR:
+                errors.append(value)
+            else:
+                merged[name][thread_name].append(value, ended)
+        for worker in workers:
+            worker.join()
+        if errors:
+            raise RuntimeError(
+                'Clients failed in worker processes: {0}'.format(
+                    ', '.join(errors)))
+        return merged
+
+
+def run_clients(make_thread, num_clients, result_names=('time',),
+                processes=0):
+    """Run clients as threads of this process or sharded across processes
+
+    :param make_thread: A callable returning the thread of a client, see
+        :class:`ProcessDriver`
+    :param int num_clients: The number of clients
+    :param result_names: The names of the ``time_result_dict`` of each client
+    :param int processes: The number of worker processes, clients run in
+        this process when lower than 2
+    :return: A dictionary mapping each result name to the
+        ``time_result_dict`` of all the clients, of :class:`TimedList`
+    :rtype: dict
+
+    """
+    if processes > 1:
+        return ProcessDriver(
+            make_thread, num_clients, result_names, processes).run()
+    result_dicts = {
+        name: {
+            _thread_name(index): TimedList() for index in range(num_clients)
+        }
+        for name in result_names
+    }
+    _run_threads(make_thread, range(num_clients), result_dicts)
+    return result_dicts
@@ -2,14 +2,23 @@
 
 Part of functionalities of Pulp are defined in this module
 and have utilities of single repository synchronization, single
-sequential repository sync, sequential repository re-sync.
+sequential repository sync, sequential repository re-sync and
+pipelined synchronization of many repositories from a single driver.
 
 """
+import datetime
 import logging
+import time
 
 from robottelo import ssh
 from robottelo.cli.base import CLIReturnCodeError
 from robottelo.cli.repository import Repository
+from robottelo.cli.task import Task
+from robottelo.performance.constants import (
+    SYNC_POLL_BATCH,
+    SYNC_POLL_INTERVAL,
+    SYNC_TIMEOUT,
+)
 
 LOGGER = logging.getLogger(__name__)
 
@@ -50,17 +59,21 @@ class Pulp(object):
             'Sync repository {0} by thread-{1} successful!'
             .format(repo_name, thread_id)
         )
-        return cls.get_elapsed_time(result.stderr)
+        return cls.get_elapsed_time(result)
 
     @staticmethod
-    def get_elapsed_time(stderr):
-        """retrieve time from stderr"""
-        # should return only one time point as a single sync
-        real_time = ''
-        for line in stderr.split('\n'):
-            if line.startswith('real'):
-                real_time = line
-        return 0 if real_time == '' else float(real_time.split(' ')[1])
+    def get_elapsed_time(result):
+        """Return the time of a hammer command from its timing
+
+        The wall clock time of hammer on the server when ``time_hammer`` is
+        enabled, the client side elapsed time otherwise.
+
+        :param result: The :class:`robottelo.ssh.SSHCommandResult` of the
+            command
+        """
+        if result.timing is None or result.timing.real is None:
+            return 0
+        return result.timing.real
 
     @staticmethod
     def get_enabled_repos(org_id):
@@ -146,3 +159,213 @@ class Pulp(object):
             return
         LOGGER.info('Reset db from /home/backup/{0}'.format(savepoint))
         ssh.command('./reset-db.sh /home/backup/{0}'.format(savepoint))
+
+
+#: Formats of the task timestamps printed by hammer
+TASK_TIME_FORMATS = (
+    '%Y/%m/%d %H:%M:%S',
+    '%Y-%m-%d %H:%M:%S UTC',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S.%fZ',
+    '%Y-%m-%dT%H:%M:%SZ',
+)
+
+
+def parse_task_time(value):
+    """Convert a task timestamp printed by hammer to a ``datetime``, return
+    ``None`` if it is empty or not understood."""
+    if not value:
+        return None
+    for time_format in TASK_TIME_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, time_format)
+        except ValueError:
+            continue
+    LOGGER.warning('Unknown task time format: {0}'.format(value))
+    return None
+
+
+class SyncTask(object):
+    """A repository synchronization submitted by :class:`SyncDriver`
+
+    :ivar str repo_id: The synchronized repository id
+    :ivar str repo_name: The repository name
+    :ivar str task_id: The foreman task id, ``None`` if the submission
+        failed
+    :ivar float submitted: Local epoch time of the submission
+    :ivar started: Start time of the task on the server, as a ``datetime``
+    :ivar ended: End time of the task on the server, as a ``datetime``
+    :ivar str state: The task state, ``stopped`` once finished
+    :ivar str result: The task result, ``success`` if it succeeded
+    :ivar str error: The submission or task error, if any
+
+    """
+    def __init__(self, repo_id, repo_name=None):
+        self.repo_id = repo_id
+        self.repo_name = repo_name or repo_id
+        self.task_id = None
+        self.submitted = None
+        self.started = None
+        self.ended = None
+        self.state = None
+        self.result = None
+        self.error = None
+
+    @property
+    def finished(self):
+        """Whether the task is over, successfully or not"""
+        return self.task_id is None or self.state == 'stopped'
+
+    @property
+    def succeeded(self):
+        """Whether the task finished successfully"""
+        return self.state == 'stopped' and self.result == 'success'
+
+    @property
+    def duration(self):
+        """Seconds the task ran on the server, ``None`` until it ended"""
+        if self.started is None or self.ended is None:
+            return None
+        return (self.ended - self.started).total_seconds()
+
+    def update(self, task):
+        """Update the task from a ``hammer task list`` row"""
+        self.state = task.get('state')
+        self.result = task.get('result')
+        self.started = parse_task_time(task.get('started-at'))
+        self.ended = parse_task_time(task.get('ended-at'))
+        if self.finished and not self.succeeded:
+            self.error = task.get('task-errors') or self.result
+
+    def __repr__(self):
+        return (
+            'SyncTask(repo_name={0!r}, task_id={1!r}, state={2!r}, '
+            'result={3!r}, duration={4!r})'.format(
+                self.repo_name, self.task_id, self.state, self.result,
+                self.duration)
+        )
+
+
+class SyncDriver(object):
+    """Synchronize many repositories without blocking on each sync
+
+    Synchronizations are submitted with ``hammer repository synchronize
+    --async`` and a single poller follows all the running tasks with one
+    ``hammer task list`` call per batch of ``poll_batch`` tasks, instead of
+    one ``hammer task progress`` process per sync. Start and end times come
+    from the task data so they do not include the hammer overhead::
+
+        driver = SyncDriver(max_in_flight=20)
+        tasks = driver.run(Pulp.get_enabled_repos(org_id))
+        durations = [task.duration for task in tasks if task.succeeded]
+
+    :param int max_in_flight: maximum number of synchronizations running at
+        once, ``None`` submits all of them at once.
+    :param int poll_interval: seconds between two polls.
+    :param int poll_batch: maximum number of tasks per ``hammer task list``
+        call.
+    :param int timeout: seconds to wait for all the synchronizations.
+
+    """
+    def __init__(
+            self,
+            max_in_flight=None,
+            poll_interval=SYNC_POLL_INTERVAL,
+            poll_batch=SYNC_POLL_BATCH,
+            timeout=SYNC_TIMEOUT):
+        self.max_in_flight = max_in_flight
+        self.poll_interval = poll_interval
+        self.poll_batch = poll_batch
+        self.timeout = timeout
+        self.running = []
+
+    def submit(self, repo_id, repo_name=None):
+        """Start the synchronization of a repository
+
+        :return: the :class:`SyncTask` following it
+        :rtype: SyncTask
+
+        """
+        task = SyncTask(repo_id, repo_name)
+        task.submitted = time.time()
+        try:
+            result = Repository.synchronize({'id': repo_id, 'async': True})
+            task.task_id = result[0]['id']
+        except (CLIReturnCodeError, IndexError, KeyError) as err:
+            LOGGER.error(
+                'Sync repository {0} submission failed: {1}'
+                .format(task.repo_name, err)
+            )
+            task.error = err
+            return task
+        LOGGER.info(
+            'Sync repository {0} submitted as task {1}'
+            .format(task.repo_name, task.task_id)
+        )
+        self.running.append(task)
+        return task
+
+    def poll(self):
+        """Refresh the running tasks
+
+        :return: the tasks which finished since the previous poll
+        :rtype: list
+
+        """
+        tasks = dict((task.task_id, task) for task in self.running)
+        task_ids = list(tasks)
+        for index in range(0, len(task_ids), self.poll_batch):
+            batch = task_ids[index:index + self.poll_batch]
+            try:
+                rows = Task.list({
+                    'search': 'id ^ ({0})'.format(', '.join(batch))
+                })
+            except CLIReturnCodeError as err:
+                LOGGER.warning('Polling sync tasks failed: {0}'.format(err))
+                continue
+            for row in rows:
+                if row.get('id') in tasks:
+                    tasks[row['id']].update(row)
+        finished = [task for task in self.running if task.finished]
+        self.running = [task for task in self.running if not task.finished]
+        for task in finished:
+            LOGGER.info(
+                'Sync repository {0} finished with {1} in {2} seconds'
+                .format(task.repo_name, task.result, task.duration)
+            )
+        return finished
+
+    def run(self, repos):
+        """Synchronize repositories and wait for all of them
+
+        :param repos: a dictionary mapping repository names to ids, like
+            returned by :meth:`Pulp.get_enabled_repos`, or a list of ids.
+        :return: the :class:`SyncTask` of each repository, in submission
+            order
+        :rtype: list
+        :raises ``RuntimeError`` if the synchronizations are not over after
+            ``timeout`` seconds
+
+        """
+        if isinstance(repos, dict):
+            pending = [(repo_id, name) for name, repo_id in repos.items()]
+        else:
+            pending = [(repo_id, None) for repo_id in repos]
+        pending.reverse()
+        tasks = []
+        deadline = time.time() + self.timeout
+        while True:
+            while pending and (
+                    self.max_in_flight is None or
+                    len(self.running) < self.max_in_flight):
+                tasks.append(self.submit(*pending.pop()))
+            if not self.running and not pending:
+                return tasks
+            if time.time() > deadline:
+                raise RuntimeError(
+                    'Timed out waiting for {0} sync tasks: {1}'.format(
+                        len(self.running),
+                        ', '.join(task.task_id for task in self.running))
+                )
+            time.sleep(self.poll_interval)
+            self.poll()
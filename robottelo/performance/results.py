@@ -0,0 +1,394 @@
+"""Store of performance results and comparison of runs
+
+The csv files written by :class:`robottelo.test.ConcurrentTestCase` are
+meant to be read by humans. The same timings are also recorded in a sqlite
+database, one row per sample keyed by run, Satellite version, test case,
+number of threads, client and iteration, so runs can be loaded back and
+compared::
+
+    store = ResultsStore()
+    store.add_samples(get_run_id(), 'perf-raw-activationKey', 4,
+                      time_result_dict, sat_version='6.2.9')
+
+    for comparison in compare_runs(store, baseline_run, candidate_run):
+        if comparison.regressed:
+            print(comparison)
+
+Timings recorded in a :class:`robottelo.performance.process.TimedList`
+are stored with the wall clock time they ended, which puts them on the same
+timeline as the resource usage of the server recorded by
+:class:`robottelo.performance.sampler.ResourceSampler`.
+
+A latency regression is flagged when the latencies of the candidate run are
+significantly higher than the baseline ones according to a Mann-Whitney U
+test, and their median is higher by more than a threshold. Clients run
+their operations back to back so the throughput of a client over a window
+of consecutive operations is their number divided by the sum of their
+latencies, throughput regressions are flagged by the same test on the
+throughputs of the windows of all clients.
+
+"""
+import logging
+import math
+import os
+import sqlite3
+import time
+import uuid
+
+from contextlib import closing
+from robottelo.performance.constants import RESULTS_DB_FILE_NAME
+
+LOGGER = logging.getLogger(__name__)
+
+#: Environment variable identifying the run results are recorded for
+RUN_ID_ENV = 'ROBOTTELO_PERFORMANCE_RUN'
+#: Significance level of the comparisons
+COMPARE_ALPHA = 0.01
+#: Relative change of the median under which a difference is not reported
+COMPARE_THRESHOLD = 0.05
+#: Number of consecutive operations of a client a throughput is measured on
+THROUGHPUT_WINDOW = 10
+
+
+def get_run_id():
+    """Return the identifier of the current run, generating it on first
+    use so the processes started afterwards share it."""
+    run_id = os.environ.get(RUN_ID_ENV)
+    if not run_id:
+        run_id = time.strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:8]
+        os.environ[RUN_ID_ENV] = run_id
+    return run_id
+
+
+class ResultsStore(object):
+    """Performance samples stored in a sqlite database
+
+    :param str path: The path of the database, created on first use
+
+    """
+    def __init__(self, path=RESULTS_DB_FILE_NAME):
+        self.path = path
+
+    def _connect(self):
+        """Open the database, creating its tables"""
+        connection = sqlite3.connect(self.path, timeout=60)
+        with connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS runs ('
+                'run TEXT PRIMARY KEY, sat_version TEXT, created REAL)'
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS samples ('
+                'run TEXT, test_case TEXT, threads INTEGER, client INTEGER, '
+                'iteration INTEGER, latency REAL, ended REAL)'
+            )
+            # stores created before the end times were recorded
+            columns = [
+                row[1] for row in connection.execute(
+                    'PRAGMA table_info(samples)')
+            ]
+            if 'ended' not in columns:
+                connection.execute('ALTER TABLE samples ADD COLUMN ended REAL')
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS samples_test ON samples '
+                '(run, test_case, threads)'
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS resources ('
+                'run TEXT, time REAL, source TEXT, metric TEXT, value REAL)'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS resources_time ON resources '
+                '(run, time)'
+            )
+        return connection
+
+    def add_samples(self, run_id, test_case, threads, time_result_dict,
+                    sat_version=None):
+        """Record the timings of a test case
+
+        :param str run_id: The run the timings belong to
+        :param str test_case: The name of the test case
+        :param int threads: The number of threads or clients of the test
+        :param dict time_result_dict: The timings of each client, keyed by
+            ``thread-<index>``. The time each timing ended is recorded too
+            when the timings are a
+            :class:`robottelo.performance.process.TimedList`.
+        :param str sat_version: The Satellite version the run is made
+            against, only recorded with the first samples of the run
+        :return: The number of samples recorded
+
+        """
+        rows = []
+        for client in range(len(time_result_dict)):
+            time_list = time_result_dict.get('thread-{0}'.format(client), [])
+            ended = getattr(time_list, 'ended', None) or []
+            for iteration, latency in enumerate(time_list):
+                rows.append((
+                    run_id, test_case, threads, client, iteration, latency,
+                    ended[iteration] if iteration < len(ended) else None
+                ))
+        with closing(self._connect()) as connection:
+            with connection:
+                connection.execute(
+                    'INSERT OR IGNORE INTO runs VALUES (?, ?, ?)',
+                    (run_id, sat_version, time.time())
+                )
+                connection.executemany(
+                    'INSERT INTO samples (run, test_case, threads, client, '
+                    'iteration, latency, ended) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+        return len(rows)
+
+    def add_resources(self, run_id, rows):
+        """Record resource usage samples of the server
+
+        :param str run_id: The run the samples belong to
+        :param rows: ``(time, source, metric, value)`` tuples, ``time`` as
+            returned by ``time.time()``
+        :return: The number of samples recorded
+
+        """
+        rows = [(run_id,) + tuple(row) for row in rows]
+        with closing(self._connect()) as connection:
+            with connection:
+                connection.executemany(
+                    'INSERT INTO resources VALUES (?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def resources(self, run_id, start=None, end=None):
+        """Return the resource usage samples of a run
+
+        :param str run_id: The run to read
+        :param float start: Only read samples taken from this time
+        :param float end: Only read samples taken until this time
+        :return: A dictionary mapping ``(source, metric)`` to a list of
+            ``(time, value)`` tuples in time order
+        :rtype: dict
+
+        """
+        query = (
+            'SELECT time, source, metric, value FROM resources WHERE run = ?'
+        )
+        params = [run_id]
+        if start is not None:
+            query += ' AND time >= ?'
+            params.append(start)
+        if end is not None:
+            query += ' AND time <= ?'
+            params.append(end)
+        query += ' ORDER BY time'
+        results = {}
+        with closing(self._connect()) as connection:
+            for sample_time, source, metric, value in connection.execute(
+                    query, params):
+                results.setdefault((source, metric), []).append(
+                    (sample_time, value))
+        return results
+
+    def timeline(self, run_id, test_case, threads):
+        """Return the samples of a test case with the time they ended
+
+        :return: A list of ``(time, client, latency)`` tuples in time order,
+            ``time`` being the wall clock time the sample was recorded at.
+            Samples recorded without it are left out.
+        :rtype: list
+
+        """
+        with closing(self._connect()) as connection:
+            return [
+                tuple(row) for row in connection.execute(
+                    'SELECT ended, client, latency FROM samples '
+                    'WHERE run = ? AND test_case = ? AND threads = ? '
+                    'AND ended IS NOT NULL ORDER BY ended, client',
+                    (run_id, test_case, threads)
+                )
+            ]
+
+    def runs(self):
+        """Return the recorded runs, oldest first
+
+        :return: A list of ``(run, sat_version, created)`` tuples
+
+        """
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                'SELECT run, sat_version, created FROM runs ORDER BY created'
+            ).fetchall()
+
+    def samples(self, run_id, test_case=None, threads=None):
+        """Return the samples of a run
+
+        :param str run_id: The run to read
+        :param str test_case: Only read this test case when given
+        :param int threads: Only read this number of threads when given
+        :return: A dictionary mapping ``(test_case, threads)`` to a list of
+            the latencies of each client, in iteration order
+        :rtype: dict
+
+        """
+        query = (
+            'SELECT test_case, threads, client, latency FROM samples '
+            'WHERE run = ?'
+        )
+        params = [run_id]
+        if test_case is not None:
+            query += ' AND test_case = ?'
+            params.append(test_case)
+        if threads is not None:
+            query += ' AND threads = ?'
+            params.append(threads)
+        query += ' ORDER BY test_case, threads, client, iteration'
+        results = {}
+        with closing(self._connect()) as connection:
+            for name, num_threads, client, latency in connection.execute(
+                    query, params):
+                clients = results.setdefault((name, num_threads), [])
+                while len(clients) <= client:
+                    clients.append([])
+                clients[client].append(latency)
+        return results
+
+
+def mann_whitney_u(first, second):
+    """Two-sided Mann-Whitney U test of two samples
+
+    Uses the normal approximation with tie correction, which is accurate
+    for the sample sizes of performance tests.
+
+    :return: A tuple with the U statistic of ``first`` and the p-value
+
+    """
+    len_first, len_second = len(first), len(second)
+    if not len_first or not len_second:
+        return None, 1.0
+    values = sorted(
+        [(value, 0) for value in first] + [(value, 1) for value in second])
+    rank_sum = 0.0
+    ties = 0.0
+    index = 0
+    while index < len(values):
+        end = index
+        while end < len(values) and values[end][0] == values[index][0]:
+            end += 1
+        count = end - index
+        # average rank of the tied values, ranks start at 1
+        rank = (index + end + 1) / 2.0
+        rank_sum += rank * sum(
+            1 for _, sample in values[index:end] if sample == 0)
+        ties += count ** 3 - count
+        index = end
+    u_first = rank_sum - len_first * (len_first + 1) / 2.0
+    total = len_first + len_second
+    mean = len_first * len_second / 2.0
+    variance = len_first * len_second / 12.0 * (
+        total + 1 - ties / (total * (total - 1)) if total > 1 else 0)
+    if variance <= 0:
+        return u_first, 1.0
+    z = (abs(u_first - mean) - 0.5) / math.sqrt(variance)
+    return u_first, min(1.0, math.erfc(max(z, 0) / math.sqrt(2)))
+
+
+def _median(values):
+    """Return the median of a non empty list"""
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+class Comparison(object):
+    """Comparison of a metric of a test case between two runs
+
+    :ivar str test_case: The name of the test case
+    :ivar int threads: The number of threads of the test case
+    :ivar str metric: ``latency`` or ``throughput``
+    :ivar float baseline: The median of the baseline run
+    :ivar float candidate: The median of the candidate run
+    :ivar float p_value: The p-value of the Mann-Whitney U test
+    :ivar bool regressed: Whether the candidate run is significantly worse
+    :ivar bool improved: Whether the candidate run is significantly better
+
+    """
+    def __init__(self, test_case, threads, metric, baseline, candidate,
+                 p_value, alpha=COMPARE_ALPHA, threshold=COMPARE_THRESHOLD):
+        self.test_case = test_case
+        self.threads = threads
+        self.metric = metric
+        self.baseline = baseline
+        self.candidate = candidate
+        self.p_value = p_value
+        significant = p_value < alpha and abs(self.change) > threshold
+        # higher latencies and lower throughputs are worse
+        worse = (self.change > 0) == (metric == 'latency')
+        self.regressed = significant and worse
+        self.improved = significant and not worse
+
+    @property
+    def change(self):
+        """Relative change of the median from the baseline"""
+        if not self.baseline:
+            return 0.0
+        return (self.candidate - self.baseline) / self.baseline
+
+    def __repr__(self):
+        return (
+            u'Comparison({0}, {1} threads, {2}: {3:.4f} -> {4:.4f} '
+            u'({5:+.1%}), p={6:.4f}{7})'.format(
+                self.test_case, self.threads, self.metric, self.baseline,
+                self.candidate, self.change, self.p_value,
+                u', regressed' if self.regressed else
+                u', improved' if self.improved else u''
+            )
+        )
+
+
+def _window_throughputs(clients, window=THROUGHPUT_WINDOW):
+    """Return the operations per second of each client over each window of
+    consecutive operations, incomplete trailing windows are ignored"""
+    throughputs = []
+    for latencies in clients:
+        for start in range(0, len(latencies) - window + 1, window):
+            duration = sum(latencies[start:start + window])
+            if duration > 0:
+                throughputs.append(window / duration)
+    return throughputs
+
+
+def compare_runs(store, baseline_run, candidate_run, alpha=COMPARE_ALPHA,
+                 threshold=COMPARE_THRESHOLD):
+    """Compare the test cases run in both runs
+
+    :param ResultsStore store: The store holding both runs
+    :param str baseline_run: The run to compare to
+    :param str candidate_run: The run to check for regressions
+    :param float alpha: The significance level
+    :param float threshold: The relative change of the median under which
+        differences are ignored
+    :return: A list of :class:`Comparison`, a latency and a throughput one
+        for each test case and number of threads found in both runs
+
+    """
+    baseline = store.samples(baseline_run)
+    candidate = store.samples(candidate_run)
+    comparisons = []
+    for key in sorted(set(baseline) & set(candidate)):
+        test_case, threads = key
+        for metric, values in (
+                ('latency', lambda clients: sum(clients, [])),
+                ('throughput', _window_throughputs)):
+            first, second = values(baseline[key]), values(candidate[key])
+            if not first or not second:
+                continue
+            _, p_value = mann_whitney_u(first, second)
+            comparisons.append(Comparison(
+                test_case, threads, metric, _median(first), _median(second),
+                p_value, alpha, threshold
+            ))
+    missing = set(baseline) ^ set(candidate)
+    if missing:
+        LOGGER.warning(
+            'Test cases not run in both runs: {0}'.format(sorted(missing)))
+    return comparisons
@@ -0,0 +1,272 @@
+"""Sample the resource usage of the Satellite during performance tests
+
+Client observed latencies tell that the server slowed down, not which of
+its services was saturated. :class:`ResourceSampler` runs a shell loop on
+the server over a single SSH channel, printing counters read from ``/proc``
+at a fixed interval:
+
+* the load average, CPU time and memory of the system,
+* the CPU time, resident memory and disk IO of the processes of each core
+  service listed by :func:`robottelo.helpers.get_services`. Processes are
+  found in the systemd cgroup of the service or, on RHEL 6 and for stopped
+  services, by matching their command line, the sampler itself left out.
+
+The counters are turned into rates on the client and each sample is
+stamped with ``time.time()`` when received, the same clock used to put the
+latency samples on a timeline, see
+:meth:`robottelo.performance.results.ResultsStore.timeline`::
+
+    with ResourceSampler(store=ResultsStore(), run_id=get_run_id()):
+        run_clients(...)
+
+"""
+import logging
+import threading
+import time
+
+from robottelo import ssh
+from robottelo.helpers import get_services
+from robottelo.performance.constants import SAMPLER_INTERVAL
+
+LOGGER = logging.getLogger(__name__)
+
+#: systemd units of services whose processes do not run in their own unit
+SERVICE_UNITS = {
+    'pulp_workers': 'pulp_worker-*',
+}
+#: Command line patterns of the processes of each service, used when the
+#: systemd cgroup of the service is not found. Defaults to the service name.
+SERVICE_PATTERNS = {
+    'foreman-proxy': 'smart-proxy',
+    'foreman-tasks': 'dynflow_executor',
+    'postgresql': 'postgres|postmaster',
+    'pulp_celerybeat': 'celery beat',
+    'pulp_resource_manager': 'resource_manager@',
+    'pulp_workers': 'reserved_resource_worker',
+    'tomcat': 'tomcat',
+    'tomcat6': 'tomcat',
+}
+#: Directory of the systemd cgroups of the services
+CGROUP_DIR = '/sys/fs/cgroup/systemd/system.slice'
+
+_SCRIPT = u'''proc() {{
+  s=$1; shift
+  for p in "$@"; do
+    read -r stat < /proc/$p/stat 2>/dev/null || continue
+    io=$(awk '/^(read|write)_bytes/ {{printf " %s", $2}}' /proc/$p/io \
+2>/dev/null)
+    echo "P $s $p ${{io:- 0 0}} ${{stat##*) }}"
+  done
+}}
+echo "H $(getconf CLK_TCK) $(getconf PAGESIZE)"
+while :; do
+  echo "T"
+  echo "L $(cat /proc/loadavg)"
+  head -1 /proc/stat | sed 's/^cpu/C/'
+  awk '/^(MemTotal|MemAvailable):/ {{printf "M %s %s\\n", $1, $2}}' \
+/proc/meminfo
+{services}  echo "E"
+  sleep {interval}
+done
+'''
+# The command line of the script holds every pattern, processes of the
+# session of the script, the script and its subshells, are not matched.
+_SERVICE_SCRIPT = (
+    u'  pids=$(cat {cgroup_dir}/{unit}.service/cgroup.procs 2>/dev/null)\n'
+    u'  [ -n "$pids" ] || pids=$(pgrep -f \'{pattern}\' | '
+    u'grep -vxF "$(pgrep -s 0)")\n'
+    u'  proc {service} $pids\n'
+)
+# indexes of the /proc/<pid>/stat fields following the command name
+_UTIME, _STIME, _RSS = 11, 12, 21
+
+
+def sampler_script(services, interval=SAMPLER_INTERVAL):
+    """Return the shell script printing the counters of ``services`` every
+    ``interval`` seconds"""
+    return _SCRIPT.format(
+        interval=interval,
+        services=u''.join(
+            _SERVICE_SCRIPT.format(
+                cgroup_dir=CGROUP_DIR,
+                unit=SERVICE_UNITS.get(service, service),
+                pattern=SERVICE_PATTERNS.get(service, service),
+                service=service,
+            )
+            for service in services
+        ),
+    )
+
+
+class ResourceSampler(object):
+    """Sample the resource usage of the server in a background thread
+
+    Samples are ``(time, source, metric, value)`` tuples, ``source`` being
+    ``system`` or a service name. System metrics are ``load1``, ``cpu`` and
+    ``iowait`` in percent of all the CPUs and ``mem_used`` in MB. Service
+    metrics are ``cpu`` in percent of one CPU like ``pidstat``, ``rss`` in MB,
+    ``read`` and ``write`` in kB/s and ``processes``.
+
+    :param int interval: Seconds between two samples
+    :param services: The services to sample, defaults to
+        :func:`robottelo.helpers.get_services`
+    :param str hostname: The server to sample, defaults to the configured one
+    :param store: A :class:`robottelo.performance.results.ResultsStore` the
+        samples are recorded to as they are taken
+    :param str run_id: The run the samples are recorded for
+
+    """
+    def __init__(self, interval=SAMPLER_INTERVAL, services=None,
+                 hostname=None, store=None, run_id=None):
+        self.interval = interval
+        self.services = services
+        self.hostname = hostname
+        self.store = store
+        self.run_id = run_id
+        self.samples = []
+        self._stopping = threading.Event()
+        self._thread = None
+        self._clock_ticks = 100
+        self._page_size = 4096
+        self._previous = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        """Start sampling in a background thread"""
+        if self.services is None:
+            self.services = get_services()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling
+
+        :return: The samples taken
+        :rtype: list
+
+        """
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(self.interval * 2 + 10)
+            self._thread = None
+        return self.samples
+
+    def _run(self):
+        """Read the frames printed by the script until stopped"""
+        frame = None
+        try:
+            with ssh.SSHCommandStream(
+                    sampler_script(self.services, self.interval),
+                    hostname=self.hostname, keep_lines=10) as stream:
+                for line in stream:
+                    if self._stopping.is_set():
+                        break
+                    if line.startswith(u'H '):
+                        self._clock_ticks, self._page_size = [
+                            int(value) for value in line.split()[1:3]]
+                    elif line == u'T':
+                        frame = []
+                    elif line == u'E' and frame is not None:
+                        samples = self.parse(frame, time.time())
+                        self.samples.extend(samples)
+                        if self.store is not None and samples:
+                            self.store.add_resources(self.run_id, samples)
+                        frame = None
+                    elif frame is not None:
+                        frame.append(line)
+        except Exception as err:
+            LOGGER.error('Resource sampler stopped: {0}'.format(err))
+
+    def parse(self, frame, now):
+        """Return the samples of a frame of counters received at ``now``
+
+        Rates need two frames, the first frame only returns the load, the
+        memory and the number of processes.
+
+        """
+        counters = {'processes': {}}
+        for line in frame:
+            fields = line.split()
+            if fields[0] == u'L':
+                counters['load1'] = float(fields[1])
+            elif fields[0] == u'C':
+                values = [int(value) for value in fields[1:]]
+                # user nice system idle iowait irq softirq steal
+                counters['cpu'] = (
+                    sum(values[:8]) - values[3] - values[4],
+                    values[4],
+                    sum(values[:8]),
+                )
+            elif fields[0] == u'M':
+                counters[fields[1].rstrip(u':')] = int(fields[2])
+            elif fields[0] == u'P':
+                # service pid read_bytes write_bytes stat fields
+                stat = fields[5:]
+                counters['processes'][(fields[1], fields[2])] = (
+                    int(stat[_UTIME]) + int(stat[_STIME]),
+                    int(stat[_RSS]),
+                    int(fields[3]),
+                    int(fields[4]),
+                )
+        samples = []
+        if 'load1' in counters:
+            samples.append((now, 'system', 'load1', counters['load1']))
+        if 'MemTotal' in counters and 'MemAvailable' in counters:
+            samples.append((
+                now, 'system', 'mem_used',
+                (counters['MemTotal'] - counters['MemAvailable']) / 1024.0
+            ))
+        services = {}
+        for (service, _), (_, rss, _, _) in counters['processes'].items():
+            totals = services.setdefault(service, [0, 0])
+            totals[0] += 1
+            totals[1] += rss
+        for service in sorted(services):
+            count, rss = services[service]
+            samples.append((now, service, 'processes', count))
+            samples.append((
+                now, service, 'rss',
+                rss * self._page_size / 1024.0 / 1024.0
+            ))
+        previous, self._previous = self._previous, (now, counters)
+        if previous is None:
+            return samples
+        elapsed = now - previous[0]
+        if 'cpu' in counters and 'cpu' in previous[1]:
+            busy, iowait, total = [
+                current - before
+                for current, before in zip(counters['cpu'], previous[1]['cpu'])
+            ]
+            if total > 0:
+                samples.append((now, 'system', 'cpu', 100.0 * busy / total))
+                samples.append(
+                    (now, 'system', 'iowait', 100.0 * iowait / total))
+        if elapsed <= 0:
+            return samples
+        rates = {}
+        for key, (cpu, _, read, write) in counters['processes'].items():
+            # only processes seen in both frames have rates
+            before = previous[1]['processes'].get(key)
+            if before is None:
+                continue
+            totals = rates.setdefault(key[0], [0, 0, 0])
+            totals[0] += cpu - before[0]
+            totals[1] += read - before[2]
+            totals[2] += write - before[3]
+        for service in sorted(rates):
+            cpu, read, write = rates[service]
+            samples.append((
+                now, service, 'cpu',
+                100.0 * cpu / self._clock_ticks / elapsed
+            ))
+            samples.append((now, service, 'read', read / 1024.0 / elapsed))
+            samples.append((now, service, 'write', write / 1024.0 / elapsed))
+        return samples
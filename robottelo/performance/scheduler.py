@@ -0,0 +1,255 @@
+"""Open loop load scheduling for performance tests
+
+The threads of :mod:`robottelo.performance.thread` run closed loops: a
+client sends its next request only once the previous one is answered, so
+when the server slows down the load drops with it and queuing delays are
+never measured. The scheduler here sends operations at a target arrival
+rate whatever the response times are, and measures each latency from the
+time the operation was intended to start::
+
+    consumers = [VirtualConsumer() for _ in range(6000)]
+    scheduler = OpenLoopScheduler(
+        generator.register_consumer,
+        ramp_rate(1, 20, 600),
+        args=consumers,
+    )
+    result = scheduler.run()
+    result.report()
+
+Any callable can be scheduled: the Candlepin and Pulp helpers, or a
+``hammer`` call wrapped in a lambda.
+
+"""
+import itertools
+import logging
+import math
+import time
+
+from multiprocessing.pool import ThreadPool
+from six.moves import zip
+
+LOGGER = logging.getLogger(__name__)
+
+#: Clock used to schedule and time operations, monotonic when available
+clock = getattr(time, 'monotonic', time.time)
+
+
+def constant_rate(rate, duration):
+    """Arrival times of operations sent at ``rate`` per second during
+    ``duration`` seconds
+
+    :return: A generator of offsets in seconds from the start of the run
+
+    """
+    for index in itertools.count():
+        offset = index / float(rate)
+        if offset >= duration:
+            return
+        yield offset
+
+
+def step_rate(steps):
+    """Arrival times of operations sent at a rate changing by steps
+
+    :param list steps: ``(duration, rate)`` tuples, run one after the other
+    :return: A generator of offsets in seconds from the start of the run
+
+    """
+    start = 0.0
+    for duration, rate in steps:
+        if rate > 0:
+            for offset in constant_rate(rate, duration):
+                yield start + offset
+        start += duration
+
+
+def ramp_rate(start_rate, end_rate, duration):
+    """Arrival times of operations sent at a rate changing linearly from
+    ``start_rate`` to ``end_rate`` per second during ``duration`` seconds
+
+    :return: A generator of offsets in seconds from the start of the run
+
+    """
+    slope = (end_rate - start_rate) / float(duration)
+    # number of operations sent during the whole ramp, beyond it the
+    # equation below has no solution when ramping down
+    total = (start_rate + end_rate) / 2.0 * duration
+    for index in itertools.count():
+        if index >= total:
+            return
+        # solve start_rate * t + slope * t ** 2 / 2 = index for t
+        if slope == 0:
+            offset = index / float(start_rate)
+        else:
+            offset = (
+                math.sqrt(max(start_rate ** 2 + 2 * slope * index, 0.0)) -
+                start_rate
+            ) / slope
+        if offset >= duration:
+            return
+        yield offset
+
+
+class ScheduledOperation(object):
+    """Timing of an operation run by :class:`OpenLoopScheduler`
+
+    All times are seconds from the start of the run.
+
+    :ivar float intended: When the operation was scheduled to start
+    :ivar float started: When it actually started
+    :ivar float ended: When it ended
+    :ivar result: The value returned by the operation
+    :ivar error: The exception raised by the operation, if any
+
+    """
+    def __init__(self, index, intended):
+        self.index = index
+        self.intended = intended
+        self.started = None
+        self.ended = None
+        self.result = None
+        self.error = None
+
+    @property
+    def latency(self):
+        """Seconds from the intended start to the end"""
+        return self.ended - self.intended
+
+    @property
+    def delay(self):
+        """Seconds the operation waited for a free worker"""
+        return self.started - self.intended
+
+
+class ScheduleResult(list):
+    """List of :class:`ScheduledOperation` run by
+    :class:`OpenLoopScheduler`, in scheduling order
+
+    :ivar float duration: Seconds from the start of the run to the end of
+        the last operation
+    :ivar float scheduled_duration: Seconds from the start of the run to
+        the last scheduled start
+
+    """
+    duration = 0.0
+    scheduled_duration = 0.0
+
+    @property
+    def succeeded(self):
+        """Operations which did not raise"""
+        return [operation for operation in self if operation.error is None]
+
+    @property
+    def failed(self):
+        """Operations which raised"""
+        return [operation for operation in self if operation.error is not None]
+
+    @property
+    def target_throughput(self):
+        """Operations per second the schedule asked for, measured between
+        the first and the last scheduled starts"""
+        span = self[-1].intended - self[0].intended if self else 0.0
+        if not span:
+            return float(len(self))
+        return (len(self) - 1) / span
+
+    @property
+    def achieved_throughput(self):
+        """Operations per second which completed successfully"""
+        if not self.duration:
+            return 0.0
+        return len(self.succeeded) / self.duration
+
+    def latencies(self):
+        """Latencies of the successful operations, in scheduling order"""
+        return [operation.latency for operation in self.succeeded]
+
+    def time_result_dict(self):
+        """Latencies in the ``time_result_dict`` shape used by
+        :class:`robottelo.test.ConcurrentTestCase`, as a single thread"""
+        return {'thread-0': self.latencies()}
+
+    def report(self):
+        """Log and return a summary of the run
+
+        :rtype: dict
+
+        """
+        summary = {
+            'scheduled': len(self),
+            'succeeded': len(self.succeeded),
+            'failed': len(self.failed),
+            'target_throughput': self.target_throughput,
+            'achieved_throughput': self.achieved_throughput,
+            'max_delay': max(
+                [operation.delay for operation in self] or [0.0]),
+        }
+        LOGGER.info(
+            'Scheduled {scheduled} operations at {target_throughput:.2f}/s, '
+            '{succeeded} succeeded at {achieved_throughput:.2f}/s, '
+            '{failed} failed, max start delay {max_delay:.3f}s'
+            .format(**summary)
+        )
+        return summary
+
+
+class OpenLoopScheduler(object):
+    """Run an operation following an arrival schedule
+
+    Operations start at their scheduled time on a pool of ``workers``
+    threads, regardless of how long the previous ones take. When all the
+    workers are busy, the following operations wait and that wait is part
+    of their latency.
+
+    :param operation: The callable to run
+    :param schedule: An iterable of start offsets in seconds, like returned
+        by :func:`constant_rate`, :func:`step_rate` or :func:`ramp_rate`
+    :param args: An iterable of arguments, the n-th operation is called with
+        the n-th item. Operations are called with their index when ``None``.
+        The run stops when either ``schedule`` or ``args`` is exhausted.
+    :param int workers: Maximum number of operations running at once
+
+    """
+    def __init__(self, operation, schedule, args=None, workers=100):
+        self.operation = operation
+        self.schedule = schedule
+        self.args = args
+        self.workers = workers
+
+    def run(self):
+        """Run the schedule and wait for all the operations
+
+        :rtype: ScheduleResult
+
+        """
+        result = ScheduleResult()
+        args = itertools.count() if self.args is None else self.args
+        pool = ThreadPool(self.workers)
+        start = clock()
+
+        def run_operation(operation, arg):
+            operation.started = clock() - start
+            try:
+                operation.result = self.operation(arg)
+            except Exception as err:
+                operation.error = err
+                LOGGER.error(
+                    'Operation {0} failed: {1}'.format(operation.index, err))
+            operation.ended = clock() - start
+
+        try:
+            for index, (offset, arg) in enumerate(
+                    zip(self.schedule, args)):
+                wait = start + offset - clock()
+                if wait > 0:
+                    time.sleep(wait)
+                operation = ScheduledOperation(index, offset)
+                result.append(operation)
+                result.scheduled_duration = offset
+                pool.apply_async(run_operation, (operation, arg))
+        finally:
+            pool.close()
+            pool.join()
+        result.duration = max(
+            [operation.ended for operation in result] or [0.0])
+        return result
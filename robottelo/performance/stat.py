@@ -1,91 +1,353 @@
 """Test utilities for writing csv files"""
 import csv
+import math
 
 try:
     import numpy
 except ImportError:
     numpy = None
 
+#: Relative precision of the values reported by :class:`LatencyHistogram`
+HISTOGRAM_PRECISION = 0.01
+#: Smallest value distinguished by :class:`LatencyHistogram`, in seconds
+HISTOGRAM_MIN_VALUE = 1e-6
+#: Percentiles written after the other stat columns
+STAT_PERCENTILES = (90, 95, 99)
+#: Columns of the stat csv files, after the bucket name
+STAT_COLUMNS = ('min', 'median', 'mean', 'max', 'std') + tuple(
+    '{0}%'.format(percent) for percent in STAT_PERCENTILES)
 
-def generate_stat_for_concurrent_thread(
-        thread_name,
-        time_list,
-        stat_file_name,
-        bucket_size,
-        num_buckets):
-    """statistics computing utility for Candlepin tests"""
-    # check empty case: empty bucket has no need to compute stat
 
-    if numpy is None:
-        # numpy was removed from requirements to save build time
-        raise RuntimeError(
-            "Dependency `numpy` is not installed!"
-            " run `pip install numpy` in CI script"
+class LatencyHistogram(object):
+    """Streaming histogram of latencies with bounded memory
+
+    Values are counted in buckets growing geometrically by ``precision``,
+    like HDR histograms, so recording a value is ``O(1)`` and memory only
+    depends on the range of the values: about 2500 buckets cover one
+    microsecond to one day at 1% precision. Percentiles interpolate between
+    the closest ranks like numpy does and are accurate to ``precision``,
+    while count, min, max, mean and standard deviation are exact.
+
+    Recording is not thread safe: give each thread its own histogram and
+    :meth:`merge` them::
+
+        histogram = LatencyHistogram()
+        for time_list in time_result_dict.values():
+            histogram.merge(LatencyHistogram(time_list))
+        histogram.percentile(99)
+
+    :param values: An iterable of values to record
+    :param float precision: Relative precision of the percentiles
+    :param float min_value: Values below it are counted with it
+
+    """
+    def __init__(self, values=None, precision=HISTOGRAM_PRECISION,
+                 min_value=HISTOGRAM_MIN_VALUE):
+        self.precision = precision
+        self.min_value = min_value
+        self._log_base = math.log1p(precision)
+        self.counts = {}
+        self.count = 0
+        self.min = None
+        self.max = None
+        self._mean = 0.0
+        self._m2 = 0.0
+        if values is not None:
+            self.record_many(values)
+
+    def _index(self, value):
+        if value <= self.min_value:
+            return 0
+        return int(math.log(value / self.min_value) / self._log_base) + 1
+
+    def _value(self, index):
+        """Return the value representing the bucket ``index``"""
+        if index == 0:
+            # clamped to the minimum by the callers
+            return 0.0
+        # geometric middle of the bucket
+        return self.min_value * math.exp((index - 0.5) * self._log_base)
+
+    def record(self, value):
+        """Record a value"""
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        if self.count == 0:
+            self.min = self.max = value
+        elif value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+        # Welford's online mean and variance
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+
+    def record_many(self, values):
+        """Record all the values of an iterable"""
+        for value in values:
+            self.record(value)
+
+    def merge(self, other):
+        """Add the values recorded by an other histogram with the same
+        precision and return this histogram"""
+        if (other.precision != self.precision or
+                other.min_value != self.min_value):
+            raise ValueError('Can not merge histograms of different scales')
+        if other.count == 0:
+            return self
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        if self.count == 0:
+            self.min, self.max = other.min, other.max
+        else:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._m2 += other._m2 + delta ** 2 * self.count * other.count / count
+        self._mean += delta * other.count / count
+        self.count = count
+        return self
+
+    @property
+    def mean(self):
+        """The mean of the recorded values"""
+        return self._mean if self.count else None
+
+    @property
+    def std(self):
+        """The population standard deviation of the recorded values"""
+        return math.sqrt(self._m2 / self.count) if self.count else None
+
+    @property
+    def median(self):
+        """The median of the recorded values"""
+        return self.percentile(50)
+
+    def _ranked_value(self, rank):
+        """Return the value of rank ``rank`` of the sorted values"""
+        if rank <= 0:
+            return self.min
+        if rank >= self.count - 1:
+            return self.max
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen > rank:
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+    def percentile(self, percent):
+        """Return the value below which ``percent`` of the values fall, or
+        ``None`` if no value was recorded
+
+        Like ``numpy.percentile``, the value is interpolated linearly between
+        the two values closest to the rank ``percent`` falls on.
+
+        """
+        if self.count == 0:
+            return None
+        rank = percent / 100.0 * (self.count - 1)
+        lower = int(math.floor(rank))
+        value = self._ranked_value(lower)
+        if rank > lower:
+            value += (self._ranked_value(lower + 1) - value) * (rank - lower)
+        return value
+
+    def __len__(self):
+        return self.count
+
+
+def _histogram_row(histogram):
+    """Return the stat row of a histogram"""
+    return (
+        histogram.min,
+        histogram.median,
+        histogram.mean,
+        histogram.max,
+        histogram.std,
+    ) + tuple(
+        histogram.percentile(percent) for percent in STAT_PERCENTILES)
+
+
+def _numpy_rows(array, axis):
+    """Return the stat rows of an array along ``axis`` in a few vectorized
+    calls"""
+    columns = [
+        numpy.amin(array, axis=axis),
+        numpy.median(array, axis=axis),
+        numpy.mean(array, axis=axis),
+        numpy.amax(array, axis=axis),
+        numpy.std(array, axis=axis),
+    ]
+    columns.extend(numpy.percentile(array, STAT_PERCENTILES, axis=axis))
+    return [
+        tuple(float(value) for value in row)
+        for row in numpy.stack(columns, axis=-1).reshape(-1, len(columns))
+    ]
+
+
+def _stat_row(values):
+    """Return the stat row of a list of timings, computed with numpy when
+    available like the vectorized rows"""
+    if numpy is not None and len(values) > 0:
+        return _numpy_rows(numpy.asarray(values, dtype=float), 0)[0]
+    return _histogram_row(LatencyHistogram(values))
+
+
+def bucket_stats(time_list, bucket_size):
+    """Compute the stat of each bucket of ``bucket_size`` timings
+
+    Incomplete trailing buckets are ignored. With numpy, the timings are
+    reshaped to one row per bucket and all the buckets are computed at
+    once.
+
+    :return: a list with a tuple of min, median, mean, max, std and the
+        :data:`STAT_PERCENTILES` for each bucket
+    :rtype: list
+
+    """
+    num_buckets = len(time_list) // bucket_size
+    if num_buckets == 0:
+        return []
+    if numpy is not None:
+        array = numpy.asarray(
+            time_list[:num_buckets * bucket_size], dtype=float)
+        return _numpy_rows(array.reshape(num_buckets, bucket_size), 1)
+    return [
+        _histogram_row(LatencyHistogram(
+            time_list[bucket_size * i:bucket_size * (i + 1)]))
+        for i in range(num_buckets)
+    ]
+
+
+def time_result_stats(time_result_dict, bucket_size, num_buckets):
+    """Compute all the stat of a concurrent test from its timings
+
+    :param dict time_result_dict: the timings of each client, keyed by
+        ``thread-<index>``
+    :param int bucket_size: the number of timings per bucket
+    :param int num_buckets: the number of buckets of the per test
+        bucketized stat
+    :return: a dictionary with the stat rows, see :func:`bucket_stats`, of
+        each client bucket as ``per_client_bucketized`` (a list per client),
+        of each bucket merged for all clients as ``per_test_bucketized``, of
+        each client as ``per_client`` and of the whole test as ``per_test``
+    :rtype: dict
+
+    """
+    time_lists = [
+        time_result_dict.get('thread-{0}'.format(i))
+        for i in range(len(time_result_dict))
+    ]
+    lengths = set(len(time_list) for time_list in time_lists)
+    if (numpy is not None and len(lengths) == 1 and
+            lengths.pop() >= bucket_size * num_buckets > 0):
+        # every client has the same number of timings: compute everything
+        # from a single clients x timings array
+        array = numpy.asarray(time_lists, dtype=float)
+        num_clients, length = array.shape
+        client_buckets = length // bucket_size
+        per_client_bucketized = _numpy_rows(
+            array[:, :client_buckets * bucket_size].reshape(
+                num_clients, client_buckets, bucket_size),
+            2
         )
+        test_buckets = array[:, :num_buckets * bucket_size].reshape(
+            num_clients, num_buckets, bucket_size).transpose(1, 0, 2)
+        return {
+            'per_client_bucketized': [
+                per_client_bucketized[
+                    i * client_buckets:(i + 1) * client_buckets]
+                for i in range(num_clients)
+            ],
+            'per_test_bucketized': _numpy_rows(
+                test_buckets.reshape(num_buckets, -1), 1),
+            'per_client': _numpy_rows(array, 1),
+            'per_test': _numpy_rows(array.reshape(-1), 0)[0],
+        }
+    # same stat as above, one list of timings at a time
+    return {
+        'per_client_bucketized': [
+            bucket_stats(time_list, bucket_size) for time_list in time_lists
+        ],
+        'per_test_bucketized': [
+            _stat_row([
+                value
+                for time_list in time_lists
+                for value in time_list[i * bucket_size:(i + 1) * bucket_size]
+            ])
+            for i in range(num_buckets)
+        ],
+        'per_client': [_stat_row(time_list) for time_list in time_lists],
+        'per_test': _stat_row([
+            value for time_list in time_lists for value in time_list]),
+    }
 
-    if bucket_size == 0:
-        return
-    else:
-        num_buckets = len(time_list)/bucket_size
 
+def write_stat_rows(thread_name, rows, stat_file_name, bucket_size):
+    """Write stat rows, like computed by :func:`bucket_stats`, to a csv file
+
+    :return: a dictionary mapping each bucket index to its min, median, max
+        and std, for graphs
+    :rtype: dict
+
+    """
     return_stat = {}
 
     # create list of bucket series
     buckets = ['{0}-{1}'.format(bucket_size * i + 1, bucket_size * (i + 1))
-               for i in range(num_buckets)]
+               for i in range(len(rows))]
 
     with open(stat_file_name, 'a') as handler:
         writer = csv.writer(handler)
         writer.writerow([])
         writer.writerow(['{0}'.format(thread_name)])
-        writer.writerow([
-            'bucket',
-            'min',
-            'median',
-            'mean',
-            'max',
-            'std',
-            '90%',
-            '95%',
-            '99%'
-        ])
+        writer.writerow(['bucket'] + list(STAT_COLUMNS))
         for i, bucket in enumerate(buckets):
-            # slice the given time-list into buckets
-            time_list_slice = time_list[bucket_size * i:bucket_size * (i + 1)]
-
-            # variables for generating graphs only
-            gmin = numpy.amin(time_list_slice)
-            gmean = numpy.mean(time_list_slice)
-            gmedian = numpy.median(time_list_slice)
-            gmax = numpy.amax(time_list_slice)
-            gstd = numpy.std(time_list_slice)
-
-            writer.writerow([
-                bucket,
-                gmin,
-                gmedian,
-                gmean,
-                gmax,
-                gstd,
-                numpy.percentile(time_list_slice, 90),
-                numpy.percentile(time_list_slice, 95),
-                numpy.percentile(time_list_slice, 99)
-            ])
+            gmin, gmedian, gmean, gmax, gstd = rows[i][:5]
+            writer.writerow([bucket] + list(rows[i]))
 
             # update a dictionary with key as each bucket and values as stat
             return_stat.update({i: (gmin, gmedian, gmax, gstd)})
         return return_stat
 
 
+def generate_stat_for_concurrent_thread(
+        thread_name,
+        time_list,
+        stat_file_name,
+        bucket_size,
+        num_buckets):
+    """statistics computing utility for Candlepin tests
+
+    ``time_list`` is either a list of timings, sliced in buckets of
+    ``bucket_size`` values, or a list of :class:`LatencyHistogram`, one per
+    bucket of ``bucket_size`` values.
+
+    """
+    # check empty case: empty bucket has no need to compute stat
+    if bucket_size == 0:
+        return
+    if time_list and isinstance(time_list[0], LatencyHistogram):
+        rows = [_histogram_row(histogram) for histogram in time_list]
+    else:
+        rows = bucket_stats(time_list, bucket_size)
+    return write_stat_rows(thread_name, rows, stat_file_name, bucket_size)
+
+
 def generate_stat_for_pulp_sync(index, time_list, stat_file_name):
     """statistics computing utility for Pulp synchronization tests"""
+    histogram = LatencyHistogram(time_list)
     with open(stat_file_name, 'a') as handler:
         writer = csv.writer(handler)
 
-        sync_min = numpy.amin(time_list)
-        sync_median = numpy.median(time_list)
-        sync_max = numpy.amax(time_list)
-        sync_std = numpy.std(time_list)
+        sync_min = histogram.min
+        sync_median = histogram.median
+        sync_max = histogram.max
+        sync_std = histogram.std
 
         writer.writerow([
             'test-{0}-threads'.format(index),
@@ -171,3 +171,53 @@ class SyncThread(PerformanceThread):
 
         # append sync timing to each thread
         self.time_result_dict.get(self.thread_name).append(time_point)
+
+
+def make_delete_thread(
+        thread_id, thread_name, result_dicts, uuid_list, num_iterations):
+    """Return the :class:`DeleteThread` of a client deleting its share of
+    ``uuid_list``, for :func:`robottelo.performance.process.run_clients`"""
+    return DeleteThread(
+        thread_id,
+        thread_name,
+        uuid_list[
+            num_iterations * thread_id: num_iterations * (thread_id + 1)
+        ],
+        result_dicts['time']
+    )
+
+
+def make_subscribe_ak_thread(
+        thread_id, thread_name, result_dicts, num_iterations, ak_name,
+        default_org, vm_list):
+    """Return the :class:`SubscribeAKThread` of a client, for
+    :func:`robottelo.performance.process.run_clients`"""
+    return SubscribeAKThread(
+        thread_id,
+        thread_name,
+        result_dicts['time'],
+        num_iterations,
+        ak_name,
+        default_org,
+        vm_list[thread_id]
+    )
+
+
+def make_subscribe_attach_thread(
+        thread_id, thread_name, result_dicts, num_iterations, sub_id,
+        default_org, environment, vm_list):
+    """Return the :class:`SubscribeAttachThread` of a client, recording
+    ``register`` and ``attach`` results, for
+    :func:`robottelo.performance.process.run_clients`"""
+    return SubscribeAttachThread(
+        thread_id,
+        thread_name,
+        {},
+        result_dicts['register'],
+        result_dicts['attach'],
+        num_iterations,
+        sub_id,
+        default_org,
+        environment,
+        vm_list[thread_id]
+    )
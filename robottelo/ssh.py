@@ -1,34 +1,142 @@
 """Utility module to handle the shared ssh connection."""
+import atexit
 import base64
+import codecs
+import collections
 import logging
 import os
 import paramiko
 import re
+import select
 import six
+import socket
+import sys
+import threading
+import time
+import uuid
 
 from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
 from robottelo.cli import hammer
 from robottelo.config import settings
 
 logger = logging.getLogger(__name__)
 
+#: Maximum number of idle connections kept per (hostname, username, key)
+POOL_MAX_SIZE = 8
+#: Seconds an idle pooled connection is kept before being closed
+POOL_IDLE_TIMEOUT = 300
+#: Interval in seconds between keepalive packets on pooled connections
+POOL_KEEPALIVE_INTERVAL = 30
+
+#: Number of parallel chunks used to transfer big files
+SFTP_WORKERS = 4
+#: Files bigger than this number of bytes are transferred in parallel chunks
+SFTP_CHUNKED_THRESHOLD = 64 * 1024 * 1024
+#: Size in bytes of every SFTP read or write request
+SFTP_BLOCK_SIZE = 32768
+#: Number of SFTP read requests sent at once when downloading in chunks
+SFTP_READ_WINDOW = 32
+
+_COLOR_CODES_REGEX = re.compile(r'\x1b\[\d\d?m')
+
+#: Clock used to time commands, monotonic when available
+clock = getattr(time, 'monotonic', time.time)
+
 
 def decode_to_utf8(text):  # pragma: no cover
-    """In python 3 all strings are already unicode, no need to decode"""
-    if six.PY2:
+    """Decode raw bytes read from a channel, text is returned untouched"""
+    if isinstance(text, six.binary_type):
         return text.decode('utf-8')
     return text
 
 
+class CommandTiming(object):
+    """Timing of a command run over ssh, attached to its
+    :class:`SSHCommandResult`.
+
+    Client side events are recorded with a monotonic clock as seconds since
+    the command was started, ``None`` when the event did not happen or could
+    not be observed. Remote times are measured by the remote shell when the
+    command is run with ``remote_timing=True``.
+
+    :ivar float start: :func:`clock` value when the command was started.
+    :ivar float connected: When the connection was established or borrowed
+        from the pool.
+    :ivar float channel_opened: When the command was sent on its channel.
+    :ivar float first_byte: When the first byte of output, or the end of
+        the output of a silent command, was received. Only observed along
+        with the remote times.
+    :ivar float exit_status: When the exit status was received.
+    :ivar float remote_real: Wall clock seconds of the remote command.
+    :ivar float remote_user: User CPU seconds of the remote command.
+    :ivar float remote_sys: System CPU seconds of the remote command.
+    """
+
+    def __init__(self):
+        self.start = clock()
+        self.connected = None
+        self.channel_opened = None
+        self.first_byte = None
+        self.exit_status = None
+        self.remote_real = None
+        self.remote_user = None
+        self.remote_sys = None
+
+    def mark(self, event):
+        """Record that ``event`` happened now."""
+        setattr(self, event, clock() - self.start)
+
+    @property
+    def elapsed(self):
+        """Client side seconds until the exit status was received."""
+        return self.exit_status
+
+    @property
+    def real(self):
+        """Remote wall clock seconds when measured, client side elapsed
+        seconds otherwise."""
+        if self.remote_real is not None:
+            return self.remote_real
+        return self.elapsed
+
+    @property
+    def cpu(self):
+        """Remote CPU seconds, user and system, when measured."""
+        if self.remote_user is None or self.remote_sys is None:
+            return None
+        return self.remote_user + self.remote_sys
+
+    def as_dict(self):
+        """Return the recorded times as a dictionary."""
+        return {
+            'connected': self.connected,
+            'channel_opened': self.channel_opened,
+            'first_byte': self.first_byte,
+            'exit_status': self.exit_status,
+            'remote_real': self.remote_real,
+            'remote_user': self.remote_user,
+            'remote_sys': self.remote_sys,
+        }
+
+    def __repr__(self):
+        return u'CommandTiming({0})'.format(u', '.join(
+            u'{0}={1!r}'.format(key, value)
+            for key, value in sorted(self.as_dict().items())
+        ))
+
+
 class SSHCommandResult(object):
     """Structure that returns in all ssh commands results."""
 
     def __init__(
-            self, stdout=None, stderr=None, return_code=0, output_format=None):
+            self, stdout=None, stderr=None, return_code=0, output_format=None,
+            timing=None):
         self.stdout = stdout
         self.stderr = stderr
         self.return_code = return_code
         self.output_format = output_format
+        self.timing = timing
         #  Does not make sense to return suspicious output if ($? <> 0)
         if output_format and self.return_code == 0:
             if output_format == 'csv':
@@ -97,9 +205,243 @@ def get_client(hostname=None, username=None, password=None,
     return client
 
 
+def _get_transport(client):
+    """Return the ``paramiko.Transport`` of a client or ``None`` if the client
+    is not connected.
+    """
+    get_transport = getattr(client, 'get_transport', None)
+    if get_transport is None:
+        return None
+    return get_transport()
+
+
+def _read_buffered(channel, size=32768):
+    """Read the ``stdout`` and ``stderr`` data buffered on a channel.
+
+    The server sends the exit status after the command output, so once
+    ``exit_status_ready`` is true the whole output is buffered and reading
+    it does not block, even when a background process keeps the channel
+    open.
+
+    :return: a tuple with the raw ``stdout`` and raw ``stderr`` data.
+    """
+    stdout = []
+    stderr = []
+    while channel.recv_ready():
+        stdout.append(channel.recv(size))
+    while channel.recv_stderr_ready():
+        stderr.append(channel.recv_stderr(size))
+    return b''.join(stdout), b''.join(stderr)
+
+
+def _is_client_alive(client):
+    """Check whether the transport of a paramiko client is still usable.
+
+    :param client: A connected ``SSHClient`` instance.
+    :return: ``True`` if the underlying transport is active.
+    :rtype: bool
+
+    """
+    transport = _get_transport(client)
+    return transport is not None and transport.is_active()
+
+
+class SSHConnectionPool(object):
+    """Thread-safe pool of reusable SSH connections.
+
+    Connections are grouped by ``(hostname, username, key_filename)`` so a
+    borrowed connection is always authenticated as the caller expects. A
+    connection returned to the pool is kept idle until it is borrowed again,
+    it exceeds ``idle_timeout`` seconds without use or the pool already holds
+    ``max_size`` idle connections for the same key. Before being handed out a
+    connection is health checked and silently replaced if its transport is no
+    longer active.
+
+    The pool is fork-safe: a child process forgets the idle connections
+    inherited from its parent, without closing them, as their transport
+    thread only runs in the parent.
+
+    :param int max_size: Maximum number of idle connections kept per key.
+    :param int idle_timeout: Seconds an idle connection is kept.
+    :param int keepalive: Interval in seconds between keepalive packets sent
+        on pooled connections, ``0`` disables keepalive.
+
+    """
+
+    def __init__(self, max_size=POOL_MAX_SIZE,
+                 idle_timeout=POOL_IDLE_TIMEOUT,
+                 keepalive=POOL_KEEPALIVE_INTERVAL):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        """Forget the state inherited from the parent of a forked process.
+
+        The lock is replaced too, it may have been held by another thread of
+        the parent when the process was forked.
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+            self._idle = {}
+
+    @staticmethod
+    def _get_key(hostname, username, key_filename):
+        """Return the pool key for the given connection parameters."""
+        if hostname is None:
+            hostname = settings.server.hostname
+        if username is None:
+            username = settings.server.ssh_username
+        if key_filename is None:
+            key_filename = settings.server.ssh_key
+        return (hostname, username, key_filename)
+
+    @staticmethod
+    def _close(client):
+        """Close a client ignoring any error raised by a dead transport."""
+        try:
+            client.close()
+        except Exception as err:  # pragma: no cover
+            logger.debug('Error closing pooled client: %s', err)
+        else:
+            logger.debug(
+                'Destroyed pooled Paramiko client {0}'.format(client._id))
+
+    def _evict_expired(self, now):
+        """Remove idle connections older than ``idle_timeout``.
+
+        Must be called with the pool lock held. Returns the evicted clients
+        so they can be closed outside of the lock.
+        """
+        expired = []
+        for key, entries in list(self._idle.items()):
+            alive = []
+            for client, last_used in entries:
+                if now - last_used > self.idle_timeout:
+                    expired.append(client)
+                else:
+                    alive.append((client, last_used))
+            if alive:
+                self._idle[key] = alive
+            else:
+                del self._idle[key]
+        return expired
+
+    def acquire(self, hostname=None, username=None, password=None,
+                key_filename=None, timeout=10):
+        """Borrow a connection from the pool, connecting a new one if no
+        healthy idle connection is available.
+
+        :return: A connected ``SSHClient``. It must be given back with
+            :meth:`release`.
+
+        """
+        self._check_pid()
+        key = self._get_key(hostname, username, key_filename)
+        client = None
+        with self._lock:
+            to_close = self._evict_expired(time.time())
+            entries = self._idle.get(key, [])
+            while entries:
+                candidate, _ = entries.pop()
+                if _is_client_alive(candidate):
+                    client = candidate
+                    break
+                to_close.append(candidate)
+        for stale in to_close:
+            self._close(stale)
+        if client is not None:
+            logger.debug('Reusing pooled Paramiko client {0}'.format(
+                client._id))
+            return client
+        client = get_client(
+            key[0], key[1], password, key[2], timeout)
+        client._pool_key = key
+        client._pool_pid = self._pid
+        transport = _get_transport(client)
+        if self.keepalive and transport is not None:
+            transport.set_keepalive(self.keepalive)
+        logger.debug('Instantiated pooled Paramiko client {0}'.format(
+            client._id))
+        return client
+
+    def release(self, client, discard=False):
+        """Give a borrowed connection back to the pool.
+
+        :param client: The client returned by :meth:`acquire`.
+        :param bool discard: Close the connection instead of keeping it, for
+            example when an error happened while it was in use.
+
+        """
+        self._check_pid()
+        if getattr(client, '_pool_pid', None) != self._pid:
+            # borrowed before a fork, it belongs to the parent process
+            return
+        key = getattr(client, '_pool_key', None)
+        if discard or key is None or not _is_client_alive(client):
+            self._close(client)
+            return
+        with self._lock:
+            to_close = self._evict_expired(time.time())
+            entries = self._idle.setdefault(key, [])
+            if len(entries) < self.max_size:
+                entries.append((client, time.time()))
+            else:
+                to_close.append(client)
+        for stale in to_close:
+            self._close(stale)
+
+    def clear(self):
+        """Close every idle connection held by the pool."""
+        self._check_pid()
+        with self._lock:
+            entries = [
+                client
+                for clients in self._idle.values()
+                for client, _ in clients
+            ]
+            self._idle = {}
+        for client in entries:
+            self._close(client)
+
+    def size(self, hostname=None, username=None, key_filename=None):
+        """Return the number of idle connections kept for the given key."""
+        self._check_pid()
+        key = self._get_key(hostname, username, key_filename)
+        with self._lock:
+            return len(self._idle.get(key, []))
+
+
+_pool = SSHConnectionPool()
+atexit.register(_pool.clear)
+
+
+def get_pool():
+    """Return the process wide :class:`SSHConnectionPool`."""
+    return _pool
+
+
+def reset_pool():
+    """Replace the process wide :class:`SSHConnectionPool` by an empty one.
+
+    The connections inherited by a forked process are already forgotten by
+    the pool on first use, this gives a child process a pool of its own
+    right away.
+
+    :return: the new pool
+    """
+    global _pool
+    _pool = SSHConnectionPool()
+    return _pool
+
+
 @contextmanager
 def get_connection(hostname=None, username=None, password=None,
-                   key_filename=None, timeout=10):
+                   key_filename=None, timeout=10, pooled=False):
     """Yield an ssh connection object.
 
     The connection will be configured with the specified arguments or will
@@ -124,11 +466,24 @@ def get_connection(hostname=None, username=None, password=None,
         connecting to the server. If it is ``None`` ``key_filename`` from
         configuration's ``server`` section will be used.
     :param int timeout: Time to wait for establish the connection.
+    :param bool pooled: Borrow the connection from the process wide
+        :class:`SSHConnectionPool` and give it back instead of closing it
+        when the caller is done using it.
 
     :return: An SSH connection.
     :rtype: ``paramiko.SSHClient``
 
     """
+    if pooled:
+        client = _pool.acquire(
+            hostname, username, password, key_filename, timeout)
+        discard = True
+        try:
+            yield client
+            discard = False
+        finally:
+            _pool.release(client, discard=discard)
+        return
     client = get_client(
         hostname, username, password, key_filename, timeout
     )
@@ -199,7 +554,39 @@ def add_authorized_key(key, hostname=None, username=None, password=None,
         execute_command(cmd, con)
 
 
-def upload_file(local_file, remote_file, hostname=None):
+def _get_sftp(client):
+    """Return the SFTP session cached on a pooled client, opening it if
+    needed."""
+    sftp = getattr(client, '_sftp', None)
+    if sftp is None or sftp.sock.closed:
+        sftp = client.open_sftp()
+        client._sftp = sftp
+    return sftp
+
+
+@contextmanager
+def get_sftp(hostname=None, username=None, password=None, key_filename=None,
+             timeout=10):
+    """Yield the SFTP session of a connection borrowed from the pool.
+
+    The session is cached on the connection, so following transfers to the
+    same host reuse both the connection and the SFTP subsystem::
+
+        with get_sftp() as sftp:
+            sftp.put(local_path, remote_path)
+
+    Accepts the same arguments as :func:`get_connection`.
+
+    :rtype: ``paramiko.SFTPClient``
+
+    """
+    with get_connection(hostname=hostname, username=username,
+                        password=password, key_filename=key_filename,
+                        timeout=timeout, pooled=True) as connection:
+        yield _get_sftp(connection)
+
+
+def upload_file(local_file, remote_file, hostname=None, pooled=True):
     """Upload a local file to a remote machine
 
     :param local_file: either a file path or a file-like object to be uploaded.
@@ -207,28 +594,35 @@ def upload_file(local_file, remote_file, hostname=None):
         placed.
     :param hostname: target machine hostname. If not provided will be used the
         ``server.hostname`` from the configuration.
+    :param bool pooled: Whether to use the cached SFTP session of a pooled
+        connection.
     """
-    with get_connection(hostname=hostname) as connection:  # pragma: no cover
+    if pooled:
+        with get_sftp(hostname=hostname) as sftp:
+            _put(sftp, local_file, remote_file)
+        return
+    with get_connection(  # pragma: no cover
+            hostname=hostname, pooled=pooled) as connection:
         try:
             sftp = connection.open_sftp()
-            # Check if local_file is a file-like object and use the proper
-            # paramiko function to upload it to the remote machine.
-            if hasattr(local_file, 'read'):
-                sftp.putfo(local_file, remote_file)
-            else:
-                sftp.put(local_file, remote_file)
+            _put(sftp, local_file, remote_file)
         finally:
             sftp.close()
 
 
-def download_file(remote_file, local_file=None, hostname=None):
+def download_file(remote_file, local_file=None, hostname=None, pooled=True):
     """Download a remote file to the local machine. If ``hostname`` is not
     provided will be used the server.
 
     """
     if local_file is None:  # pragma: no cover
         local_file = remote_file
-    with get_connection(hostname=hostname) as connection:  # pragma: no cover
+    if pooled:
+        with get_sftp(hostname=hostname) as sftp:
+            sftp.get(remote_file, local_file)
+        return
+    with get_connection(  # pragma: no cover
+            hostname=hostname, pooled=pooled) as connection:
         try:
             sftp = connection.open_sftp()
             sftp.get(remote_file, local_file)
@@ -236,8 +630,144 @@ def download_file(remote_file, local_file=None, hostname=None):
             sftp.close()
 
 
+def _put(sftp, local_file, remote_file):
+    """Upload a file path or a file-like object with the given session."""
+    # Check if local_file is a file-like object and use the proper
+    # paramiko function to upload it to the remote machine.
+    if hasattr(local_file, 'read'):
+        sftp.putfo(local_file, remote_file)
+    else:
+        sftp.put(local_file, remote_file)
+
+
+def _chunks(size, count):
+    """Split ``size`` bytes in at most ``count`` ``(offset, length)``
+    ranges."""
+    length = max(1, -(-size // count))
+    return [
+        (offset, min(length, size - offset))
+        for offset in range(0, size, length)
+    ]
+
+
+def _upload_chunk(local_file, remote_file, offset, length, hostname):
+    """Copy a range of a local file to the same range of a remote file."""
+    with get_sftp(hostname=hostname) as sftp:
+        with open(local_file, 'rb') as source:
+            with sftp.open(remote_file, 'r+b') as target:
+                # do not wait for the server to acknowledge every write
+                target.set_pipelined(True)
+                source.seek(offset)
+                target.seek(offset)
+                while length > 0:
+                    data = source.read(min(SFTP_BLOCK_SIZE, length))
+                    if not data:  # pragma: no cover
+                        break
+                    target.write(data)
+                    length -= len(data)
+
+
+def _download_chunk(remote_file, local_file, offset, length, hostname):
+    """Copy a range of a remote file to the same range of a local file."""
+    blocks = [
+        (offset + start, min(SFTP_BLOCK_SIZE, length - start))
+        for start in range(0, length, SFTP_BLOCK_SIZE)
+    ]
+    with get_sftp(hostname=hostname) as sftp:
+        with sftp.open(remote_file, 'rb') as source:
+            with open(local_file, 'r+b') as target:
+                target.seek(offset)
+                # readv requests a window of blocks at once instead of
+                # waiting for every read round trip, the window bounds the
+                # memory used by prefetched data
+                for start in range(0, len(blocks), SFTP_READ_WINDOW):
+                    window = blocks[start:start + SFTP_READ_WINDOW]
+                    for data in source.readv(window):
+                        target.write(data)
+
+
+def _transfer_chunked(func, source, target, size, hostname, workers):
+    """Run ``func`` for each chunk of a file in a pool of threads."""
+    jobs = [
+        (source, target, offset, length, hostname)
+        for offset, length in _chunks(size, workers)
+    ]
+    threads = ThreadPool(len(jobs))
+    try:
+        threads.map(lambda job: func(*job), jobs)
+    finally:
+        threads.close()
+        threads.join()
+
+
+def upload_files(files, hostname=None, workers=SFTP_WORKERS,
+                 chunked_threshold=SFTP_CHUNKED_THRESHOLD):
+    """Upload many local files to a remote machine reusing one SFTP session.
+
+    Files bigger than ``chunked_threshold`` bytes are split in ``workers``
+    chunks written in parallel, each over its own pooled connection::
+
+        upload_files([
+            ('/tmp/manifest.zip', '/root/manifest.zip'),
+            ('/tmp/rhel7.iso', '/var/lib/pulp/rhel7.iso'),
+        ])
+
+    :param files: an iterable of ``(local_file, remote_file)`` pairs. The local
+        file can be a path or a file-like object.
+    :param hostname: target machine hostname. If not provided will be used the
+        ``server.hostname`` from the configuration.
+    :param int workers: number of parallel chunks for big files.
+    :param int chunked_threshold: size in bytes above which a file is
+        transferred in parallel chunks.
+    """
+    with get_sftp(hostname=hostname) as sftp:
+        for local_file, remote_file in files:
+            size = None
+            if not hasattr(local_file, 'read'):
+                size = os.path.getsize(local_file)
+            if workers < 2 or size is None or size <= chunked_threshold:
+                _put(sftp, local_file, remote_file)
+                continue
+            # create the remote file with its final size so every chunk
+            # can be written in place
+            sftp.open(remote_file, 'wb').close()
+            sftp.truncate(remote_file, size)
+            _transfer_chunked(
+                _upload_chunk, local_file, remote_file, size, hostname,
+                workers)
+
+
+def download_files(files, hostname=None, workers=SFTP_WORKERS,
+                   chunked_threshold=SFTP_CHUNKED_THRESHOLD):
+    """Download many remote files to the local machine reusing one SFTP
+    session.
+
+    Files bigger than ``chunked_threshold`` bytes are split in ``workers``
+    chunks read in parallel, each over its own pooled connection.
+
+    :param files: an iterable of ``(remote_file, local_file)`` pairs.
+    :param hostname: source machine hostname. If not provided will be used
+        the ``server.hostname`` from the configuration.
+    :param int workers: number of parallel chunks for big files.
+    :param int chunked_threshold: size in bytes above which a file is
+        transferred in parallel chunks.
+    """
+    with get_sftp(hostname=hostname) as sftp:
+        for remote_file, local_file in files:
+            size = sftp.stat(remote_file).st_size
+            if workers < 2 or size <= chunked_threshold:
+                sftp.get(remote_file, local_file)
+                continue
+            with open(local_file, 'wb') as handler:
+                handler.truncate(size)
+            _transfer_chunked(
+                _download_chunk, remote_file, local_file, size, hostname,
+                workers)
+
+
 def command(cmd, hostname=None, output_format=None, username=None,
-            password=None, key_filename=None, timeout=10):
+            password=None, key_filename=None, timeout=10, pooled=True,
+            remote_timing=False):
     """Executes SSH command(s) on remote hostname.
 
     :param str cmd: The command to run
@@ -254,32 +784,251 @@ def command(cmd, hostname=None, output_format=None, username=None,
         connecting to the server. If it is ``None`` ``key_filename`` from
         configuration's ``server`` section will be used.
     :param int timeout: Time to wait for establish the connection.
+    :param bool pooled: Whether to borrow the connection from the process wide
+        :class:`SSHConnectionPool` instead of opening a new one.
+    :param bool remote_timing: Whether to measure the wall clock and CPU
+        times of the command on the remote host, see
+        :func:`execute_command`.
     """
+    timing = CommandTiming()
     hostname = hostname or settings.server.hostname
     with get_connection(hostname=hostname, username=username,
                         password=password, key_filename=key_filename,
-                        timeout=timeout) as connection:
-        return execute_command(cmd, connection, output_format, timeout)
+                        timeout=timeout, pooled=pooled) as connection:
+        timing.mark('connected')
+        return execute_command(
+            cmd, connection, output_format, timeout, timing=timing,
+            remote_timing=remote_timing
+        )
+
+
+class FanOutItem(object):
+    """Outcome of a single command run by :func:`fan_out`.
 
+    :ivar str hostname: The host the command ran on.
+    :ivar str cmd: The command.
+    :ivar result: The :class:`SSHCommandResult`, ``None`` if the command could
+        not be run.
+    :ivar error: The exception raised while running the command, if any.
+    :ivar float duration: Seconds taken to run the command.
+    """
+
+    def __init__(self, hostname, cmd, result=None, error=None, duration=0.0):
+        self.hostname = hostname
+        self.cmd = cmd
+        self.result = result
+        self.error = error
+        self.duration = duration
+
+    @property
+    def succeeded(self):
+        """Whether the command ran and exited with status 0."""
+        return (
+            self.error is None and
+            self.result is not None and
+            self.result.return_code == 0
+        )
+
+    def __repr__(self):
+        return (
+            u'FanOutItem(hostname={0!r}, cmd={1!r}, result={2!r}, '
+            u'error={3!r}, duration={4:.3f})'.format(
+                self.hostname, self.cmd, self.result, self.error,
+                self.duration)
+        )
+
+
+class FanOutResult(list):
+    """List of :class:`FanOutItem` returned by :func:`fan_out`, in the same
+    order as the commands were given.
+
+    :ivar float duration: Wall clock seconds taken by the whole fan-out.
+    """
+
+    duration = 0.0
+
+    @property
+    def succeeded(self):
+        """Items whose command exited with status 0."""
+        return [item for item in self if item.succeeded]
+
+    @property
+    def failed(self):
+        """Items whose command raised or exited with a non zero status."""
+        return [item for item in self if not item.succeeded]
+
+    def by_host(self):
+        """Map each hostname to the list of its items."""
+        hosts = {}
+        for item in self:
+            hosts.setdefault(item.hostname, []).append(item)
+        return hosts
+
+
+def fan_out(commands, hostnames=None, workers=POOL_MAX_SIZE, **kwargs):
+    """Run one command across many hosts, or many commands on one host, in a
+    bounded pool of worker threads.
 
-def execute_command(cmd, connection, output_format=None, timeout=120):
+    Connections are borrowed from the shared :class:`SSHConnectionPool`, so
+    ``workers`` should not exceed the ``MaxStartups`` and ``MaxSessions``
+    limits of the remote sshd when all commands target the same host.
+    Exceptions raised by a command are recorded on its :class:`FanOutItem`
+    instead of being raised::
+
+        results = ssh.fan_out('subscription-manager clean', client_ips)
+        for item in results.failed:
+            logger.warning('%s: %s', item.hostname, item.error or item.result)
+
+    :param commands: A command to run on every host of ``hostnames`` or a list
+        of commands to run on the single host of ``hostnames``.
+    :param hostnames: A list of hostnames, a single hostname or ``None`` to
+        use ``hostname`` from configuration's ``server`` section.
+    :param int workers: Maximum number of commands running at once.
+    :param kwargs: Extra arguments passed to :func:`command`.
+    :return: a :class:`FanOutResult`.
+    """
+    if isinstance(commands, six.string_types):
+        if hostnames is None or isinstance(hostnames, six.string_types):
+            hostnames = [hostnames]
+        jobs = [(hostname, commands) for hostname in hostnames]
+    else:
+        if not (hostnames is None or
+                isinstance(hostnames, six.string_types)):
+            raise ValueError(
+                'Many commands can only be run on a single hostname')
+        jobs = [(hostnames, cmd) for cmd in commands]
+
+    def run(job):
+        hostname, cmd = job
+        hostname = hostname or settings.server.hostname
+        item = FanOutItem(hostname, cmd)
+        start = time.time()
+        try:
+            item.result = command(cmd, hostname=hostname, **kwargs)
+        except Exception as err:
+            logger.warning('Command %r failed on %s: %s', cmd, hostname, err)
+            item.error = err
+        item.duration = time.time() - start
+        return item
+
+    results = FanOutResult()
+    if not jobs:
+        return results
+    start = time.time()
+    workers = ThreadPool(min(workers, len(jobs)))
+    try:
+        results.extend(workers.map(run, jobs))
+    finally:
+        workers.close()
+        workers.join()
+    results.duration = time.time() - start
+    return results
+
+
+def _remote_timing_command(cmd):
+    """Wrap ``cmd`` in the ``time`` keyword of the remote bash shell.
+
+    The times are written as a last line on ``stderr``, after a unique
+    token, to be removed by :func:`_pop_remote_timing`.
+
+    :return: a tuple with the wrapped command and the token.
+    """
+    if isinstance(cmd, six.binary_type):
+        cmd = cmd.decode('utf-8')
+    token = uuid.uuid4().hex
+    return (
+        u"TIMEFORMAT=$'\\n{token} %3R %3U %3S'; time {{ {cmd}\n}}".format(
+            cmd=cmd, token=token),
+        token
+    )
+
+
+def _pop_remote_timing(stderr, token, timing):
+    """Remove the times written by :func:`_remote_timing_command` from the
+    raw ``stderr`` and record them on ``timing``.
+
+    :return: the raw ``stderr`` without the times.
+    """
+    match = re.search(
+        r'\n?{0} (\S+) (\S+) (\S+)\n?$'.format(token).encode('ascii'),
+        stderr
+    )
+    if match is None:
+        logger.warning('Remote timing not found in the command stderr')
+        return stderr
+    # the remote locale may use a decimal comma
+    timing.remote_real, timing.remote_user, timing.remote_sys = [
+        float(value.replace(b',', b'.')) for value in match.groups()]
+    return stderr[:match.start()]
+
+
+def _wait_first_byte(channel, timeout=None):
+    """Block until the channel has some output, its output ended or
+    ``timeout`` seconds elapsed.
+
+    The channel is waited for with ``select``: paramiko signals the pipe
+    behind :meth:`paramiko.Channel.fileno` as soon as data or the end of the
+    output is received, so the wait does not add any latency.
+    """
+    if not (channel.recv_ready() or channel.recv_stderr_ready() or
+            channel.exit_status_ready()):
+        select.select([channel], [], [], timeout)
+
+
+def execute_command(cmd, connection, output_format=None, timeout=120,
+                    timing=None, remote_timing=False):
     """Execute a command via ssh in the given connection
 
+    The result carries the :class:`CommandTiming` of the command. With
+    ``remote_timing`` the command is run by the ``time`` keyword of bash,
+    which must be the login shell of the remote user, and its wall clock
+    and CPU times are reported in a line removed from ``stderr``. The time
+    of the first byte of output is only observed then.
+
     :param cmd: a command to be executed via ssh
     :param connection: SSH Paramiko client connection
     :param output_format: plain|json|csv|list valid only for hammer commands
     :param timeout: defaults to 120
+    :param timing: the :class:`CommandTiming` to record to, a new one is
+        started when ``None``
+    :param bool remote_timing: whether to measure the remote times
     :return: SSHCommandResult
     """
+    if timing is None:
+        timing = CommandTiming()
     logger.info('>>> %s', cmd)
+    if remote_timing:
+        cmd, token = _remote_timing_command(cmd)
     _, stdout, stderr = connection.exec_command(cmd, timeout)
+    timing.mark('channel_opened')
 
+    if remote_timing:
+        _wait_first_byte(stdout.channel, timeout)
+        timing.mark('first_byte')
     errorcode = stdout.channel.recv_exit_status()
+    timing.mark('exit_status')
 
     stdout = stdout.read()
     stderr = stderr.read()
+    if remote_timing:
+        stderr = _pop_remote_timing(stderr, token, timing)
+    result = _build_result(stdout, stderr, errorcode, output_format)
+    result.timing = timing
+    return result
+
+
+def _build_result(stdout, stderr, errorcode, output_format=None):
+    """Decode and clean up raw command output and wrap it in a
+    :class:`SSHCommandResult`.
+
+    :param stdout: raw bytes read from the command ``stdout``
+    :param stderr: raw bytes read from the command ``stderr``
+    :param int errorcode: the command exit status
+    :param output_format: plain|json|csv|list valid only for hammer commands
+    :return: SSHCommandResult
+    """
     # Remove escape code for colors displayed in the output
-    regex = re.compile(r'\x1b\[\d\d?m')
+    regex = _COLOR_CODES_REGEX
     if stdout:
         # Convert to unicode string
         stdout = decode_to_utf8(stdout)
@@ -295,16 +1044,396 @@ def execute_command(cmd, connection, output_format=None, timeout=120):
         # information, so strip it out.
         # Empty fields are returned as "" which gives us u'""'
         stdout = stdout.replace('""', '')
-        stdout = u''.join(stdout).split('\n')
-        stdout = [
-            regex.sub('', line)
-            for line in stdout
-            if not line.startswith('[')
-        ]
+        if output_format == 'csv' and errorcode == 0:
+            # the csv parser reads the whole text, do not split it in lines
+            # only to have them joined back
+            if stdout.startswith('[') or '\n[' in stdout:
+                stdout = u'\n'.join(
+                    line
+                    for line in stdout.split('\n')
+                    if not line.startswith('[')
+                )
+            stdout = regex.sub('', stdout)
+        else:
+            stdout = [
+                regex.sub('', line)
+                for line in stdout.split('\n')
+                if not line.startswith('[')
+            ]
     return SSHCommandResult(
         stdout, stderr, errorcode, output_format)
 
 
+class SSHSessionError(Exception):
+    """Indicates that a persistent :class:`SSHSession` is no longer usable."""
+
+
+class SSHSession(object):
+    """A long lived remote shell used to run many commands over one channel.
+
+    The session borrows a connection from the process wide
+    :class:`SSHConnectionPool` and keeps a single ``bash`` process open on it.
+    Each command is streamed to the shell followed by a unique marker echoed
+    on both ``stdout`` and ``stderr`` which carries the command exit status,
+    so the output of every command can be framed back and returned as the
+    same :class:`SSHCommandResult` produced by :func:`command`.
+
+    A session is not thread-safe, each thread should use its own. A forked
+    process does not use the shell started by its parent, it starts its own
+    on the next command::
+
+        with SSHSession() as session:
+            session.run('ls /tmp')
+            session.run('hammer ping', output_format='plain')
+
+    :param str hostname: The hostname of the server to establish connection. If
+        it is ``None`` ``hostname`` from configuration's ``server`` section
+        will be used.
+    :param str username: The username to use when connecting.
+    :param str password: The password to use when connecting.
+    :param str key_filename: The path of the ssh private key to use when
+        connecting to the server.
+    :param int timeout: Time to wait for establish the connection.
+
+    """
+    shell = u'/bin/bash --noprofile --norc'
+    poll_interval = 0.005
+
+    def __init__(self, hostname=None, username=None, password=None,
+                 key_filename=None, timeout=10):
+        self.hostname = hostname
+        self.username = username
+        self.password = password
+        self.key_filename = key_filename
+        self.timeout = timeout
+        self._client = None
+        self._channel = None
+        self._pid = None
+
+    def _check_pid(self):
+        """Forget a shell started by the parent of a forked process, it must
+        be neither used nor closed by the child."""
+        if self._pid is not None and self._pid != os.getpid():
+            self._client = self._channel = self._pid = None
+
+    @property
+    def is_open(self):
+        """Whether the remote shell is still running."""
+        self._check_pid()
+        return (
+            self._channel is not None and
+            not self._channel.closed and
+            not self._channel.exit_status_ready()
+        )
+
+    def open(self):
+        """Start the remote shell if it is not running yet."""
+        if self.is_open:
+            return
+        self.close()
+        self._client = _pool.acquire(
+            self.hostname, self.username, self.password, self.key_filename,
+            self.timeout
+        )
+        try:
+            self._channel = _get_transport(self._client).open_session()
+            self._channel.exec_command(self.shell)
+        except Exception:
+            _pool.release(self._client, discard=True)
+            self._client = self._channel = None
+            raise
+        self._pid = os.getpid()
+        logger.debug('Opened shell session on Paramiko client {0}'.format(
+            self._client._id))
+
+    def close(self, discard=False):
+        """Stop the remote shell and give the connection back to the pool.
+
+        :param bool discard: Close the connection instead of giving it back.
+        """
+        self._check_pid()
+        if self._channel is not None:
+            try:
+                self._channel.close()
+            except Exception as err:  # pragma: no cover
+                logger.debug('Error closing session channel: %s', err)
+            self._channel = None
+        if self._client is not None:
+            _pool.release(self._client, discard=discard)
+            self._client = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_until_markers(self, stdout_marker, stderr_marker, timeout,
+                            timing=None):
+        """Read the channel until both markers are received.
+
+        The first received byte is recorded on ``timing`` when given.
+
+        :return: a tuple with the raw ``stdout`` buffer (including the exit
+            status marker) and the raw ``stderr`` buffer.
+        """
+        channel = self._channel
+        stdout = stderr = b''
+        stdout_done = stderr_done = False
+        deadline = None if timeout is None else time.time() + timeout
+        while not (stdout_done and stderr_done):
+            received = False
+            if channel.recv_ready():
+                stdout += channel.recv(32768)
+                # only the tail of the buffer can hold the marker
+                stdout_done = stdout_marker.search(
+                    stdout, max(0, len(stdout) - 64)) is not None
+                received = True
+            if channel.recv_stderr_ready():
+                stderr += channel.recv_stderr(32768)
+                stderr_done = stderr.endswith(stderr_marker)
+                received = True
+            if received:
+                if timing is not None and timing.first_byte is None:
+                    timing.mark('first_byte')
+                continue
+            if channel.exit_status_ready() or channel.closed:
+                raise SSHSessionError(
+                    'Remote shell exited while running the command')
+            if deadline is not None and time.time() > deadline:
+                raise socket.timeout(
+                    'Timed out waiting for the command output')
+            time.sleep(self.poll_interval)
+        return stdout, stderr
+
+    def run(self, cmd, output_format=None, timeout=None,
+            remote_timing=False):
+        """Run a command in the remote shell.
+
+        :param cmd: a command to be executed in the remote shell
+        :param output_format: plain|json|csv|list valid only for hammer
+            commands
+        :param timeout: seconds to wait for the command to finish, ``None``
+            waits forever
+        :param bool remote_timing: whether to measure the wall clock and CPU
+            times of the command in the remote shell
+        :return: SSHCommandResult
+        :raises robottelo.ssh.SSHSessionError: if the remote shell died while
+            running the command. The session is closed and will be reopened on
+            the next call.
+        """
+        if isinstance(cmd, six.binary_type):
+            cmd = cmd.decode('utf-8')
+        timing = CommandTiming()
+        self.open()
+        timing.mark('connected')
+        logger.info('>>> %s', cmd)
+        if remote_timing:
+            cmd, timing_token = _remote_timing_command(cmd)
+        token = uuid.uuid4().hex
+        script = (
+            u'{{ {cmd}\n}} < /dev/null\n'
+            u'printf "\\n{token} %d\\n" $?\n'
+            u'printf "\\n{token}\\n" >&2\n'
+        ).format(cmd=cmd, token=token)
+        stdout_marker = re.compile(
+            r'\n{0} (\d+)\n$'.format(token).encode('ascii'))
+        stderr_marker = u'\n{0}\n'.format(token).encode('ascii')
+        try:
+            self._channel.sendall(script.encode('utf-8'))
+            timing.mark('channel_opened')
+            stdout, stderr = self._read_until_markers(
+                stdout_marker, stderr_marker, timeout, timing)
+        except Exception:
+            # the shell state is unknown, do not reuse it
+            self.close(discard=True)
+            raise
+        match = stdout_marker.search(stdout)
+        errorcode = int(match.group(1))
+        stdout = stdout[:match.start()]
+        stderr = stderr[:-len(stderr_marker)]
+        timing.mark('exit_status')
+        if remote_timing:
+            stderr = _pop_remote_timing(stderr, timing_token, timing)
+        result = _build_result(stdout, stderr, errorcode, output_format)
+        result.timing = timing
+        return result
+
+
+class SSHCommandStream(object):
+    """Run a command and iterate over its ``stdout`` lines as they arrive.
+
+    Unlike :func:`command` the output is never held in memory as a whole:
+    ``stdout`` is decoded incrementally and each complete line is yielded
+    without color codes, while only the last ``keep_lines`` lines of
+    ``stdout`` and ``stderr`` are retained for the final
+    :attr:`result`. Leaving the iteration early, or calling :meth:`close`,
+    stops reading and closes the channel::
+
+        with SSHCommandStream('tail -f /var/log/messages') as output:
+            for line in output:
+                if 'Sync complete' in line:
+                    break
+        output.result  # SSHCommandResult with the last lines read
+
+    :param str cmd: The command to run
+    :param str hostname: The hostname of the server to establish connection. If
+        it is ``None`` ``hostname`` from configuration's ``server`` section
+        will be used.
+    :param str username: The username to use when connecting.
+    :param str password: The password to use when connecting.
+    :param str key_filename: The path of the ssh private key to use when
+        connecting to the server.
+    :param int timeout: Time to wait for establish the connection.
+    :param int command_timeout: Time to wait for the command to finish,
+        ``None`` waits forever.
+    :param int keep_lines: Number of trailing lines of ``stdout`` and
+        ``stderr`` kept for :attr:`result`, ``None`` keeps everything.
+
+    """
+    poll_interval = 0.005
+    chunk_size = 32768
+
+    def __init__(self, cmd, hostname=None, username=None, password=None,
+                 key_filename=None, timeout=10, command_timeout=None,
+                 keep_lines=1000):
+        if isinstance(cmd, six.binary_type):
+            cmd = cmd.decode('utf-8')
+        self.cmd = cmd
+        self.hostname = hostname
+        self.username = username
+        self.password = password
+        self.key_filename = key_filename
+        self.timeout = timeout
+        self.command_timeout = command_timeout
+        self.stdout = collections.deque(maxlen=keep_lines)
+        self.stderr = collections.deque(maxlen=keep_lines)
+        self.return_code = None
+        self._lines = None
+
+    def __iter__(self):
+        if self._lines is None:
+            self._lines = self._read_lines()
+        return self._lines
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Stop reading the output and close the channel.
+
+        The remote command is not waited for, its return code is ``-1`` if it
+        had not exited yet.
+        """
+        if self._lines is not None:
+            self._lines.close()
+
+    @property
+    def result(self):
+        """An :class:`SSHCommandResult` with the retained output.
+
+        Reading it runs the command to completion if it was not iterated and
+        stops it if the iteration was left early.
+        """
+        if self._lines is None:
+            for _ in self:
+                pass
+        elif self.return_code is None:
+            self.close()
+        return SSHCommandResult(
+            list(self.stdout), u''.join(self.stderr), self.return_code)
+
+    @staticmethod
+    def _split(decoder, data, pending, final=False):
+        """Decode ``data`` and split it into complete lines.
+
+        :return: a tuple with the list of complete lines, without color codes,
+            and the text of the incomplete last line.
+        """
+        text = pending + decoder.decode(data, final)
+        lines = text.split(u'\n')
+        pending = lines.pop()
+        if final and pending:
+            lines.append(pending)
+            pending = u''
+        return [_COLOR_CODES_REGEX.sub(u'', line) for line in lines], pending
+
+    def _read_lines(self):
+        """Generator running the command and yielding its ``stdout`` lines."""
+        logger.info('>>> %s', self.cmd)
+        client = _pool.acquire(
+            self.hostname, self.username, self.password, self.key_filename,
+            self.timeout
+        )
+        discard = True
+        channel = None
+        stdout_decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        stderr_decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        stdout = stderr = u''
+        deadline = None
+        if self.command_timeout is not None:
+            deadline = time.time() + self.command_timeout
+        try:
+            channel = _get_transport(client).open_session()
+            channel.exec_command(self.cmd)
+            while True:
+                received = False
+                if channel.recv_ready():
+                    lines, stdout = self._split(
+                        stdout_decoder, channel.recv(self.chunk_size), stdout)
+                    for line in lines:
+                        self.stdout.append(line)
+                        yield line
+                    received = True
+                if channel.recv_stderr_ready():
+                    lines, stderr = self._split(
+                        stderr_decoder, channel.recv_stderr(self.chunk_size),
+                        stderr)
+                    self.stderr.extend(line + u'\n' for line in lines)
+                    received = True
+                if deadline is not None and time.time() > deadline:
+                    raise socket.timeout(
+                        'Timed out waiting for the command to exit')
+                if received:
+                    continue
+                if channel.exit_status_ready():
+                    break
+                time.sleep(self.poll_interval)
+            # output received since the last checks is buffered by now
+            tail_stdout, tail_stderr = _read_buffered(
+                channel, self.chunk_size)
+            lines, _ = self._split(
+                stdout_decoder, tail_stdout, stdout, final=True)
+            for line in lines:
+                self.stdout.append(line)
+                yield line
+            lines, _ = self._split(
+                stderr_decoder, tail_stderr, stderr, final=True)
+            self.stderr.extend(line + u'\n' for line in lines)
+            self.return_code = channel.recv_exit_status()
+            discard = False
+        except GeneratorExit:
+            # the caller stopped reading, the connection is still usable
+            discard = False
+            raise
+        finally:
+            if self.return_code is None:
+                self.return_code = -1
+            if channel is not None:
+                channel.close()
+            _pool.release(client, discard=discard)
+            if self.stdout:
+                logger.info('<<< stdout (last lines)\n%s',
+                            u'\n'.join(self.stdout))
+            if self.stderr:
+                logger.info('<<< stderr (last lines)\n%s',
+                            u''.join(self.stderr))
+
+
 def is_ssh_pub_key(key):
     """Validates if a string is in valid ssh pub key format
 
@@ -332,3 +1461,12 @@ def is_ssh_pub_key(key):
     return key_type in (
         'ecdsa-sha2-nistp256', 'ssh-dss', 'ssh-rsa', 'ssh-ed25519'
     )
+
+
+if six.PY3 and sys.version_info >= (3, 5):
+    # the asyncio API uses the ``async``/``await`` syntax
+    from robottelo.ssh_async import (  # noqa: F401,E402
+        command_async,
+        gather,
+        gather_async,
+    )
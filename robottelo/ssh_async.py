@@ -0,0 +1,189 @@
+"""Asynchronous execution of SSH commands on top of :mod:`robottelo.ssh`.
+
+This module needs Python 3.5 or later. Its public functions are also exposed
+as :func:`robottelo.ssh.command_async`, :func:`robottelo.ssh.gather` and
+:func:`robottelo.ssh.gather_async` when available.
+
+Commands run on channels of the connections kept by the
+:class:`robottelo.ssh.SSHConnectionPool`. Only the short blocking steps of
+paramiko (connecting and opening a channel) are delegated to the event loop
+executor, waiting for the command to finish happens on the event loop itself
+so many commands on many hosts can be in flight from a single thread::
+
+    from robottelo import ssh
+
+    result = await ssh.command_async('hostname', hostname='client1')
+
+    results = ssh.gather([
+        'hammer ping',
+        {'cmd': 'subscription-manager clean', 'hostname': 'client1'},
+        {'cmd': 'subscription-manager clean', 'hostname': 'client2'},
+    ])
+
+"""
+import asyncio
+import logging
+import socket
+import time
+
+logger = logging.getLogger(__name__)
+
+#: Maximum number of commands :func:`gather` keeps in flight at once. Keep it
+#: below the ``MaxStartups`` and ``MaxSessions`` limits of the remote sshd.
+GATHER_LIMIT = 10
+#: Seconds between two checks of a running command
+POLL_INTERVAL = 0.01
+
+
+def _running_loop():
+    """Return the event loop running the calling coroutine"""
+    try:
+        return asyncio.get_running_loop()
+    except AttributeError:  # Python < 3.7
+        return asyncio.get_event_loop()
+
+
+def _open_channel(hostname, username, password, key_filename, timeout, cmd):
+    """Borrow a pooled connection and start ``cmd`` on a new channel.
+
+    Runs in the event loop executor as it blocks on network round trips.
+    """
+    from robottelo import ssh
+    client = ssh.get_pool().acquire(
+        hostname, username, password, key_filename, timeout)
+    try:
+        channel = ssh._get_transport(client).open_session()
+        channel.exec_command(cmd)
+    except Exception:
+        ssh.get_pool().release(client, discard=True)
+        raise
+    return client, channel
+
+
+async def _wait_channel(channel, timeout, poll_interval, timing=None):
+    """Drain ``stdout`` and ``stderr`` of a channel until its command exits.
+
+    The first received byte is recorded on ``timing`` when given.
+
+    :return: a tuple with the raw ``stdout``, raw ``stderr`` and exit status.
+    """
+    from robottelo import ssh
+    stdout = []
+    stderr = []
+    deadline = None if timeout is None else time.time() + timeout
+    while True:
+        received = False
+        if channel.recv_ready():
+            stdout.append(channel.recv(32768))
+            received = True
+        if channel.recv_stderr_ready():
+            stderr.append(channel.recv_stderr(32768))
+            received = True
+        if deadline is not None and time.time() > deadline:
+            raise socket.timeout('Timed out waiting for the command to exit')
+        if received:
+            if timing is not None and timing.first_byte is None:
+                timing.mark('first_byte')
+            # let other commands progress while this one is chatty
+            await asyncio.sleep(0)
+            continue
+        if channel.exit_status_ready():
+            # output received since the last checks is buffered by now
+            tail_stdout, tail_stderr = ssh._read_buffered(channel)
+            stdout.append(tail_stdout)
+            stderr.append(tail_stderr)
+            break
+        await asyncio.sleep(poll_interval)
+    return b''.join(stdout), b''.join(stderr), channel.recv_exit_status()
+
+
+async def command_async(cmd, hostname=None, output_format=None, username=None,
+                        password=None, key_filename=None, timeout=10,
+                        command_timeout=None):
+    """Coroutine executing a SSH command on remote hostname.
+
+    Accepts the same arguments as :func:`robottelo.ssh.command` and returns
+    the same :class:`robottelo.ssh.SSHCommandResult`.
+
+    :param str cmd: The command to run
+    :param str output_format: json, csv or None
+    :param str hostname: The hostname of the server to establish connection. If
+        it is ``None`` ``hostname`` from configuration's ``server`` section
+        will be used.
+    :param str username: The username to use when connecting.
+    :param str password: The password to use when connecting.
+    :param str key_filename: The path of the ssh private key to use when
+        connecting to the server.
+    :param int timeout: Time to wait for establish the connection.
+    :param int command_timeout: Time to wait for the command to finish,
+        ``None`` waits forever.
+    :return: SSHCommandResult
+    """
+    from robottelo import ssh
+    loop = _running_loop()
+    if isinstance(cmd, bytes):
+        cmd = cmd.decode('utf-8')
+    timing = ssh.CommandTiming()
+    logger.info('>>> %s', cmd)
+    client, channel = await loop.run_in_executor(
+        None, _open_channel, hostname, username, password, key_filename,
+        timeout, cmd
+    )
+    timing.mark('channel_opened')
+    try:
+        stdout, stderr, errorcode = await _wait_channel(
+            channel, command_timeout, POLL_INTERVAL, timing)
+        timing.mark('exit_status')
+    except BaseException:
+        channel.close()
+        ssh.get_pool().release(client, discard=True)
+        raise
+    channel.close()
+    ssh.get_pool().release(client)
+    result = ssh._build_result(stdout, stderr, errorcode, output_format)
+    result.timing = timing
+    return result
+
+
+async def gather_async(commands, limit=GATHER_LIMIT, return_exceptions=False):
+    """Coroutine running many SSH commands concurrently.
+
+    :param commands: an iterable where each item is either a command string,
+        run on the configured server, or a dictionary of
+        :func:`command_async` keyword arguments including ``cmd``.
+    :param int limit: maximum number of commands in flight at once.
+    :param bool return_exceptions: return the exception raised by a command
+        in its result slot instead of raising it.
+    :return: a list of :class:`robottelo.ssh.SSHCommandResult` in the same
+        order as ``commands``.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(command):
+        if not isinstance(command, dict):
+            command = {'cmd': command}
+        async with semaphore:
+            return await command_async(**command)
+
+    return await asyncio.gather(
+        *[run(command) for command in commands],
+        return_exceptions=return_exceptions
+    )
+
+
+def gather(commands, limit=GATHER_LIMIT, return_exceptions=False):
+    """Run many SSH commands concurrently on a private event loop and wait
+    for all of them to finish.
+
+    Blocking counterpart of :func:`gather_async` for synchronous callers,
+    accepting the same arguments.
+
+    :return: a list of :class:`robottelo.ssh.SSHCommandResult` in the same
+        order as ``commands``.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(gather_async(
+            commands, limit, return_exceptions))
+    finally:
+        loop.close()
@@ -21,6 +21,7 @@ except ImportError:
 
 from datetime import datetime
 from fauxfactory import gen_string
+from functools import partial
 from nailgun import entities
 from robottelo import manifests, ssh
 from robottelo.cleanup import EntitiesCleaner
@@ -34,18 +35,24 @@ from robottelo.constants import (
     DEFAULT_ORG,
     DEFAULT_ORG_ID,
 )
+from robottelo.host_info import get_host_sat_version
 from robottelo.performance.constants import NUM_THREADS
+from robottelo.performance.dashboard import DashboardWriter
 from robottelo.performance.graph import (
     generate_bar_chart_stat,
     generate_line_chart_raw_candlepin,
     generate_line_chart_stat_bucketized_candlepin,
+    generate_xy_chart_resources,
 )
-from robottelo.performance.stat import generate_stat_for_concurrent_thread
+from robottelo.performance.process import run_clients, TimedList
+from robottelo.performance.results import get_run_id, ResultsStore
+from robottelo.performance.sampler import ResourceSampler
+from robottelo.performance.stat import time_result_stats, write_stat_rows
 from robottelo.performance.thread import (
-    DeleteThread,
+    make_delete_thread,
+    make_subscribe_ak_thread,
+    make_subscribe_attach_thread,
     SyncThread,
-    SubscribeAKThread,
-    SubscribeAttachThread
 )
 from robottelo.ui.browser import browser, DockerBrowser
 from robottelo.ui.activationkey import ActivationKey
@@ -672,12 +679,35 @@ class ConcurrentTestCase(TestCase):
         cls.sub_id = ''
         cls.num_iterations = 0     # depend on # of threads or clients
         cls.bucket_size = 0        # depend on # of iterations on each thread
+        # number of processes the clients are sharded across
+        cls.driver_processes = settings.performance.driver_processes
+        # whether server resources are sampled while the clients run
+        cls.sample_resources = settings.performance.sample_resources
 
         cls._convert_to_numbers()  # read in string type, convert to numbers
 
         # read default organization from constant module
         cls.default_org = DEFAULT_ORG
 
+        # store raw timings to compare runs
+        cls.results_store = ResultsStore()
+
+        # rewrite the dashboard of the run while the test cases run
+        cls.dashboard_writer = None
+        if settings.performance.dashboard_refresh > 0:
+            cls.dashboard_writer = DashboardWriter(
+                cls.results_store,
+                get_run_id(),
+                refresh=settings.performance.dashboard_refresh,
+            )
+            cls.dashboard_writer.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        super(ConcurrentTestCase, cls).tearDownClass()
+        if cls.dashboard_writer is not None:
+            cls.dashboard_writer.stop()
+
     @classmethod
     def _convert_to_numbers(cls):
         """read in string type series, convert to numbers"""
@@ -742,6 +772,16 @@ class ConcurrentTestCase(TestCase):
         # Restore database before concurrent subscription/deletion
         self._restore_from_savepoint(self.savepoint)
 
+        # test cases and number of clients whose timings were stored
+        self.stored_test_cases = []
+        if self.sample_resources:
+            sampler = ResourceSampler(
+                store=self.results_store, run_id=get_run_id())
+            sampler.start()
+            # cleanups run last in, first out: charts once samples are stored
+            self.addCleanup(self._write_resource_charts)
+            self.addCleanup(sampler.stop)
+
     def _restore_from_savepoint(self, savepoint):
         """Restore from savepoint"""
         if savepoint == '':
@@ -782,11 +822,11 @@ class ConcurrentTestCase(TestCase):
            1000 iterations concurrently;
 
         """
-        self.num_iterations = total_iterations / current_num_threads
+        self.num_iterations = total_iterations // current_num_threads
 
     def _set_bucket_size(self):
         """Set size for each bucket"""
-        bucket = self.num_iterations / self.num_buckets
+        bucket = self.num_iterations // self.num_buckets
 
         # check if num_iterations for each client is smaller than 10
         if bucket > 0:
@@ -815,6 +855,53 @@ class ConcurrentTestCase(TestCase):
         split_file_name = file_name.split('.')
         return split_file_name[0]
 
+    def _store_samples(
+            self,
+            raw_file_name,
+            time_result_dict,
+            current_num_threads):
+        """Record raw timings in the results store of the run
+
+        The test case is named after the raw csv file, as the charts.
+
+        """
+        test_case = self._get_output_filename(raw_file_name)
+        self.results_store.add_samples(
+            get_run_id(),
+            test_case,
+            current_num_threads,
+            time_result_dict,
+            sat_version=get_host_sat_version(),
+        )
+        self.stored_test_cases.append((test_case, current_num_threads))
+
+    def _write_resource_charts(self):
+        """Generate charts of the CPU usage of the server sampled while the
+        clients of each stored test case ran, overlaid on their timings"""
+        run_id = get_run_id()
+        for test_case, current_num_threads in self.stored_test_cases:
+            timeline = self.results_store.timeline(
+                run_id, test_case, current_num_threads)
+            if not timeline:
+                continue
+            resources = self.results_store.resources(
+                run_id,
+                # the start of the first operation
+                timeline[0][0] - timeline[0][2],
+                timeline[-1][0]
+            )
+            generate_xy_chart_resources(
+                timeline,
+                {
+                    key: values for key, values in resources.items()
+                    if key[1] == 'cpu'
+                },
+                'Server CPU Usage (%) and Raw Timings - '
+                '({0}-{1}-clients)'.format(test_case, current_num_threads),
+                '{0}-{1}-clients-resources-xy-chart.svg'.format(
+                    test_case, current_num_threads)
+            )
+
     def _write_raw_csv_file(
             self,
             raw_file_name,
@@ -853,6 +940,9 @@ class ConcurrentTestCase(TestCase):
                 writer.writerow(time_result_dict.get('thread-{0}'.format(i)))
             writer.writerow([])
 
+        self._store_samples(
+            raw_file_name, time_result_dict, current_num_threads)
+
         # generate line chart of raw data
         test_category = self._get_output_filename(raw_file_name)
         generate_line_chart_raw_candlepin(
@@ -891,6 +981,10 @@ class ConcurrentTestCase(TestCase):
             ``_get_output_filename`` defined in this module
 
         """
+        # compute all the stat at once
+        stats = time_result_stats(
+            time_result_dict, self.bucket_size, self.num_buckets)
+
         with open(stat_file_name, 'a') as handler:
             writer = csv.writer(handler)
             writer.writerow([test_case_name])
@@ -901,6 +995,7 @@ class ConcurrentTestCase(TestCase):
                 stat_file_name,
                 time_result_dict,
                 current_num_threads,
+                stats,
             )
             writer.writerow([])
 
@@ -909,6 +1004,7 @@ class ConcurrentTestCase(TestCase):
             self._write_stat_per_test_bucketized(
                 stat_file_name,
                 time_result_dict,
+                stats,
             )
             writer.writerow([])
 
@@ -918,6 +1014,7 @@ class ConcurrentTestCase(TestCase):
                 stat_file_name,
                 time_result_dict,
                 current_num_threads,
+                stats,
             )
             writer.writerow([])
 
@@ -926,6 +1023,7 @@ class ConcurrentTestCase(TestCase):
             self._write_stat_per_test(
                 stat_file_name,
                 time_result_dict,
+                stats,
             )
             writer.writerow([])
 
@@ -933,7 +1031,8 @@ class ConcurrentTestCase(TestCase):
             self,
             stat_file_name,
             time_result_dict,
-            current_num_threads):
+            current_num_threads,
+            stats):
         """Write bucketized stat of per-client results to csv file
 
         note: each bucket is just a split of a client i. For example::
@@ -947,14 +1046,12 @@ class ConcurrentTestCase(TestCase):
         test_category = self._get_output_filename(stat_file_name)
 
         for i in range(current_num_threads):
-            time_list = time_result_dict.get('thread-{0}'.format(i))
             thread_name = 'client-{0}'.format(i)
-            stat_dict = generate_stat_for_concurrent_thread(
+            stat_dict = write_stat_rows(
                 thread_name,
-                time_list,
+                stats['per_client_bucketized'][i],
                 stat_file_name,
-                self.bucket_size,
-                self.num_buckets
+                self.bucket_size
             )
 
             # create line chart with each client being grouped by buckets
@@ -972,7 +1069,8 @@ class ConcurrentTestCase(TestCase):
     def _write_stat_per_test_bucketized(
             self,
             stat_file_name,
-            time_result_dict):
+            time_result_dict,
+            stats):
         """Write bucketized stat of per-test to csv file
 
         note: each bucket of all clients would merge into a chunk;
@@ -998,21 +1096,18 @@ class ConcurrentTestCase(TestCase):
         test_category = self._get_output_filename(stat_file_name)
 
         for i in range(self.num_buckets):
-            chunks_bucket_i = []
-            for j in range(len(time_result_dict)):
-                time_list = time_result_dict.get('thread-{0}'.format(j))
-                # slice out bucket-size from each client's result and merge
-                chunks_bucket_i += time_list[
-                    i * self.bucket_size: (i + 1) * self.bucket_size
-                ]
-
-            # for each chunk i, compute and output its stat
-            return_stat = generate_stat_for_concurrent_thread(
+            # each chunk i merges the bucket i of all clients
+            chunk_size = sum(
+                len(time_list[i * self.bucket_size:(i + 1) * self.bucket_size])
+                for time_list in time_result_dict.values()
+            )
+
+            # for each chunk i, output its stat
+            return_stat = write_stat_rows(
                 'bucket-{0}'.format(i),
-                chunks_bucket_i,
+                [stats['per_test_bucketized'][i]],
                 stat_file_name,
-                len(chunks_bucket_i),
-                1
+                chunk_size
             )
 
             # for each chunk i, add stat into final return_dict
@@ -1034,7 +1129,8 @@ class ConcurrentTestCase(TestCase):
             self,
             stat_file_name,
             time_result_dict,
-            current_num_threads):
+            current_num_threads,
+            stats):
         """Write stat of per-client results to csv file
 
         note: take the full list of a client i; calculate stat on the list
@@ -1050,13 +1146,12 @@ class ConcurrentTestCase(TestCase):
             time_list = time_result_dict.get('thread-{0}'.format(i))
             thread_name = 'client-{0}'.format(i)
 
-            # for each client i, compute and output its stat
-            return_stat = generate_stat_for_concurrent_thread(
+            # for each client i, output its stat
+            return_stat = write_stat_rows(
                 thread_name,
-                time_list,
+                [stats['per_client'][i]],
                 stat_file_name,
-                len(time_list),
-                1
+                len(time_list)
             )
 
             # for each chunk i, add stat into final return_dict
@@ -1073,26 +1168,20 @@ class ConcurrentTestCase(TestCase):
             'client'
         )
 
-    def _write_stat_per_test(self, stat_file_name, time_result_dict):
+    def _write_stat_per_test(self, stat_file_name, time_result_dict, stats):
         """Write stat of per-test results to csv file
 
         note: take the full dictionary of test and calculate overall stat
 
         """
-        full_list = []  # list containing 1st to 5kth data point
         current_num_threads = len(time_result_dict)
         test_category = self._get_output_filename(stat_file_name)
 
-        for i in range(len(time_result_dict)):
-            time_list = time_result_dict.get('thread-{0}'.format(i))
-            full_list += time_list
-
-        stat_dict = generate_stat_for_concurrent_thread(
+        stat_dict = write_stat_rows(
             'test-{0}'.format(len(time_result_dict)),
-            full_list,
+            [stats['per_test']],
             stat_file_name,
-            len(full_list),
-            1
+            sum(len(time_list) for time_list in time_result_dict.values())
         )
 
         generate_bar_chart_stat(
@@ -1120,29 +1209,18 @@ class ConcurrentTestCase(TestCase):
         self._set_num_iterations(total_iterations, current_num_threads)
         self._set_bucket_size()
 
-        # Create a list to store all threads
-        thread_list = []
-        # Create a dictionary to store all timing results from each client
-        time_result_dict_ak = {}
-
-        # Create new threads and start each thread mapped with a vm
-        for i in range(current_num_threads):
-            thread_name = 'thread-{0}'.format(i)
-            time_result_dict_ak[thread_name] = []
-            thread = SubscribeAKThread(
-                i,
-                thread_name,
-                time_result_dict_ak,
-                self.num_iterations,
-                self.ak_name,
-                self.default_org,
-                current_vm_list[i]
-            )
-            thread.start()
-            thread_list.append(thread)
-
-        # wait all threads in thread list
-        self._join_all_threads(thread_list)
+        # Run a client mapped with each vm and wait for all of them
+        time_result_dict_ak = run_clients(
+            partial(
+                make_subscribe_ak_thread,
+                num_iterations=self.num_iterations,
+                ak_name=self.ak_name,
+                default_org=self.default_org,
+                vm_list=current_vm_list,
+            ),
+            current_num_threads,
+            processes=self.driver_processes,
+        )['time']
 
         # write raw result of activation-key
         self._write_raw_csv_file(
@@ -1175,36 +1253,23 @@ class ConcurrentTestCase(TestCase):
         self._set_num_iterations(total_iterations, current_num_threads)
         self._set_bucket_size()
 
-        # Create a list to store all threads
-        thread_list = []
-        # Create a dictionary to store register timings from each client
-        time_result_dict_register = {}
-        # Create a dictionary to store attach timings from each client
-        time_result_dict_attach = {}
-
-        # Create new threads and start each thread mapped with a vm
-        for i in range(current_num_threads):
-            thread_name = 'thread-{0}'.format(i)
-            time_result_dict_register[thread_name] = []
-            time_result_dict_attach[thread_name] = []
-
-            thread = SubscribeAttachThread(
-                i,
-                thread_name,
-                {},
-                time_result_dict_register,
-                time_result_dict_attach,
-                self.num_iterations,
-                self.sub_id,
-                self.default_org,
-                self.environment,
-                current_vm_list[i]
-            )
-            thread.start()
-            thread_list.append(thread)
-
-        # wait all threads in thread list
-        self._join_all_threads(thread_list)
+        # Run a client mapped with each vm and wait for all of them, register
+        # and attach timings are stored in separate dictionaries
+        time_result_dicts = run_clients(
+            partial(
+                make_subscribe_attach_thread,
+                num_iterations=self.num_iterations,
+                sub_id=self.sub_id,
+                default_org=self.default_org,
+                environment=self.environment,
+                vm_list=current_vm_list,
+            ),
+            current_num_threads,
+            result_names=('register', 'attach'),
+            processes=self.driver_processes,
+        )
+        time_result_dict_register = time_result_dicts['register']
+        time_result_dict_attach = time_result_dicts['attach']
 
         # write raw result of register
         self._write_raw_csv_file(
@@ -1255,27 +1320,16 @@ class ConcurrentTestCase(TestCase):
         self._set_num_iterations(total_iterations, current_num_threads)
         self._set_bucket_size()
 
-        # Create a list to store all threads
-        thread_list = []
-        # Create a dictionary to store all timing results from each thread
-        time_result_dict_del = {}
-
-        # Create new threads and start the thread which has sublist of uuids
-        for i in range(current_num_threads):
-            time_result_dict_del['thread-{0}'.format(i)] = []
-            thread = DeleteThread(
-                i,
-                'thread-{0}'.format(i),
-                uuid_list[
-                    self.num_iterations * i: self.num_iterations * (i + 1)
-                ],
-                time_result_dict_del
-            )
-            thread.start()
-            thread_list.append(thread)
-
-        # wait all threads in thread list
-        self._join_all_threads(thread_list)
+        # Run clients deleting each a sublist of uuids and wait for them
+        time_result_dict_del = run_clients(
+            partial(
+                make_delete_thread,
+                uuid_list=uuid_list,
+                num_iterations=self.num_iterations,
+            ),
+            current_num_threads,
+            processes=self.driver_processes,
+        )['time']
 
         # write raw result of del
         self._write_raw_csv_file(
@@ -1321,7 +1375,7 @@ class ConcurrentTestCase(TestCase):
         # Create a dictionary to store all timing results from each thread
         time_result_dict = {}
         for thread_id in range(current_num_threads):
-            time_result_dict['thread-{0}'.format(thread_id)] = []
+            time_result_dict['thread-{0}'.format(thread_id)] = TimedList()
 
         # sync all specified repositories and repeate X times
         for iteration in range(self.sync_iterations):
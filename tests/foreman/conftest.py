@@ -1,9 +1,16 @@
 # coding: utf-8
 """Configurations for py.test runner"""
 import datetime
+import os
 import pytest
+from robottelo.cli.factory import ORG_POOL_SIZE_ENV
 from robottelo.config import settings
 from robottelo.bz_helpers import get_deselect_bug_ids, group_by_key
+from robottelo.decorators.fixture_store import (
+    get_run_id,
+    RUN_ID_ENV,
+    teardown_fixtures,
+)
 from robottelo.helpers import get_func_name
 
 
@@ -33,6 +40,30 @@ def worker_id(request):
         return 'master'
 
 
+def pytest_configure(config):
+    """Identify the run before xdist starts its workers so they share the
+    fixtures of :mod:`robottelo.decorators.fixture_store`.
+
+    The shared fixtures are deleted at the end of the session by the
+    process which identified the run, see :func:`pytest_sessionfinish`.
+
+    Boxed tests run in forked processes which do not wait for the
+    organizations created ahead by :func:`robottelo.cli.factory.OrgPool`,
+    so organizations are created on demand then.
+    """
+    if not hasattr(config, 'slaveinput'):
+        config.owns_fixture_store_run = not os.environ.get(RUN_ID_ENV)
+        get_run_id()
+    if config.getoption('boxed', False) or config.getoption('forked', False):
+        os.environ.setdefault(ORG_POOL_SIZE_ENV, '0')
+
+
+def pytest_sessionfinish(session):
+    """Delete the shared fixtures once all the xdist workers are done."""
+    if getattr(session.config, 'owns_fixture_store_run', False):
+        teardown_fixtures()
+
+
 def pytest_namespace():
     """return dict of name->object to be made globally available in
     the pytest namespace.  This hook is called at plugin registration
@@ -189,6 +189,9 @@ class ConcurrentSyncTestCase(ConcurrentTestCase):
                 writer.writerow(time_result_dict.get('thread-{0}'.format(i)))
             writer.writerow([])
 
+        self._store_samples(
+            raw_file_name, time_result_dict, current_num_threads)
+
         # generate line chart of raw data
         test_category = self._get_output_filename(raw_file_name)
         generate_line_chart_raw_pulp(
@@ -0,0 +1,133 @@
+"""Unit tests for :mod:`robottelo.decorators.fixture_store`."""
+import multiprocessing
+import shutil
+import tempfile
+
+import six
+from unittest2 import TestCase
+
+from robottelo.decorators import fixture_store
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+#: Values deleted by :func:`delete_org`
+DELETED = []
+
+
+def delete_org(org):
+    """Record the deleted fixture values"""
+    if org.get('fail'):
+        raise ValueError('can not delete')
+    DELETED.append(org)
+
+
+def _acquire_in_process(lock_dir, run_id, queue):
+    """Acquire the fixture from an other process of the same run"""
+    import os
+    os.environ[fixture_store.RUN_ID_ENV] = run_id
+    with mock.patch(
+            'robottelo.decorators.fixture_store._get_temp_lock_function_dir',
+            return_value=lock_dir):
+        queue.put(fixture_store.acquire_fixture(
+            'org', lambda: {'id': 'created by child'}, delete_org))
+
+
+class FixtureStoreTestCase(TestCase):
+    """Tests for the shared fixture store."""
+
+    def setUp(self):
+        self.lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.lock_dir)
+        patcher = mock.patch(
+            'robottelo.decorators.fixture_store._get_temp_lock_function_dir',
+            return_value=self.lock_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.dict(
+            'os.environ', {fixture_store.RUN_ID_ENV: 'run1'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.create = mock.Mock(return_value={'id': 1, 'name': 'org'})
+        del DELETED[:]
+
+    def test_create_once(self):
+        """The fixture is created once and its value reused."""
+        first = fixture_store.acquire_fixture('org', self.create)
+        second = fixture_store.acquire_fixture('org', self.create)
+        self.assertEqual(first, {'id': 1, 'name': 'org'})
+        self.assertEqual(second, first)
+        self.create.assert_called_once_with()
+
+    def test_teardown(self):
+        """Fixtures are kept until they are torn down at the end of the
+        run."""
+        fixture_store.acquire_fixture('org', self.create, delete_org)
+        fixture_store.acquire_fixture('org', self.create, delete_org)
+        fixture_store.acquire_fixture('other', lambda: {'id': 2})
+        self.assertEqual(DELETED, [])
+        self.assertEqual(
+            sorted(fixture_store.teardown_fixtures()), ['org', 'other'])
+        self.assertEqual(DELETED, [{'id': 1, 'name': 'org'}])
+        self.assertEqual(fixture_store.teardown_fixtures(), [])
+        fixture_store.acquire_fixture('org', self.create, delete_org)
+        self.assertEqual(self.create.call_count, 2)
+
+    def test_teardown_failure(self):
+        """A fixture failing to be deleted is removed anyway."""
+        fixture_store.acquire_fixture(
+            'org', lambda: {'fail': True}, delete_org)
+        self.assertEqual(fixture_store.teardown_fixtures(), ['org'])
+        self.assertEqual(DELETED, [])
+
+    def test_delete_function(self):
+        """Only module level functions can delete the fixtures."""
+        with self.assertRaises(ValueError):
+            fixture_store.acquire_fixture(
+                'org', self.create, lambda org: None)
+        self.create.assert_not_called()
+
+    def test_runs_are_separated(self):
+        """Fixtures are not shared between runs."""
+        fixture_store.acquire_fixture('org', self.create)
+        with mock.patch.dict('os.environ', {fixture_store.RUN_ID_ENV: ''}):
+            fixture_store.acquire_fixture('org', self.create)
+            self.assertNotEqual(fixture_store.get_run_id(), 'run1')
+        self.assertEqual(self.create.call_count, 2)
+
+    def test_failed_create(self):
+        """Nothing is published when the creation fails."""
+        self.create.side_effect = [ValueError, {'id': 2}]
+        with self.assertRaises(ValueError):
+            fixture_store.acquire_fixture('org', self.create)
+        self.assertEqual(
+            fixture_store.acquire_fixture('org', self.create), {'id': 2})
+
+    def test_other_process(self):
+        """Other processes of the run reuse the fixture."""
+        fixture_store.acquire_fixture('org', self.create)
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=_acquire_in_process, args=(self.lock_dir, 'run1', queue))
+        process.start()
+        process.join(30)
+        self.assertEqual(queue.get(timeout=5), {'id': 1, 'name': 'org'})
+
+    def test_workers_one_after_the_other(self):
+        """A fixture used by workers one after the other is created and
+        deleted once."""
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=_acquire_in_process, args=(self.lock_dir, 'run1', queue))
+        process.start()
+        process.join(30)
+        self.assertEqual(queue.get(timeout=5), {'id': 'created by child'})
+        self.assertEqual(
+            fixture_store.acquire_fixture('org', self.create, delete_org),
+            {'id': 'created by child'})
+        self.create.assert_not_called()
+        fixture_store.teardown_fixtures()
+        self.assertEqual(DELETED, [{'id': 'created by child'}])
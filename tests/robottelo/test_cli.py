@@ -1,13 +1,20 @@
+import copy
+import json
 import six
+import threading
 import unittest2
 
 from functools import partial
+from robottelo.cli import base as base_module
 from robottelo.cli.base import (
     Base,
     CLIBaseError,
     CLIDataBaseError,
     CLIError,
-    CLIReturnCodeError
+    CLIReturnCodeError,
+    get_hammer_session,
+    hammer_session,
+    LazyInfo,
 )
 
 if six.PY2:
@@ -28,13 +35,12 @@ class BaseCliTestCase(unittest2.TestCase):
     def test_construct_command(self):
         """_construct_command builds a command using flags and arguments"""
         Base.command_base = 'basecommand'
-        Base.command_sub = 'subcommand'
         command_parts = Base._construct_command({
             u'flag-one': True,
             u'flag-two': False,
             u'argument': u'value',
             u'ommited-arg': None,
-        }).split()
+        }, 'subcommand').split()
 
         self.assertIn(u'basecommand', command_parts)
         self.assertIn(u'subcommand', command_parts)
@@ -156,15 +162,14 @@ class BaseCliTestCase(unittest2.TestCase):
     @mock.patch('robottelo.cli.base.Base.execute')
     @mock.patch('robottelo.cli.base.Base._construct_command')
     def test_add_operating_system(self, construct, execute):
-        """Check command_sub edited when executing add_operating_system"""
+        """Check command_sub passed when executing add_operating_system"""
         options = {u'foo': u'bar'}
-        self.assertNotEqual('add-operatingsystem', Base.command_sub)
         self.assertEqual(
             execute.return_value,
             Base.add_operating_system(options)
         )
-        self.assertEqual('add-operatingsystem', Base.command_sub)
-        construct.called_once_with(options)
+        self.assertIsNone(Base.command_sub)
+        construct.assert_called_once_with(options, 'add-operatingsystem')
         execute.called_once_with(construct.return_value)
 
     @mock.patch('robottelo.cli.base.Base.execute')
@@ -176,8 +181,7 @@ class BaseCliTestCase(unittest2.TestCase):
             execute.return_value,
             Base.create()
         )
-        self.assertEqual('create', Base.command_sub)
-        construct.called_once_with({})
+        construct.assert_called_once_with({}, 'create')
         execute.called_once_with(construct.return_value, output_format='csv')
 
     @mock.patch('robottelo.cli.base.Base.info')
@@ -191,8 +195,7 @@ class BaseCliTestCase(unittest2.TestCase):
             execute.return_value,
             Base.create()
         )
-        self.assertEqual('create', Base.command_sub)
-        construct.called_once_with({})
+        construct.assert_called_once_with({}, 'create')
         execute.called_once_with(construct.return_value, output_format='csv')
         self.assertFalse(info.called)
 
@@ -210,8 +213,7 @@ class BaseCliTestCase(unittest2.TestCase):
             execute.return_value,
             Base.create()
         )
-        self.assertEqual('create', Base.command_sub)
-        construct.called_once_with({})
+        construct.assert_called_once_with({}, 'create')
         execute.called_once_with(construct.return_value, output_format='csv')
         info.called_once_with({'id': 'foo'})
 
@@ -229,8 +231,8 @@ class BaseCliTestCase(unittest2.TestCase):
             execute.return_value,
             Base.create({'organization-id': 'org-id'})
         )
-        self.assertEqual('create', Base.command_sub)
-        construct.called_once_with({})
+        construct.assert_called_once_with(
+            {'organization-id': 'org-id'}, 'create')
         execute.called_once_with(construct.return_value, output_format='csv')
         info.called_once_with({'id': 'foo', 'organization-id': 'org-id'})
 
@@ -246,8 +248,7 @@ class BaseCliTestCase(unittest2.TestCase):
         ]
         Base.command_requires_org = True
         self.assertRaises(CLIError, Base.create)
-        self.assertEqual('create', Base.command_sub)
-        construct.called_once_with({})
+        construct.assert_called_once_with({}, 'create')
         execute.called_once_with(construct.return_value, output_format='csv')
 
     def assert_cmd_execution(
@@ -258,8 +259,9 @@ class BaseCliTestCase(unittest2.TestCase):
             execute.return_value,
             base_method(**base_method_kwargs)
         )
-        self.assertEqual(cmd_sub, Base.command_sub)
-        construct.called_once_with({})
+        self.assertIsNone(Base.command_sub)
+        self.assertEqual(construct.call_count, 1)
+        self.assertEqual(cmd_sub, construct.call_args[0][1])
         execute.called_once_with(
             construct.return_value, ignore_stderr=ignore_stderr
         )
@@ -293,11 +295,12 @@ class BaseCliTestCase(unittest2.TestCase):
         settings.server.admin_username = 'admin'
         settings.server.admin_password = 'password'
         response = Base.execute('some_cmd', return_raw_response=True)
-        ssh_cmd = u'LANG=en_US  hammer -v -u admin -p password  some_cmd'
+        ssh_cmd = u'LANG=en_US hammer -v -u admin -p password  some_cmd'
         command.assert_called_once_with(
             ssh_cmd.encode('utf-8'),
             output_format=None,
-            timeout=None
+            timeout=None,
+            remote_timing=False,
         )
         self.assertIs(response, command.return_value)
 
@@ -307,25 +310,81 @@ class BaseCliTestCase(unittest2.TestCase):
     def test_execute_with_performance(self, settings, command, handle_resp):
         """Check excuted build ssh method and delegate response handling"""
         settings.locale = 'en_US'
-        settings.performance.timer_hammer = True
+        settings.performance.time_hammer = True
         settings.server.admin_username = 'admin'
         settings.server.admin_password = 'password'
         response = Base.execute('some_cmd', output_format='json')
         ssh_cmd = (
-            u'LANG=en_US time -p hammer -v -u admin -p password --output=json'
+            u'LANG=en_US hammer -v -u admin -p password --output=json'
             u' some_cmd'
         )
         command.assert_called_once_with(
             ssh_cmd.encode('utf-8'),
             output_format='json',
-            timeout=None
+            timeout=None,
+            remote_timing=True,
         )
         handle_resp.assert_called_once_with(
             command.return_value,
-            ignore_stderr=None
+            ignore_stderr=None,
+            command='some_cmd',
         )
         self.assertIs(response, handle_resp.return_value)
 
+    @mock.patch('robottelo.cli.base.ssh')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_execute_with_hammer_session(self, settings, ssh):
+        """Check commands run inside ``hammer_session`` use the session"""
+        settings.locale = 'en_US'
+        settings.performance = False
+        settings.server.admin_username = 'admin'
+        settings.server.admin_password = 'password'
+        session = ssh.SSHSession.return_value
+        with hammer_session() as current:
+            self.assertIs(current, session)
+            self.assertIs(get_hammer_session(), session)
+            response = Base.execute('some_cmd', return_raw_response=True)
+        ssh_cmd = u'LANG=en_US hammer -v -u admin -p password  some_cmd'
+        session.run.assert_called_once_with(
+            ssh_cmd.encode('utf-8'),
+            output_format=None,
+            timeout=None,
+            remote_timing=False,
+        )
+        self.assertFalse(ssh.command.called)
+        self.assertIs(response, session.run.return_value)
+        session.close.assert_called_once_with()
+        self.assertIsNone(get_hammer_session())
+
+    @mock.patch('robottelo.cli.base.ssh')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_hammer_session_setting(self, settings, ssh):
+        """Check a thread session is created when enabled by configuration"""
+        settings.hammer_session = True
+        try:
+            session = get_hammer_session()
+            self.assertIs(session, ssh.SSHSession.return_value)
+            self.assertIs(get_hammer_session(), session)
+            ssh.SSHSession.assert_called_once_with()
+            base_module._close_hammer_session()
+            session.close.assert_called_once_with()
+            self.assertIsNone(base_module._local.session)
+        finally:
+            base_module._local.session = None
+
+    @mock.patch('robottelo.cli.base.ssh')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_hammer_session_setting_worker(self, settings, ssh):
+        """Check worker threads do not keep a session of their own"""
+        settings.hammer_session = True
+        sessions = []
+        worker = threading.Thread(
+            target=lambda: sessions.append(get_hammer_session()))
+        worker.start()
+        worker.join()
+        self.assertEqual(sessions, [None])
+        self.assertFalse(ssh.SSHSession.called)
+
     @mock.patch('robottelo.cli.base.Base.list')
     def test_exists_without_option_and_empty_return(self, lst_method):
         """Check exists method without options and empty return"""
@@ -395,8 +454,8 @@ class BaseCliTestCase(unittest2.TestCase):
             execute.return_value,
             Base.list(options={'organization-id': 1})
         )
-        self.assertEqual('list', Base.command_sub)
-        construct.called_once_with({'per-page': 1000})
+        construct.assert_called_once_with(
+            {'organization-id': 1, 'per-page': 10000}, 'list')
         execute.called_once_with(construct.return_value, output_format='csv')
 
     @mock.patch('robottelo.cli.base.Base.execute')
@@ -471,6 +530,54 @@ class BaseCliTestCase(unittest2.TestCase):
         )
 
 
+class ConcurrentCommandTestCase(unittest2.TestCase):
+    """Tests for building commands from several threads at once"""
+
+    @mock.patch('robottelo.cli.base.Base.execute')
+    def test_concurrent_subcommands(self, execute):
+        """Each thread runs the subcommand it asked for"""
+        class Entity(Base):
+            command_base = 'entity'
+            command_requires_org = False
+
+        barrier = threading.Barrier(2) if six.PY3 else None
+
+        def execute_side_effect(command, **kwargs):
+            # let both threads build their command before going on
+            if barrier is not None:
+                barrier.wait(timeout=5)
+            return [{'command': command}]
+
+        execute.side_effect = execute_side_effect
+        results = {}
+
+        def run(method, key):
+            results[key] = method({'id': key})
+
+        threads = [
+            threading.Thread(target=run, args=(Entity.list, '1')),
+            threading.Thread(target=run, args=(Entity.update, '2')),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(
+            results['1'][0]['command'].startswith('entity list '))
+        self.assertTrue(
+            results['2'][0]['command'].startswith('entity update '))
+
+    def test_handle_response_error_message(self):
+        """Error message shows the failed subcommand without its options"""
+        response = mock.Mock()
+        response.return_code = 1
+        response.stderr = u'some error'
+        with self.assertRaises(CLIReturnCodeError) as context:
+            Base._handle_response(
+                response, command=u'entity version info --id="1"')
+        self.assertIn(u'Command "entity version info"', context.exception.msg)
+
+
 class CLIErrorTests(unittest2.TestCase):
     """Tests for the CLIError cli class"""
 
@@ -506,3 +613,68 @@ class CLIBaseErrorTestCase(unittest2.TestCase):
         """Check if message is exposed to assertRaisesRegexp"""
         with self.assertRaisesRegexp(CLIBaseError, u'msg'):
             raise CLIBaseError(1, u'stderr', u'msg')
+
+
+class LazyInfoTestCase(unittest2.TestCase):
+    """Tests for the lazy entity information returned by create"""
+
+    def setUp(self):
+        self.fetch = mock.Mock(return_value={
+            u'id': u'1', u'name': u'org', u'label': u'org_label'})
+        self.info = LazyInfo(
+            {u'message': u'Created', u'id': u'1', u'name': u'org'},
+            self.fetch
+        )
+
+    def test_create_keys(self):
+        """id and name are read without running info"""
+        self.assertEqual(self.info[u'id'], u'1')
+        self.assertEqual(self.info.get(u'name'), u'org')
+        self.assertIn(u'id', self.info)
+        self.assertTrue(self.info)
+        self.fetch.assert_not_called()
+        self.assertFalse(self.info.loaded)
+
+    def test_other_keys(self):
+        """Reading other keys runs info once and replaces create output"""
+        self.assertEqual(self.info[u'label'], u'org_label')
+        self.assertNotIn(u'message', self.info)
+        self.assertEqual(len(self.info), 3)
+        self.fetch.assert_called_once_with()
+        self.assertTrue(self.info.loaded)
+
+    def test_whole_dict_operations(self):
+        """Iterating, comparing and copying use the info output"""
+        self.assertEqual(self.info, self.fetch.return_value)
+        self.assertEqual(
+            sorted(self.info.keys()), [u'id', u'label', u'name'])
+        copied = copy.deepcopy(self.info)
+        self.assertIs(type(copied), dict)
+        self.assertEqual(
+            json.loads(json.dumps(self.info)), self.fetch.return_value)
+        self.fetch.assert_called_once_with()
+
+    def test_empty_info(self):
+        """The create output is kept if info returns nothing"""
+        self.fetch.return_value = {}
+        self.assertEqual(self.info[u'message'], u'Created')
+
+    @mock.patch('robottelo.cli.base.settings')
+    @mock.patch('robottelo.cli.base.Base.info')
+    @mock.patch('robottelo.cli.base.Base.execute')
+    def test_create_lazy_info(self, execute, info, settings):
+        """create defers info when cli_lazy_info is enabled"""
+        class Entity(Base):
+            command_base = 'entity'
+            command_requires_org = True
+
+        settings.cli_lazy_info = True
+        execute.return_value = [{u'id': u'2', u'name': u'entity'}]
+        info.return_value = {u'id': u'2', u'name': u'entity', u'x': u'y'}
+        result = Entity.create({u'organization-id': u'1'})
+        self.assertIsInstance(result, LazyInfo)
+        self.assertEqual(result[u'name'], u'entity')
+        info.assert_not_called()
+        self.assertEqual(result[u'x'], u'y')
+        info.assert_called_once_with(
+            {u'id': u'2', u'organization-id': u'1'})
@@ -0,0 +1,250 @@
+# -*- encoding: utf-8 -*-
+"""Tests for the entities provisioning planner of the CLI factory"""
+import itertools
+import threading
+
+import six
+import unittest2
+
+from robottelo.cli import factory
+from robottelo.cli.base import (
+    cli_backend,
+    CLIReturnCodeError,
+    get_cli_backend,
+)
+from robottelo.cli.factory import (
+    CLIFactoryError,
+    get_pooled_org,
+    make_bulk,
+    make_entities,
+    make_fake_hosts,
+    OrgPool,
+    ref,
+)
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class MakeEntitiesTestCase(unittest2.TestCase):
+    """Tests for :func:`robottelo.cli.factory.make_entities`"""
+
+    def test_propagates_ids(self):
+        """Referenced attributes are replaced by the created values"""
+        calls = {}
+
+        def make(name):
+            def func(options):
+                calls[name] = options
+                return {u'id': name + u'-id', u'name': name}
+            return func
+
+        entities = make_entities({
+            'org': (make('org'), {}),
+            'product': (make('product'), {u'organization-id': ref('org')}),
+            'repo': (make('repo'), {
+                u'product-id': ref('product'),
+                u'organization': ref('org', u'name'),
+                u'ids': [ref('org'), ref('product')],
+            }),
+        })
+        self.assertEqual(sorted(entities), ['org', 'product', 'repo'])
+        self.assertEqual(entities['repo'][u'id'], u'repo-id')
+        self.assertEqual(
+            calls['product'], {u'organization-id': u'org-id'})
+        self.assertEqual(calls['repo'], {
+            u'product-id': u'product-id',
+            u'organization': u'org',
+            u'ids': [u'org-id', u'product-id'],
+        })
+
+    def test_independent_steps_run_concurrently(self):
+        """Steps with no dependency between them run at the same time"""
+        barrier = threading.Event()
+        started = []
+
+        def wait(options):
+            started.append(options[u'name'])
+            if len(started) == 2:
+                barrier.set()
+            if not barrier.wait(5):
+                raise AssertionError('steps did not run concurrently')
+            return {u'id': options[u'name']}
+
+        entities = make_entities({
+            'a': (wait, {u'name': u'a'}),
+            'b': (wait, {u'name': u'b'}),
+        }, workers=2)
+        self.assertEqual(entities['b'], {u'id': u'b'})
+
+    def test_after(self):
+        """Steps wait for the steps listed in ``after``"""
+        order = []
+
+        def step(options):
+            order.append(options[u'name'])
+
+        make_entities({
+            'first': (step, {u'name': u'first'}),
+            'second': (step, {u'name': u'second'}, ['first']),
+        })
+        self.assertEqual(order, [u'first', u'second'])
+
+    def test_uses_caller_backend(self):
+        """Workers use the CLI backend selected by the caller"""
+        with cli_backend('rest'):
+            entities = make_entities({
+                'a': (lambda options: get_cli_backend(), {}),
+            })
+        self.assertEqual(entities['a'], 'rest')
+
+    def test_invalid_plan(self):
+        """Unknown references and cycles are rejected before any call"""
+        with self.assertRaises(CLIFactoryError):
+            make_entities({'a': (dict, {u'id': ref('b')})})
+        with self.assertRaises(CLIFactoryError):
+            make_entities({
+                'a': (dict, {u'id': ref('b')}),
+                'b': (dict, {u'id': ref('a')}),
+            })
+
+    def test_error(self):
+        """A failed step stops the plan and its exception is raised"""
+        calls = []
+
+        def fail(options):
+            raise ValueError('failed')
+
+        def step(options):
+            calls.append(options)
+            return {u'id': u'1'}
+
+        with self.assertRaises(ValueError):
+            make_entities({
+                'org': (fail, {}),
+                'product': (step, {u'organization-id': ref('org')}),
+            })
+        self.assertEqual(calls, [])
+
+
+@mock.patch('robottelo.cli.factory.setup_org_for_a_custom_repo')
+@mock.patch('robottelo.cli.factory.make_org')
+class OrgPoolTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.cli.factory.OrgPool`"""
+
+    def _make_org(self):
+        counter = itertools.count(1)
+        return lambda options=None: {u'id': next(counter)}
+
+    def test_refill(self, make_org, setup_org):
+        """Organizations are created ahead and replaced once handed out"""
+        make_org.side_effect = self._make_org()
+        pool = OrgPool(size=2).start()
+        self.addCleanup(pool.close)
+        first = pool.get(timeout=5)
+        second = pool.get(timeout=5)
+        self.assertEqual({first[u'id'], second[u'id']}, {1, 2})
+        pool.close()
+        self.assertEqual(make_org.call_count, 4)
+        setup_org.assert_not_called()
+
+    def test_custom_repo(self, make_org, setup_org):
+        """Organizations are set up with the custom repository"""
+        make_org.side_effect = self._make_org()
+        setup_org.return_value = {u'repository-id': 5}
+        pool = OrgPool(size=1, custom_repo_url=u'http://repo')
+        self.addCleanup(pool.close)
+        org = pool.get(timeout=5)
+        self.assertEqual(org, {u'id': 1, u'repository-id': 5})
+        setup_org.assert_called_with(
+            {u'url': u'http://repo', u'organization-id': 1})
+
+    def test_error(self, make_org, setup_org):
+        """Creation errors are raised by get and the pool keeps working"""
+        make_org.side_effect = [ValueError('failed'), {u'id': 2}]
+        pool = OrgPool(size=1, workers=1)
+        self.addCleanup(pool.close)
+        with self.assertRaises(ValueError):
+            pool.get(timeout=5)
+        self.assertEqual(pool.get(timeout=5), {u'id': 2})
+
+    def test_on_demand(self, make_org, setup_org):
+        """A pool of size 0 creates each organization when asked"""
+        make_org.side_effect = self._make_org()
+        pool = OrgPool(size=0).start()
+        self.addCleanup(pool.close)
+        make_org.assert_not_called()
+        self.assertEqual(pool.get(), {u'id': 1})
+        self.assertEqual(pool.get(), {u'id': 2})
+        self.assertEqual(make_org.call_count, 2)
+
+    def test_pooled_org_size(self, make_org, setup_org):
+        """The size of the shared pools is read from the environment"""
+        make_org.side_effect = self._make_org()
+        with mock.patch.dict(factory._org_pools, clear=True), \
+                mock.patch.dict(
+                    'os.environ', {factory.ORG_POOL_SIZE_ENV: '0'}):
+            self.assertEqual(get_pooled_org(), {u'id': 1})
+            self.assertEqual(factory._org_pools[(False, None)].size, 0)
+        self.assertEqual(make_org.call_count, 1)
+
+    def test_timeout(self, make_org, setup_org):
+        """get raises when no organization is ready in time"""
+        event = threading.Event()
+        make_org.side_effect = lambda options=None: event.wait(5)
+        pool = OrgPool(size=1)
+        self.addCleanup(pool.close)
+        self.addCleanup(event.set)
+        with self.assertRaises(CLIFactoryError):
+            pool.get(timeout=0.1)
+
+
+class MakeBulkTestCase(unittest2.TestCase):
+    """Tests for :func:`robottelo.cli.factory.make_bulk`"""
+
+    def test_records_and_errors(self):
+        """Records are returned in order and failures recorded"""
+        progress = []
+
+        def factory(options):
+            if options[u'index'] == 2:
+                raise CLIReturnCodeError(1, u'error', u'failed')
+            return {u'id': options[u'index'], u'admin': options[u'admin']}
+
+        def options(index):
+            return {u'index': index, u'admin': u'true'}
+
+        result = make_bulk(
+            factory, 5, options, workers=3,
+            progress=lambda *args: progress.append(args)
+        )
+        self.assertEqual([record[u'id'] for record in result], [0, 1, 3, 4])
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(result.errors[0][:2], (2, options(2)))
+        self.assertEqual(len(progress), 5)
+        self.assertEqual(progress[-1], (4, 1, 5))
+
+    def test_options_copied(self):
+        """Each creation gets its own copy of the options"""
+        def factory(options):
+            options[u'name'] = len(options)
+            return options
+
+        result = make_bulk(factory, 3, {u'organization-id': 1})
+        self.assertEqual(len(result), 3)
+        for record in result:
+            self.assertEqual(record, {u'organization-id': 1, u'name': 1})
+
+    @mock.patch('robottelo.cli.factory.make_host')
+    @mock.patch('robottelo.cli.factory._fake_host_options')
+    def test_make_fake_hosts(self, fake_host_options, make_host):
+        """Fake host defaults are resolved once for all the hosts"""
+        fake_host_options.return_value = {u'organization-id': 1}
+        make_host.__name__ = 'make_host'
+        make_host.side_effect = lambda options: dict(options)
+        result = make_fake_hosts(4)
+        fake_host_options.assert_called_once_with({})
+        self.assertEqual(make_host.call_count, 4)
+        self.assertEqual(result[0], {u'organization-id': 1})
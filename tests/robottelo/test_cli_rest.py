@@ -0,0 +1,202 @@
+# -*- encoding: utf-8 -*-
+"""Tests for the direct API backend of the CLI entity classes"""
+import six
+import unittest2
+
+from robottelo.cli import hammer, rest
+from robottelo.cli.base import (
+    Base,
+    cli_backend,
+    CLIReturnCodeError,
+    get_cli_backend,
+)
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class ForemanEntity(Base):
+    """Entity of the Foreman API"""
+    command_base = 'entity'
+    command_requires_org = False
+    rest_path = 'api/v2/entities'
+    rest_resource = 'entity'
+    rest_options = {
+        u'name': u'name',
+        u'location-ids': u'location_ids',
+    }
+
+
+class KatelloEntity(Base):
+    """Entity of the Katello API"""
+    command_base = 'katello-entity'
+    command_requires_org = False
+    rest_path = 'katello/api/v2/entities'
+    rest_options = {
+        u'name': u'name',
+        u'organization-id': u'organization_id',
+        u'lifecycle-environment-id': u'environment_id',
+    }
+
+
+#: Raw output of hammer ``info`` for an entity
+HAMMER_INFO = [
+    u'Id:          3',
+    u'Name:        a',
+    u'Label:       a',
+    u'Created at:  2017/01/01 00:00:00',
+    u'Locations:',
+    u'    loc',
+    u'Organization: org',
+]
+
+
+def _response(data=None, status_code=200):
+    """Return a mock ``requests.Response``"""
+    response = mock.Mock(status_code=status_code, text=u'')
+    response.ok = status_code < 400
+    response.content = b'' if data is None else b'content'
+    response.json.return_value = data
+    return response
+
+
+class CLIBackendTestCase(unittest2.TestCase):
+    """Tests for the backend selection of the Base cli class"""
+
+    def test_default_backend(self):
+        """hammer is used unless a backend is selected"""
+        self.assertEqual(get_cli_backend(), 'hammer')
+        with cli_backend('rest'):
+            self.assertEqual(get_cli_backend(), 'rest')
+        self.assertEqual(get_cli_backend(), 'hammer')
+
+    @mock.patch('robottelo.cli.base.settings')
+    @mock.patch('robottelo.cli.rest.create')
+    @mock.patch('robottelo.cli.base.Base.execute')
+    def test_create_with_rest_backend(self, execute, create, settings):
+        """Supported options go through the API, the entity information is
+        read with hammer"""
+        settings.cli_lazy_info = False
+        create.return_value = {u'id': u'3', u'name': u'a'}
+        execute.return_value = HAMMER_INFO
+        with cli_backend('rest'):
+            result = ForemanEntity.create({u'name': u'a', u'label': None})
+        self.assertEqual(result, hammer.parse_info(HAMMER_INFO))
+        create.assert_called_once_with(
+            ForemanEntity, {u'name': u'a', u'label': None})
+        execute.assert_called_once_with(
+            command=u'entity info --id="3"', output_format=None)
+
+    @mock.patch('robottelo.cli.base.settings')
+    @mock.patch('robottelo.cli.rest.get_session')
+    @mock.patch('robottelo.cli.rest.settings')
+    @mock.patch('robottelo.cli.base.Base.execute')
+    def test_create_keys_match_hammer(self, execute, rest_settings,
+                                      get_session, settings):
+        """Entities created through the API have the keys of hammer info"""
+        execute.return_value = HAMMER_INFO
+        get_session.return_value.request.return_value = _response({
+            'id': 3,
+            'name': 'a',
+            'organization_id': 1,
+            'locations': [{'id': 2, 'title': 'loc'}],
+        })
+        for lazy_info in (False, True):
+            settings.cli_lazy_info = lazy_info
+            with cli_backend('rest'):
+                entity = ForemanEntity.create({u'name': u'a'})
+            self.assertEqual(entity[u'id'], u'3')
+            self.assertEqual(
+                set(entity), set(hammer.parse_info(HAMMER_INFO)))
+
+    @mock.patch('robottelo.cli.rest.create')
+    @mock.patch('robottelo.cli.base.Base.execute')
+    def test_create_falls_back_to_hammer(self, execute, create):
+        """Options not mapped to the API and the hammer backend use hammer"""
+        execute.return_value = []
+        with cli_backend('rest'):
+            ForemanEntity.create({u'name': u'a', u'organization': u'org'})
+        ForemanEntity.create({u'name': u'a'})
+        self.assertEqual(execute.call_count, 2)
+        create.assert_not_called()
+
+    def test_supports(self):
+        """Entities are updated and deleted by id, read with hammer"""
+        self.assertFalse(rest.supports(Base, {}, 'create'))
+        self.assertFalse(rest.supports(
+            KatelloEntity, {u'organization-id': 1}, 'list'))
+        self.assertFalse(rest.supports(KatelloEntity, {u'id': 1}, 'info'))
+        self.assertFalse(rest.supports(
+            KatelloEntity, {u'name': u'a'}, 'delete'))
+        self.assertTrue(rest.supports(
+            KatelloEntity, {u'id': 1, u'name': u'b'}, 'update'))
+        self.assertFalse(rest.supports(
+            KatelloEntity, {u'id': 1, u'name': u'b'}, 'delete'))
+
+
+@mock.patch('robottelo.cli.rest.settings')
+@mock.patch('robottelo.cli.rest.get_session')
+class RESTBackendTestCase(unittest2.TestCase):
+    """Tests for the API calls of the backend"""
+
+    def test_create_foreman_entity(self, get_session, settings):
+        """Foreman payloads are wrapped, only the id and name returned"""
+        settings.server.get_url.return_value = 'https://example.com'
+        session = get_session.return_value
+        session.request.return_value = _response({
+            'id': 3,
+            'name': 'a',
+            'created_at': '2017-01-01',
+            'locations': [{'id': 2, 'title': 'loc'}],
+        })
+        result = rest.create(
+            ForemanEntity, {u'name': u'a', u'location-ids': u'1, 2'})
+        session.request.assert_called_once_with(
+            'POST', u'https://example.com/api/v2/entities', params=None,
+            json={'entity': {u'name': u'a', u'location_ids': [u'1', u'2']}}
+        )
+        self.assertEqual(result, {u'id': u'3', u'name': u'a'})
+
+    def test_update_katello_entity(self, get_session, settings):
+        """Katello payloads are flat, options renamed and output keys
+        normalized"""
+        settings.server.get_url.return_value = 'https://example.com'
+        session = get_session.return_value
+        session.request.return_value = _response(
+            {'id': 3, 'environment': {'id': 4, 'lifecycle_path': 'a'}})
+        result = rest.update(KatelloEntity, {
+            u'id': 3, u'lifecycle-environment-id': 4})
+        session.request.assert_called_once_with(
+            'PUT', u'https://example.com/katello/api/v2/entities/3',
+            params=None, json={u'environment_id': 4}
+        )
+        self.assertEqual(result, {
+            u'id': u'3',
+            u'environment': {u'id': u'4', u'lifecycle-path': u'a'},
+        })
+
+    @mock.patch('robottelo.cli.rest.time')
+    def test_delete_waits_for_task(self, time, get_session, settings):
+        """Asynchronous tasks are polled until they finish"""
+        time.time.return_value = 0
+        session = get_session.return_value
+        session.request.side_effect = [
+            _response({'id': 'abc', 'state': 'running'}, 202),
+            _response({'id': 'abc', 'state': 'running'}),
+            _response({'id': 'abc', 'state': 'stopped', 'result': 'success'}),
+        ]
+        rest.delete(KatelloEntity, {u'id': 3})
+        self.assertEqual(session.request.call_count, 3)
+        self.assertIn(
+            u'foreman_tasks/api/tasks/abc', session.request.call_args[0][1])
+
+    def test_error(self, get_session, settings):
+        """Failed requests raise as failed hammer commands"""
+        session = get_session.return_value
+        session.request.return_value = _response(
+            {'error': 'Name has already been taken'}, 422)
+        with self.assertRaises(CLIReturnCodeError) as context:
+            rest.create(KatelloEntity, {u'name': u'a'})
+        self.assertEqual(context.exception.return_code, 422)
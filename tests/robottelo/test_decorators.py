@@ -665,12 +665,14 @@ class CacheableTestCase(TestCase):
     """Tests for :func:`robottelo.decorators.cacheable`."""
 
     def setUp(self):
-        self.object_cache_patcher = mock.patch.dict(
-            'robottelo.decorators.OBJECT_CACHE')
+        self.object_cache_patcher = mock.patch(
+            'robottelo.decorators.OBJECT_CACHE', decorators.ObjectCache())
         self.object_cache = self.object_cache_patcher.start()
+        self.calls = []
 
         def make_foo(options):
-            return {'id': 42}
+            self.calls.append(options)
+            return {'id': 42 + len(self.calls), 'name': 'foo'}
 
         self.make_foo = decorators.cacheable(make_foo)
 
@@ -680,21 +682,97 @@ class CacheableTestCase(TestCase):
     def test_build_cache(self):
         """Create a new object and add it to the cache."""
         obj = self.make_foo(cached=True)
-        self.assertEqual(decorators.OBJECT_CACHE, {'foo': {'id': 42}})
-        self.assertEqual(id(decorators.OBJECT_CACHE['foo']), id(obj))
+        self.assertEqual(self.object_cache.get('foo', None), obj)
+        self.assertEqual(
+            id(self.object_cache.get('foo', {})), id(obj))
 
     def test_return_from_cache(self):
         """Return an already cached object."""
         cache_obj = {'id': 42}
-        decorators.OBJECT_CACHE['foo'] = cache_obj
+        self.object_cache.set('foo', None, cache_obj)
         obj = self.make_foo(cached=True)
         self.assertEqual(id(cache_obj), id(obj))
+        self.assertEqual(self.calls, [])
 
     def test_create_and_not_add_to_cache(self):
         """Create a new object and not add it to the cache."""
         self.make_foo(cached=False)
-        self.assertNotIn('foo', decorators.OBJECT_CACHE)
-        self.assertEqual(decorators.OBJECT_CACHE, {})
+        self.assertNotIn(('foo', ()), self.object_cache)
+        self.assertEqual(len(self.object_cache), 0)
+
+    def test_options_key(self):
+        """Objects are cached by options, equivalent options match."""
+        org1 = self.make_foo({'organization-id': 1, 'label': None},
+                             cached=True)
+        org2 = self.make_foo({'organization-id': 2}, cached=True)
+        self.assertNotEqual(org1, org2)
+        self.assertIs(
+            self.make_foo({u'organization-id': u'1'}, cached=True), org1)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(
+            self.object_cache.stats(), {'hits': 1, 'misses': 2, 'size': 2})
+
+    def test_lru_eviction(self):
+        """The least recently used object is evicted first."""
+        self.object_cache_patcher.stop()
+        self.object_cache_patcher = mock.patch(
+            'robottelo.decorators.OBJECT_CACHE', decorators.ObjectCache(2))
+        self.object_cache = self.object_cache_patcher.start()
+        first = self.make_foo({'name': 'a'}, cached=True)
+        self.make_foo({'name': 'b'}, cached=True)
+        self.make_foo({'name': 'a'}, cached=True)
+        self.make_foo({'name': 'c'}, cached=True)
+        self.assertIs(self.make_foo({'name': 'a'}, cached=True), first)
+        self.assertIsNone(self.object_cache.get('foo', {'name': 'b'}))
+
+    def test_ttl(self):
+        """Objects older than the TTL are created again."""
+        now = [0]
+        cache = decorators.ObjectCache(ttl=60, timer=lambda: now[0])
+        with mock.patch('robottelo.decorators.OBJECT_CACHE', cache):
+            first = self.make_foo(cached=True)
+            now[0] = 59
+            self.assertIs(self.make_foo(cached=True), first)
+            now[0] = 61
+            self.assertIsNot(self.make_foo(cached=True), first)
+
+    def test_invalidate(self):
+        """Invalidated objects are created again."""
+        first = self.make_foo({'name': 'a'}, cached=True)
+        self.make_foo({'name': 'b'}, cached=True)
+        self.assertEqual(self.make_foo.invalidate({'name': 'a'}), 1)
+        self.assertIsNot(self.make_foo({'name': 'a'}, cached=True), first)
+        self.assertEqual(self.make_foo.invalidate(), 2)
+        self.assertEqual(len(self.object_cache), 0)
+
+    def test_invalidate_cached(self):
+        """Deleted or updated entities are dropped by id or name."""
+        obj = self.make_foo(cached=True)
+        self.assertEqual(decorators.invalidate_cached(entity_id=1), 0)
+        self.assertEqual(decorators.invalidate_cached(), 0)
+        self.assertEqual(
+            decorators.invalidate_cached(entity_id=str(obj['id'])), 1)
+        self.make_foo(cached=True)
+        self.assertEqual(decorators.invalidate_cached(entity_name='foo'), 1)
+
+    def test_invalidate_lazy_info(self):
+        """Lazy entities are matched without running ``info``."""
+        from robottelo.cli.base import LazyInfo
+        fetch = mock.Mock(return_value={u'id': u'7', u'name': u'bar'})
+        self.object_cache.set(
+            'foo', None, LazyInfo({u'id': u'7', u'name': u'bar'}, fetch))
+        self.assertEqual(decorators.invalidate_cached(entity_id=8), 0)
+        self.assertEqual(decorators.invalidate_cached(entity_name='baz'), 0)
+        self.assertEqual(decorators.invalidate_cached(entity_name='bar'), 1)
+        self.assertFalse(fetch.called)
+
+    @mock.patch('robottelo.cli.base.Base.execute')
+    def test_cli_delete_invalidates(self, execute):
+        """Deleting an entity with the CLI drops it from the cache."""
+        from robottelo.cli.base import Base
+        obj = self.make_foo(cached=True)
+        Base.delete({'id': obj['id']})
+        self.assertEqual(len(self.object_cache), 0)
 
 
 class RmBugIsOpenTestCase(TestCase):
@@ -38,6 +38,29 @@ class ParseCSVTestCase(unittest2.TestCase):
             ]
         )
 
+    def test_parse_csv_text(self):
+        """The whole output can be parsed without splitting it in lines"""
+        output = u'Id,Name,Description\n1,host1,"first\nline"\n\n2,host2,\n'
+        expected = [
+            {u'id': u'1', u'name': u'host1', u'description': u'first\nline'},
+            {u'id': u'2', u'name': u'host2', u'description': u''},
+        ]
+        self.assertEqual(hammer.parse_csv(output), expected)
+        self.assertEqual(hammer.parse_csv(output.split(u'\n')), expected)
+
+    def test_iter_csv(self):
+        """Rows are yielded one by one and share their keys"""
+        rows = hammer.iter_csv([u'Host Name', u'host1', u'host2'])
+        first = next(rows)
+        second = next(rows)
+        self.assertEqual(first, {u'host-name': u'host1'})
+        self.assertIs(list(first)[0], list(second)[0])
+        self.assertEqual(list(rows), [])
+
+    def test_parse_csv_empty(self):
+        """Parsing an output without header returns no rows"""
+        self.assertEqual(hammer.parse_csv(u''), [])
+
 
 class ParseJSONTestCase(unittest2.TestCase):
     """Tests for parsing JSON hammer output"""
@@ -401,3 +424,11 @@ class ParseInfoTestCase(unittest2.TestCase):
             hammer.parse_json('["item1", "item2"]'),
             ['item1', 'item2']
         )
+
+    def test_parse_json_nested_values(self):
+        """Keys are normalized and integers converted at any depth"""
+        self.assertEqual(
+            hammer.parse_json(
+                '[{"Sub Item": {"Count": 1, "Enabled": true, "Size": 1.5}}]'),
+            [{u'sub-item': {u'count': u'1', u'enabled': True, u'size': 1.5}}]
+        )
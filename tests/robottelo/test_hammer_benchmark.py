@@ -0,0 +1,126 @@
+# -*- encoding: utf-8 -*-
+"""Benchmarks for the hammer output parsers.
+
+The outputs are built from rows recorded from ``hammer --output csv`` and
+``--output json`` list commands, repeated to the size of a
+``list --per-page 10000`` call. Run them with `pytest-benchmark`_::
+
+    py.test tests/robottelo/test_hammer_benchmark.py --benchmark-autosave
+
+and compare a change against the saved run to catch regressions::
+
+    py.test tests/robottelo/test_hammer_benchmark.py \\
+        --benchmark-compare --benchmark-compare-fail=mean:10%
+
+The module is skipped when ``pytest-benchmark`` is not installed.
+
+.. _pytest-benchmark: https://pypi.python.org/pypi/pytest-benchmark
+
+"""
+import json
+
+import pytest
+
+from robottelo import ssh
+from robottelo.cli import hammer
+
+pytest.importorskip('pytest_benchmark')
+
+ROWS = 10000
+
+HOSTS_CSV_HEADER = (
+    u'Id,Name,Operating System,Host Group,IP,MAC,Content View,'
+    u'Lifecycle Environment'
+)
+HOSTS_CSV_ROW = (
+    u'{0},host{0}.example.com,RedHat 7.3,,192.168.{1}.{2},'
+    u'52:54:00:{3:02x}:{4:02x}:01,Default Organization View,Library'
+)
+ERRATA_CSV_HEADER = u'ID,Errata ID,Type,Title,Installable'
+ERRATA_CSV_ROW = (
+    u'{0},RHSA-2017:{0:04d},security,'
+    u'"Important: kernel security, bug fix, and enhancement update",true'
+)
+PACKAGES_JSON_ROW = {
+    u'ID': 0,
+    u'Filename': u'bear-4.1-1.noarch.rpm',
+    u'Source RPM': u'bear-4.1-1.src.rpm',
+    u'Checksum': u'd7d09a4d6bbd9fbc6a8e0c3c1d6b4e4b',
+    u'Repositories': [{u'ID': 1, u'Name': u'zoo'}],
+}
+
+
+def _hosts_csv():
+    return u'\n'.join(
+        [HOSTS_CSV_HEADER] + [
+            HOSTS_CSV_ROW.format(i, i // 256 % 256, i % 256, i // 256, i % 256)
+            for i in range(ROWS)
+        ]
+    ) + u'\n'
+
+
+def _errata_csv():
+    return u'\n'.join(
+        [ERRATA_CSV_HEADER] + [ERRATA_CSV_ROW.format(i) for i in range(ROWS)]
+    ) + u'\n'
+
+
+def _packages_json():
+    rows = []
+    for i in range(ROWS):
+        row = dict(PACKAGES_JSON_ROW)
+        row[u'ID'] = i
+        rows.append(row)
+    return json.dumps(rows)
+
+
+@pytest.fixture(scope='module')
+def hosts_csv():
+    return _hosts_csv()
+
+
+@pytest.fixture(scope='module')
+def errata_csv():
+    return _errata_csv()
+
+
+@pytest.fixture(scope='module')
+def packages_json():
+    return _packages_json()
+
+
+def test_parse_csv_text(benchmark, hosts_csv):
+    """Parse a host list from the whole output text"""
+    rows = benchmark(hammer.parse_csv, hosts_csv)
+    assert len(rows) == ROWS
+    assert rows[-1][u'lifecycle-environment'] == u'Library'
+
+
+def test_parse_csv_lines(benchmark, errata_csv):
+    """Parse an errata list from output lines"""
+    lines = errata_csv.split(u'\n')
+    rows = benchmark(hammer.parse_csv, lines)
+    assert len(rows) == ROWS
+    assert rows[0][u'errata-id'] == u'RHSA-2017:0000'
+
+
+def test_iter_csv_first_row(benchmark, hosts_csv):
+    """Reading the first row does not parse the whole output"""
+    row = benchmark(lambda: next(hammer.iter_csv(hosts_csv)))
+    assert row[u'id'] == u'0'
+
+
+def test_parse_json(benchmark, packages_json):
+    """Parse a package list"""
+    rows = benchmark(hammer.parse_json, packages_json)
+    assert len(rows) == ROWS
+    assert rows[-1][u'repositories'][0][u'id'] == u'1'
+
+
+def test_build_result_csv(benchmark, hosts_csv):
+    """Clean up and parse the raw output of a hammer csv command"""
+    stdout = (
+        u'[ INFO 2017-01-01 10:00:00 API] GET /api/hosts\n' + hosts_csv
+    ).encode('utf-8')
+    result = benchmark(ssh._build_result, stdout, b'', 0, 'csv')
+    assert len(result.stdout) == ROWS
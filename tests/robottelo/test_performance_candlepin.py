@@ -0,0 +1,77 @@
+"""Tests for :mod:`robottelo.performance.candlepin`."""
+import six
+import unittest2
+
+from robottelo.performance import candlepin
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+def _response(data=None, status_code=200):
+    """Return a mock ``requests.Response``"""
+    response = mock.Mock(status_code=status_code, text=u'')
+    response.ok = status_code < 400
+    response.json.return_value = data
+    return response
+
+
+@mock.patch('robottelo.performance.candlepin.settings')
+@mock.patch('robottelo.performance.candlepin.rest.get_session')
+class ConsumerLoadGeneratorTestCase(unittest2.TestCase):
+    """Tests for :class:`ConsumerLoadGenerator`."""
+
+    def test_register(self, get_session, settings):
+        """Consumers register with facts and an activation key"""
+        settings.server.get_url.return_value = 'https://example.com'
+        session = get_session.return_value
+        session.request.side_effect = [
+            _response({'uuid': 'uuid-{0}'.format(i)}) for i in range(4)]
+        consumers = [candlepin.VirtualConsumer() for _ in range(4)]
+        generator = candlepin.ConsumerLoadGenerator('org', 'ak-1')
+        time_result_dict = generator.register(consumers, num_threads=2)
+        self.assertEqual(sorted(time_result_dict), ['thread-0', 'thread-1'])
+        self.assertEqual(
+            [len(times) for times in time_result_dict.values()], [2, 2])
+        self.assertEqual(
+            sorted(consumer.uuid for consumer in consumers),
+            ['uuid-0', 'uuid-1', 'uuid-2', 'uuid-3']
+        )
+        args, kwargs = session.request.call_args
+        self.assertEqual(
+            args, ('POST', 'https://example.com/rhsm/consumers'))
+        self.assertEqual(
+            kwargs['params'], {'owner': 'org', 'activation_keys': 'ak-1'})
+        self.assertIn(kwargs['json']['name'], [c.name for c in consumers])
+        self.assertIn('dmi.system.uuid', kwargs['json']['facts'])
+
+    def test_failures(self, get_session, settings):
+        """Failed requests are counted and not timed"""
+        settings.server.get_url.return_value = 'https://example.com'
+        session = get_session.return_value
+        session.request.return_value = _response(status_code=500)
+        consumer = candlepin.VirtualConsumer()
+        consumer.uuid = 'uuid'
+        generator = candlepin.ConsumerLoadGenerator('org')
+        time_result_dict = generator.attach([consumer], 'pool', 1)
+        self.assertEqual(time_result_dict, {'thread-0': []})
+        self.assertEqual(generator.errors, {'attach': 1})
+        self.assertEqual(
+            session.request.call_args[0][1],
+            'https://example.com/rhsm/consumers/uuid/entitlements'
+        )
+
+    def test_delete(self, get_session, settings):
+        """Only registered consumers are deleted"""
+        settings.server.get_url.return_value = 'https://example.com'
+        session = get_session.return_value
+        session.request.return_value = _response()
+        registered = candlepin.VirtualConsumer()
+        registered.uuid = 'uuid'
+        generator = candlepin.ConsumerLoadGenerator('org')
+        generator.delete([registered, candlepin.VirtualConsumer()], 2)
+        session.request.assert_called_once_with(
+            'DELETE', 'https://example.com/rhsm/consumers/uuid')
+        self.assertIsNone(registered.uuid)
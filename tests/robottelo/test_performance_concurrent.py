@@ -0,0 +1,55 @@
+"""Tests for :class:`robottelo.test.ConcurrentTestCase`."""
+import random
+
+import six
+import unittest2
+
+from robottelo.performance import stat
+from robottelo.performance.stat import time_result_stats
+from robottelo.test import ConcurrentTestCase
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class ConcurrentParametersTestCase(unittest2.TestCase):
+    """Tests for the iterations and buckets of concurrent test cases."""
+
+    def setUp(self):
+        # the class set up reads the configuration and the server
+        self.case = ConcurrentTestCase('setUp')
+        self.case.num_buckets = 10
+
+    def test_uneven_split(self):
+        """Iterations and buckets are integers when not divisible"""
+        self.case._set_num_iterations(5000, 6)
+        self.case._set_bucket_size()
+        self.assertEqual(self.case.num_iterations, 833)
+        self.assertEqual(self.case.bucket_size, 83)
+        rand = random.Random(42)
+        time_result_dict = {
+            'thread-{0}'.format(client): [
+                rand.lognormvariate(0, 1)
+                for _ in range(self.case.num_iterations)
+            ]
+            for client in range(6)
+        }
+        stats = time_result_stats(
+            time_result_dict, self.case.bucket_size, self.case.num_buckets)
+        self.assertEqual(len(stats['per_client_bucketized'][0]), 10)
+        with mock.patch.object(stat, 'numpy', None):
+            stats = time_result_stats(
+                time_result_dict,
+                self.case.bucket_size,
+                self.case.num_buckets
+            )
+        self.assertEqual(len(stats['per_client_bucketized'][0]), 10)
+
+    def test_small_split(self):
+        """Buckets hold at least one iteration"""
+        self.case._set_num_iterations(5, 2)
+        self.case._set_bucket_size()
+        self.assertEqual(self.case.num_iterations, 2)
+        self.assertEqual(self.case.bucket_size, 1)
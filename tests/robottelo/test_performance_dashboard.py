@@ -0,0 +1,63 @@
+"""Tests for :mod:`robottelo.performance.dashboard`."""
+import io
+import os
+import shutil
+import tempfile
+
+import unittest2
+from click.testing import CliRunner
+
+from robottelo.commands import perf
+from robottelo.performance.dashboard import render_dashboard, write_dashboard
+from robottelo.performance.process import TimedList
+from robottelo.performance.results import ResultsStore
+
+
+class DashboardTestCase(unittest2.TestCase):
+    """Tests for :func:`render_dashboard` and :func:`write_dashboard`."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.path = os.path.join(self.tmpdir, 'results.sqlite')
+        self.store = ResultsStore(self.path)
+        time_result_dict = {
+            'thread-0': TimedList(), 'thread-1': TimedList()}
+        for thread_name, latency, ended in (
+                ('thread-0', 1.0, 101.0), ('thread-1', 3.0, 103.0),
+                ('thread-0', 2.0, 103.0), ('thread-1', 4.0, 107.0)):
+            time_result_dict[thread_name].append(latency, ended)
+        self.store.add_samples('run-1', 'perf-raw-<ak>', 2, time_result_dict)
+        self.store.add_samples('run-1', 'perf-raw-delete', 1,
+                               {'thread-0': [0.5]})
+        self.store.add_resources('run-1', [(102.0, 'tomcat', 'cpu', 80.0)])
+
+    def test_render_dashboard(self):
+        """Every test case is summarized and charted"""
+        page = render_dashboard(self.store, 'run-1', refresh=10)
+        self.assertIn(u'<meta http-equiv="refresh" content="10">', page)
+        self.assertIn(
+            u'<tr><td>perf-raw-&lt;ak&gt;</td><td>2</td><td>4</td>', page)
+        self.assertIn(u'<td>perf-raw-delete</td><td>1</td><td>1</td>', page)
+        # the envelope of both test cases and the resources of the first
+        self.assertEqual(page.count(u'<svg'), 3)
+        self.assertIn(u'tomcat cpu', page)
+        self.assertNotIn(
+            u'http-equiv', render_dashboard(self.store, 'run-1', refresh=0))
+        self.assertNotIn(u'<svg', render_dashboard(self.store, 'run-2'))
+
+    def test_write_dashboard(self):
+        """The page is written with the manage command too"""
+        filename = os.path.join(self.tmpdir, 'dashboard.html')
+        write_dashboard(self.store, 'run-1', filename)
+        with io.open(filename, encoding='utf-8') as handler:
+            self.assertIn(u'Performance run run-1', handler.read())
+        self.assertFalse(os.path.exists(filename + '.tmp'))
+        os.remove(filename)
+        result = CliRunner().invoke(
+            perf.dashboard,
+            ['--db', self.path, '--output', filename, 'run-1']
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        with io.open(filename, encoding='utf-8') as handler:
+            self.assertNotIn(u'http-equiv', handler.read())
@@ -0,0 +1,86 @@
+"""Tests for :mod:`robottelo.performance.graph`."""
+import os
+import shutil
+import tempfile
+
+import pygal
+import unittest2
+
+from robottelo.performance.graph import (
+    generate_line_chart_raw,
+    StreamingEnvelope,
+)
+
+
+class StreamingEnvelopeTestCase(unittest2.TestCase):
+    """Tests for :class:`StreamingEnvelope`."""
+
+    def test_record(self):
+        """Windows double in size once all the points are used"""
+        envelope = StreamingEnvelope(max_points=4)
+        for iteration in range(1, 10):
+            envelope.record([iteration, 10 * iteration])
+        self.assertEqual(envelope.window, 4)
+        self.assertEqual(envelope.labels(), ['1-4', '5-8', '9-9'])
+        series = dict(envelope.series())
+        self.assertEqual(sorted(series), ['95%', 'max', 'median', 'min'])
+        self.assertEqual(series['min'], [1, 5, 9])
+        self.assertEqual(series['max'], [40, 80, 90])
+        self.assertEqual(
+            [histogram.count for histogram in envelope.histograms],
+            [8, 8, 2]
+        )
+
+    def test_record_many(self):
+        """Clients are recorded iteration by iteration"""
+        envelope = StreamingEnvelope(max_points=2)
+        envelope.record_many({
+            'thread-0': [1.0, 2.0, 3.0],
+            'thread-1': [4.0, 5.0],
+        })
+        self.assertEqual(envelope.iterations, 3)
+        self.assertEqual(envelope.labels(), ['1-2', '3-3'])
+        series = dict(envelope.series())
+        self.assertEqual(series['min'], [1.0, 3.0])
+        self.assertEqual(series['max'], [5.0, 3.0])
+
+
+class GenerateLineChartRawTestCase(unittest2.TestCase):
+    """Tests for :func:`generate_line_chart_raw`."""
+
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.filename = os.path.join(tmpdir, 'raw.svg')
+
+    def test_downsampled(self):
+        """Long runs are drawn as an envelope of a bounded size"""
+        time_result_dict = {
+            'thread-{0}'.format(thread): [
+                1.0 + (iteration % 7) / 10.0 for iteration in range(5000)]
+            for thread in range(4)
+        }
+        line_chart = pygal.Line(show_dots=False)
+        generate_line_chart_raw(
+            time_result_dict, 'raw', self.filename, line_chart)
+        self.assertEqual(
+            [config['title'] for _, config in line_chart.raw_series],
+            ['min', 'median', '95%', 'max']
+        )
+        self.assertLessEqual(len(line_chart.x_labels), 200)
+        self.assertLess(os.path.getsize(self.filename), 200000)
+
+    def test_raw(self):
+        """Short runs are drawn one line per client"""
+        line_chart = pygal.Line()
+        generate_line_chart_raw(
+            {'thread-0': [1.0, 2.0], 'thread-1': [3.0, 4.0]},
+            'raw',
+            self.filename,
+            line_chart
+        )
+        self.assertEqual(
+            [config['title'] for _, config in line_chart.raw_series],
+            ['client-0', 'client-1']
+        )
+        self.assertEqual(line_chart.x_labels, ['1', '2'])
@@ -0,0 +1,116 @@
+"""Tests for :mod:`robottelo.performance.process`."""
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import unittest2
+
+from robottelo import ssh
+from robottelo.performance.process import (
+    ProcessDriver,
+    run_clients,
+    TimedList,
+)
+
+
+class ClientThread(threading.Thread):
+    """A client recording its index and process as timings"""
+    def __init__(self, thread_id, thread_name, result_dicts):
+        super(ClientThread, self).__init__()
+        self.thread_id = thread_id
+        self.thread_name = thread_name
+        self.result_dicts = result_dicts
+
+    def run(self):
+        for iteration in range(3):
+            self.result_dicts['time'][self.thread_name].append(
+                self.thread_id * 10 + iteration)
+        self.result_dicts['pid'][self.thread_name].append(os.getpid())
+
+
+def make_failing_thread(thread_id, thread_name, result_dicts):
+    """Fail to create the thread of the client 1"""
+    if thread_id == 1:
+        raise ValueError('no vm for client 1')
+    return ClientThread(thread_id, thread_name, result_dicts)
+
+
+class ProcessDriverTestCase(unittest2.TestCase):
+    """Tests for :class:`ProcessDriver` and :func:`run_clients`."""
+
+    expected = {
+        'thread-{0}'.format(index): [index * 10 + i for i in range(3)]
+        for index in range(5)
+    }
+
+    def assertEnded(self, results, before):
+        """Timings are appended with the time they ended"""
+        for time_list in results['time'].values():
+            self.assertIsInstance(time_list, TimedList)
+            self.assertEqual(len(time_list.ended), len(time_list))
+            self.assertEqual(time_list.ended, sorted(time_list.ended))
+            self.assertLessEqual(before, time_list.ended[0])
+            self.assertLessEqual(time_list.ended[-1], time.time())
+
+    def test_timed_list(self):
+        """End times are recorded on append"""
+        time_list = TimedList([1.0])
+        time_list.append(2.0, ended=10.0)
+        self.assertEqual(time_list, [1.0, 2.0])
+        self.assertEqual(time_list.ended, [None, 10.0])
+
+    @unittest2.skipIf(
+        sys.version_info < (3, 4), 'start methods need Python 3.4 or later')
+    def test_spawn_start_method(self):
+        """Workers are forked when the default start method is spawn"""
+        start_method = multiprocessing.get_start_method()
+        multiprocessing.set_start_method('spawn', force=True)
+        self.addCleanup(
+            multiprocessing.set_start_method, start_method, force=True)
+        results = run_clients(
+            lambda *args: ClientThread(*args), 5,
+            result_names=('time', 'pid'), processes=2)
+        self.assertEqual(results['time'], self.expected)
+
+    def test_shards(self):
+        """Clients are dealt to the workers in turn"""
+        self.assertEqual(
+            ProcessDriver(ClientThread, 5, processes=2).shards(),
+            [[0, 2, 4], [1, 3]]
+        )
+        self.assertEqual(
+            ProcessDriver(ClientThread, 2, processes=4).shards(), [[0], [1]])
+
+    def test_run_in_processes(self):
+        """Timings of all the workers are merged"""
+        pool = ssh.get_pool()
+        before = time.time()
+        results = run_clients(
+            ClientThread, 5, result_names=('time', 'pid'), processes=2)
+        self.assertEqual(results['time'], self.expected)
+        self.assertEnded(results, before)
+        pids = set(pid for pids in results['pid'].values() for pid in pids)
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(os.getpid(), pids)
+        # only the workers use a new pool
+        self.assertIs(ssh.get_pool(), pool)
+
+    def test_run_in_threads(self):
+        """Clients run in this process without worker processes"""
+        before = time.time()
+        results = run_clients(ClientThread, 5, result_names=('time', 'pid'))
+        self.assertEqual(results['time'], self.expected)
+        self.assertEnded(results, before)
+        self.assertEqual(
+            set(pid for pids in results['pid'].values() for pid in pids),
+            set([os.getpid()])
+        )
+
+    def test_worker_error(self):
+        """Failed workers are reported once all the workers are done"""
+        with self.assertRaisesRegex(RuntimeError, 'no vm for client 1'):
+            run_clients(
+                make_failing_thread, 4, result_names=('time', 'pid'),
+                processes=2)
@@ -0,0 +1,105 @@
+"""Tests for :mod:`robottelo.performance.pulp`."""
+import datetime
+import itertools
+
+import six
+import unittest2
+
+from robottelo.cli.base import CLIReturnCodeError
+from robottelo.performance import pulp
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+def _task_row(task_id, state, result=u'pending', started=u'', ended=u''):
+    return {
+        u'id': task_id,
+        u'state': state,
+        u'result': result,
+        u'started-at': started,
+        u'ended-at': ended,
+        u'task-errors': u'',
+    }
+
+
+class ParseTaskTimeTestCase(unittest2.TestCase):
+    """Tests for :func:`robottelo.performance.pulp.parse_task_time`."""
+
+    def test_formats(self):
+        """hammer and API timestamps are understood"""
+        expected = datetime.datetime(2017, 6, 1, 10, 0, 5)
+        for value in (u'2017/06/01 10:00:05', u'2017-06-01 10:00:05 UTC',
+                      u'2017-06-01T10:00:05.000Z'):
+            self.assertEqual(pulp.parse_task_time(value), expected)
+        self.assertIsNone(pulp.parse_task_time(u''))
+        self.assertIsNone(pulp.parse_task_time(u'yesterday'))
+
+
+@mock.patch('robottelo.performance.pulp.time.sleep')
+@mock.patch('robottelo.performance.pulp.Task.list')
+@mock.patch('robottelo.performance.pulp.Repository.synchronize')
+class SyncDriverTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.performance.pulp.SyncDriver`."""
+
+    def test_run(self, synchronize, task_list, sleep):
+        """Syncs are submitted asynchronously and polled together"""
+        synchronize.side_effect = lambda options: [
+            {u'id': u'task-{0}'.format(options['id'])}]
+        task_list.side_effect = [
+            [_task_row(u'task-1', u'running'),
+             _task_row(u'task-2', u'stopped', u'success',
+                       u'2017/06/01 10:00:00', u'2017/06/01 10:00:30')],
+            [_task_row(u'task-1', u'stopped', u'error',
+                       u'2017/06/01 10:00:00', u'2017/06/01 10:01:00')],
+        ]
+        tasks = pulp.SyncDriver(poll_batch=10).run(['1', '2'])
+        synchronize.assert_any_call({'id': '1', 'async': True})
+        self.assertEqual(task_list.call_count, 2)
+        self.assertEqual(
+            task_list.call_args_list[0][0][0],
+            {'search': 'id ^ (task-1, task-2)'}
+        )
+        self.assertEqual([task.task_id for task in tasks],
+                         [u'task-1', u'task-2'])
+        self.assertFalse(tasks[0].succeeded)
+        self.assertEqual(tasks[0].duration, 60)
+        self.assertTrue(tasks[1].succeeded)
+        self.assertEqual(tasks[1].duration, 30)
+
+    def test_max_in_flight(self, synchronize, task_list, sleep):
+        """No more than max_in_flight syncs run at once"""
+        synchronize.side_effect = lambda options: [
+            {u'id': u'task-{0}'.format(options['id'])}]
+        task_list.side_effect = lambda options: [
+            _task_row(task_id, u'stopped', u'success')
+            for task_id in options['search'][6:-1].split(', ')
+        ]
+        tasks = pulp.SyncDriver(max_in_flight=2).run(
+            {'repo1': '1', 'repo2': '2', 'repo3': '3'})
+        self.assertEqual(len(tasks), 3)
+        self.assertEqual(
+            [call[0][0]['search'].count(',') for call in
+             task_list.call_args_list],
+            [1, 0]
+        )
+
+    def test_submission_error(self, synchronize, task_list, sleep):
+        """Failed submissions are recorded and not polled"""
+        synchronize.side_effect = CLIReturnCodeError(1, u'error', u'failed')
+        tasks = pulp.SyncDriver().run(['1'])
+        self.assertIsNone(tasks[0].task_id)
+        self.assertTrue(tasks[0].finished)
+        self.assertIsNotNone(tasks[0].error)
+        task_list.assert_not_called()
+
+    @mock.patch('robottelo.performance.pulp.time.time')
+    def test_timeout(self, time, synchronize, task_list, sleep):
+        """Syncs still running after the timeout raise"""
+        time.side_effect = itertools.count(0, 10)
+        synchronize.return_value = [{u'id': u'task-1'}]
+        task_list.return_value = [_task_row(u'task-1', u'running')]
+        with self.assertRaises(RuntimeError):
+            pulp.SyncDriver(timeout=5).run(['1'])
@@ -0,0 +1,161 @@
+"""Tests for :mod:`robottelo.performance.results`."""
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+
+import unittest2
+from click.testing import CliRunner
+
+from robottelo.commands import perf
+from robottelo.performance.process import TimedList
+from robottelo.performance.results import (
+    compare_runs,
+    mann_whitney_u,
+    ResultsStore,
+)
+
+
+def _time_result_dict(rand, clients, iterations, scale=1.0):
+    """Return random timings of clients"""
+    return {
+        'thread-{0}'.format(client): [
+            rand.lognormvariate(0, 0.2) * scale for _ in range(iterations)]
+        for client in range(clients)
+    }
+
+
+class ResultsStoreTestCase(unittest2.TestCase):
+    """Tests for :class:`ResultsStore` and :func:`compare_runs`."""
+
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.path = os.path.join(tmpdir, 'results.sqlite')
+        self.store = ResultsStore(self.path)
+        self.rand = random.Random(42)
+
+    def test_samples(self):
+        """Samples are read back by test case and number of threads"""
+        time_result_dict = {'thread-0': [1.0, 2.0], 'thread-1': [3.0]}
+        self.assertEqual(self.store.add_samples(
+            'run-1', 'ak', 2, time_result_dict, sat_version='6.2.9'), 3)
+        self.store.add_samples('run-1', 'del', 1, {'thread-0': [4.0]})
+        self.store.add_samples('run-2', 'ak', 2, time_result_dict)
+        self.assertEqual(
+            self.store.samples('run-1'),
+            {('ak', 2): [[1.0, 2.0], [3.0]], ('del', 1): [[4.0]]}
+        )
+        self.assertEqual(
+            list(self.store.samples('run-1', test_case='del', threads=1)),
+            [('del', 1)]
+        )
+        self.assertEqual(
+            [(run, version) for run, version, _ in self.store.runs()],
+            [('run-1', '6.2.9'), ('run-2', None)]
+        )
+
+    def test_timeline_resources(self):
+        """Samples are put on the timeline of resource usage samples"""
+        ak_0 = TimedList()
+        ak_0.append(1.0, ended=106.0)
+        ak_0.append(2.0, ended=101.0)
+        ak_1 = TimedList()
+        ak_1.append(1.5, ended=103.5)
+        self.store.add_samples(
+            'run-1', 'ak', 2, {'thread-0': ak_0, 'thread-1': ak_1})
+        self.store.add_samples('run-1', 'del', 1, {'thread-0': [4.0]})
+        self.assertEqual(
+            self.store.timeline('run-1', 'ak', 2),
+            [(101.0, 0, 2.0), (103.5, 1, 1.5), (106.0, 0, 1.0)]
+        )
+        self.assertEqual(
+            self.store.samples('run-1', 'ak'),
+            {('ak', 2): [[1.0, 2.0], [1.5]]}
+        )
+        self.assertEqual(self.store.timeline('run-1', 'del', 1), [])
+        self.assertEqual(self.store.add_resources('run-1', [
+            (100.0, 'system', 'cpu', 10.0),
+            (105.0, 'system', 'cpu', 50.0),
+            (105.0, 'tomcat', 'rss', 512.0),
+        ]), 3)
+        self.assertEqual(self.store.resources('run-1'), {
+            ('system', 'cpu'): [(100.0, 10.0), (105.0, 50.0)],
+            ('tomcat', 'rss'): [(105.0, 512.0)],
+        })
+        self.assertEqual(
+            self.store.resources('run-1', start=101.0, end=103.0), {})
+        self.assertEqual(self.store.resources('run-2'), {})
+
+    def test_old_store(self):
+        """Stores recorded without the end times are upgraded"""
+        connection = sqlite3.connect(self.path)
+        connection.execute(
+            'CREATE TABLE samples (run TEXT, test_case TEXT, threads INTEGER, '
+            'client INTEGER, iteration INTEGER, latency REAL)')
+        connection.execute(
+            "INSERT INTO samples VALUES ('run-1', 'ak', 1, 0, 0, 1.0)")
+        connection.commit()
+        connection.close()
+        time_list = TimedList()
+        time_list.append(2.0, ended=10.0)
+        self.store.add_samples('run-1', 'ak', 1, {'thread-0': time_list})
+        self.assertEqual(
+            self.store.samples('run-1'), {('ak', 1): [[1.0, 2.0]]})
+        self.assertEqual(
+            self.store.timeline('run-1', 'ak', 1), [(10.0, 0, 2.0)])
+
+    def test_mann_whitney_u(self):
+        """The p-value is small only for shifted samples"""
+        first = [self.rand.gauss(0, 1) for _ in range(200)]
+        second = [self.rand.gauss(0, 1) for _ in range(200)]
+        self.assertGreater(mann_whitney_u(first, second)[1], 0.01)
+        shifted = [value + 1 for value in second]
+        self.assertLess(mann_whitney_u(first, shifted)[1], 1e-6)
+        self.assertEqual(mann_whitney_u([1, 1], [1, 1]), (2.0, 1.0))
+        self.assertEqual(mann_whitney_u([], [1]), (None, 1.0))
+
+    def test_compare_runs(self):
+        """Slower runs are flagged as latency and throughput regressions"""
+        self.store.add_samples(
+            'base', 'ak', 4, _time_result_dict(self.rand, 4, 100))
+        self.store.add_samples(
+            'same', 'ak', 4, _time_result_dict(self.rand, 4, 100))
+        self.store.add_samples(
+            'slow', 'ak', 4, _time_result_dict(self.rand, 4, 100, 1.3))
+        same = compare_runs(self.store, 'base', 'same')
+        self.assertEqual(
+            [comparison.metric for comparison in same],
+            ['latency', 'throughput']
+        )
+        self.assertFalse(any(comparison.regressed for comparison in same))
+        slow = compare_runs(self.store, 'base', 'slow')
+        self.assertTrue(slow[0].regressed)
+        self.assertGreater(slow[0].change, 0.2)
+        self.assertTrue(slow[1].regressed)
+        self.assertLess(slow[1].change, -0.2)
+        faster = compare_runs(self.store, 'slow', 'base')
+        self.assertTrue(all(comparison.improved for comparison in faster))
+
+    def test_compare_command(self):
+        """The command exits with an error status on regressions"""
+        self.store.add_samples(
+            'base', 'ak', 4, _time_result_dict(self.rand, 4, 100))
+        self.store.add_samples(
+            'slow', 'ak', 4, _time_result_dict(self.rand, 4, 100, 1.3))
+        runner = CliRunner()
+        result = runner.invoke(
+            perf.compare, ['--db', self.path, 'slow', 'base'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('improved', result.output)
+        result = runner.invoke(
+            perf.compare, ['--db', self.path, 'base', 'slow'])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('REGRESSED', result.output)
+        result = runner.invoke(
+            perf.compare, ['--db', self.path, 'base', 'unknown'])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('No test case found', result.output)
+        result = runner.invoke(perf.runs, ['--db', self.path])
+        self.assertIn('slow', result.output)
@@ -0,0 +1,114 @@
+"""Tests for :mod:`robottelo.performance.sampler`."""
+import six
+import unittest2
+
+from robottelo.performance.sampler import ResourceSampler, sampler_script
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+def _process(service, pid, cpu, rss, read, write):
+    """Return the line printed for a process of a service"""
+    stat = ['0'] * 40
+    stat[11] = str(cpu)
+    stat[21] = str(rss)
+    return u'P {0} {1} {2} {3} {4}'.format(
+        service, pid, read, write, u' '.join(stat))
+
+
+def _frame(cpu, idle, processes):
+    """Return the lines of a frame"""
+    return [
+        u'L 1.50 1.00 0.50 2/300 1234',
+        u'C {0} 0 {0} {1} 100 0 0 0 0 0'.format(cpu, idle),
+        u'M MemTotal: 4194304',
+        u'M MemAvailable: 1048576',
+    ] + processes
+
+
+class SamplerScriptTestCase(unittest2.TestCase):
+    """Tests for :func:`sampler_script`."""
+
+    def test_sampler_script(self):
+        """Processes of each service are found by cgroup or command line"""
+        script = sampler_script(['postgresql', 'pulp_workers'], 3)
+        self.assertIn(u'sleep 3\n', script)
+        self.assertIn(
+            u'system.slice/postgresql.service/cgroup.procs', script)
+        self.assertIn(u"pgrep -f 'postgres|postmaster'", script)
+        # the script matches the patterns, its session is left out
+        self.assertIn(u'grep -vxF "$(pgrep -s 0)"', script)
+        self.assertIn(u'proc postgresql $pids', script)
+        self.assertIn(
+            u'system.slice/pulp_worker-*.service/cgroup.procs', script)
+        self.assertIn(u"pgrep -f 'reserved_resource_worker'", script)
+
+
+class ResourceSamplerTestCase(unittest2.TestCase):
+    """Tests for :class:`ResourceSampler`."""
+
+    def test_parse(self):
+        """Counters of two frames are turned into rates"""
+        sampler = ResourceSampler(services=['tomcat', 'postgresql'])
+        first = sampler.parse(_frame(100, 1000, [
+            _process('tomcat', 10, 500, 25600, 0, 0),
+            _process('postgresql', 20, 100, 256, 1024, 0),
+            _process('postgresql', 21, 100, 256, 0, 0),
+        ]), 10.0)
+        self.assertEqual(sorted(first), sorted([
+            (10.0, 'system', 'load1', 1.5),
+            (10.0, 'system', 'mem_used', 3072.0),
+            (10.0, 'tomcat', 'processes', 1),
+            (10.0, 'tomcat', 'rss', 100.0),
+            (10.0, 'postgresql', 'processes', 2),
+            (10.0, 'postgresql', 'rss', 2.0),
+        ]))
+        second = sampler.parse(_frame(150, 1300, [
+            _process('tomcat', 10, 700, 25600, 0, 0),
+            _process('postgresql', 20, 150, 256, 3072, 10240),
+            _process('postgresql', 22, 100, 256, 0, 0),
+        ]), 12.0)
+        rates = {
+            (source, metric): value
+            for _, source, metric, value in second
+            if metric not in ('load1', 'mem_used', 'processes', 'rss')
+        }
+        self.assertEqual(rates, {
+            # 100 busy jiffies over 400
+            ('system', 'cpu'): 25.0,
+            ('system', 'iowait'): 0.0,
+            # 200 ticks over 2 seconds at 100 ticks per second
+            ('tomcat', 'cpu'): 100.0,
+            ('tomcat', 'read'): 0.0,
+            ('tomcat', 'write'): 0.0,
+            # the process 22 was not in the first frame
+            ('postgresql', 'cpu'): 25.0,
+            ('postgresql', 'read'): 1.0,
+            ('postgresql', 'write'): 5.0,
+        })
+
+    @mock.patch('robottelo.performance.sampler.ssh.SSHCommandStream')
+    def test_run(self, stream):
+        """Samples of each frame are recorded to the store"""
+        stream.return_value.__enter__.return_value = iter([
+            u'H 100 4096',
+            u'T',
+            u'L 0.50 0.40 0.30 1/100 42',
+            u'E',
+            u'T',
+            u'L 0.70 0.40 0.30 1/100 42',
+        ])
+        store = mock.Mock()
+        sampler = ResourceSampler(
+            interval=1, services=['httpd'], store=store, run_id='run-1')
+        sampler.start()
+        samples = sampler.stop()
+        self.assertEqual(
+            [sample[1:] for sample in samples],
+            [('system', 'load1', 0.5)]
+        )
+        store.add_resources.assert_called_once_with('run-1', samples)
+        self.assertIn(u'proc httpd $pids', stream.call_args[0][0])
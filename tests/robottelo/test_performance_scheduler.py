@@ -0,0 +1,115 @@
+"""Tests for :mod:`robottelo.performance.scheduler`."""
+import itertools
+import threading
+
+import unittest2
+
+from robottelo.performance import scheduler
+
+
+class RateTestCase(unittest2.TestCase):
+    """Tests for the arrival schedules."""
+
+    def test_constant_rate(self):
+        """Operations are evenly spaced"""
+        self.assertEqual(
+            list(scheduler.constant_rate(4, 1)), [0, 0.25, 0.5, 0.75])
+
+    def test_step_rate(self):
+        """Each step runs at its own rate after the previous one"""
+        self.assertEqual(
+            list(scheduler.step_rate([(1, 2), (1, 0), (1, 4)])),
+            [0, 0.5, 2, 2.25, 2.5, 2.75]
+        )
+
+    def test_ramp_rate(self):
+        """The number of operations follows the linear rate"""
+        offsets = list(scheduler.ramp_rate(10, 30, 10))
+        # 10 seconds averaging 20 operations per second
+        self.assertEqual(len(offsets), 200)
+        self.assertEqual(offsets, sorted(offsets))
+        first_half = [offset for offset in offsets if offset < 5]
+        # 5 seconds averaging 15 operations per second
+        self.assertEqual(len(first_half), 75)
+        self.assertEqual(
+            list(scheduler.ramp_rate(2, 2, 2)), [0, 0.5, 1, 1.5])
+
+    def test_ramp_rate_down_to_zero(self):
+        """Ramping down to a zero rate stops at the last operation"""
+        offsets = list(scheduler.ramp_rate(20, 0, 10))
+        # 10 seconds averaging 10 operations per second
+        self.assertEqual(len(offsets), 100)
+        self.assertEqual(offsets, sorted(offsets))
+        self.assertLess(offsets[-1], 10)
+        self.assertEqual(list(scheduler.ramp_rate(1, 0, 1)), [0])
+        for start_rate in range(1, 20):
+            for duration in range(1, 40):
+                offsets = list(scheduler.ramp_rate(start_rate, 0, duration))
+                self.assertEqual(
+                    len(offsets), -(-start_rate * duration // 2))
+
+    def test_ramp_rate_zero(self):
+        """No operation is sent at a zero rate"""
+        self.assertEqual(list(scheduler.ramp_rate(0, 0, 10)), [])
+        self.assertEqual(len(list(scheduler.ramp_rate(0, 2, 10))), 10)
+
+
+class OpenLoopSchedulerTestCase(unittest2.TestCase):
+    """Tests for :class:`scheduler.OpenLoopScheduler`."""
+
+    def test_open_loop(self):
+        """Slow operations do not delay the following ones"""
+        release = threading.Event()
+
+        def operation(arg):
+            if arg == 'slow':
+                release.wait(5)
+            elif arg == 'fail':
+                raise ValueError(arg)
+            elif arg == 'last':
+                release.set()
+            return arg
+
+        result = scheduler.OpenLoopScheduler(
+            operation,
+            scheduler.constant_rate(100, 1),
+            args=['slow', 'fail', 'fast', 'last'],
+            workers=4,
+        ).run()
+        self.assertEqual(len(result), 4)
+        self.assertEqual(
+            [operation.result for operation in result.succeeded],
+            ['slow', 'fast', 'last']
+        )
+        self.assertIsInstance(result.failed[0].error, ValueError)
+        slow = result[0]
+        # the slow operation only ended once the last one started
+        self.assertGreaterEqual(slow.ended, result[3].started)
+        self.assertLess(result[3].delay, 1)
+        self.assertEqual(len(result.time_result_dict()['thread-0']), 3)
+        summary = result.report()
+        self.assertEqual(summary['scheduled'], 4)
+        self.assertEqual(summary['failed'], 1)
+        self.assertAlmostEqual(result.target_throughput, 100)
+
+    def test_target_throughput_leading_offset(self):
+        """The target throughput does not count a leading idle step"""
+        result = scheduler.ScheduleResult(
+            scheduler.ScheduledOperation(index, offset)
+            for index, offset in enumerate(
+                scheduler.step_rate([(60, 0), (60, 5)]))
+        )
+        self.assertEqual(len(result), 300)
+        self.assertAlmostEqual(result.target_throughput, 5, delta=0.02)
+        self.assertEqual(scheduler.ScheduleResult().target_throughput, 0)
+
+    def test_latency_from_intended_start(self):
+        """Waiting for a worker counts in the latency"""
+        result = scheduler.OpenLoopScheduler(
+            lambda arg: threading.Event().wait(0.05),
+            itertools.repeat(0, 3),
+            workers=1,
+        ).run()
+        self.assertEqual([operation.index for operation in result], [0, 1, 2])
+        self.assertGreaterEqual(result[2].delay, 0.09)
+        self.assertGreaterEqual(result[2].latency, 0.14)
@@ -0,0 +1,236 @@
+"""Tests for :mod:`robottelo.performance.stat`."""
+import csv
+import os
+import random
+import shutil
+import tempfile
+
+import six
+import unittest2
+
+from robottelo.performance import stat
+from robottelo.performance.stat import (
+    bucket_stats,
+    generate_stat_for_concurrent_thread,
+    LatencyHistogram,
+    time_result_stats,
+    write_stat_rows,
+)
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+def _percentile(values, percent):
+    """Reference percentile with linear interpolation like numpy"""
+    values = sorted(values)
+    rank = percent / 100.0 * (len(values) - 1)
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+class LatencyHistogramTestCase(unittest2.TestCase):
+    """Tests for :class:`LatencyHistogram`."""
+
+    def setUp(self):
+        rand = random.Random(42)
+        self.values = [rand.lognormvariate(0, 1) for _ in range(20000)]
+
+    def test_stats(self):
+        """Percentiles are accurate and other stats exact"""
+        histogram = LatencyHistogram(self.values)
+        self.assertEqual(histogram.count, len(self.values))
+        self.assertEqual(histogram.min, min(self.values))
+        self.assertEqual(histogram.max, max(self.values))
+        mean = sum(self.values) / len(self.values)
+        self.assertAlmostEqual(histogram.mean, mean)
+        std = (sum((value - mean) ** 2 for value in self.values) /
+               len(self.values)) ** 0.5
+        self.assertAlmostEqual(histogram.std, std)
+        for percent in (50, 90, 95, 99):
+            expected = _percentile(self.values, percent)
+            self.assertAlmostEqual(
+                histogram.percentile(percent) / expected, 1, delta=0.01)
+        self.assertLess(len(histogram.counts), 2000)
+
+    def test_merge(self):
+        """Merged histograms equal the histogram of all the values"""
+        merged = LatencyHistogram()
+        for index in range(4):
+            merged.merge(LatencyHistogram(self.values[index::4]))
+        histogram = LatencyHistogram(self.values)
+        self.assertEqual(merged.counts, histogram.counts)
+        self.assertEqual(merged.min, histogram.min)
+        self.assertEqual(merged.max, histogram.max)
+        self.assertAlmostEqual(merged.mean, histogram.mean)
+        self.assertAlmostEqual(merged.std, histogram.std)
+        with self.assertRaises(ValueError):
+            merged.merge(LatencyHistogram(precision=0.1))
+
+    def test_edge_values(self):
+        """Empty histograms and zero values are handled"""
+        self.assertIsNone(LatencyHistogram().median)
+        histogram = LatencyHistogram([0, 0, 0, 5])
+        self.assertEqual(histogram.median, 0)
+        self.assertEqual(histogram.percentile(100), 5)
+        self.assertEqual(LatencyHistogram([3.0]).percentile(99), 3.0)
+
+    def test_interpolation(self):
+        """Percentiles interpolate between ranks like numpy"""
+        self.assertEqual(LatencyHistogram([1, 3]).median, 2)
+        self.assertEqual(LatencyHistogram([1, 3]).percentile(25), 1.5)
+        if stat.numpy is None:
+            self.skipTest('numpy is not installed')
+        values = self.values[:101]
+        histogram = LatencyHistogram(values)
+        for percent in (10, 50, 90, 95, 99):
+            self.assertAlmostEqual(
+                histogram.percentile(percent) /
+                stat.numpy.percentile(values, percent),
+                1, delta=histogram.precision)
+
+
+class GenerateStatTestCase(unittest2.TestCase):
+    """Tests for :func:`generate_stat_for_concurrent_thread`."""
+
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.stat_file_name = os.path.join(tmpdir, 'stat.csv')
+
+    def test_csv_columns(self):
+        """Buckets of the time list are written with the same columns"""
+        stat = generate_stat_for_concurrent_thread(
+            'client-0', [1, 2, 3, 4, 5, 6, 7], self.stat_file_name, 3, 2)
+        with open(self.stat_file_name) as handler:
+            rows = list(csv.reader(handler))
+        self.assertEqual(rows[1], ['client-0'])
+        self.assertEqual(
+            rows[2],
+            ['bucket', 'min', 'median', 'mean', 'max', 'std', '90%', '95%',
+             '99%']
+        )
+        self.assertEqual([row[0] for row in rows[3:]], ['1-3', '4-6'])
+        self.assertEqual(sorted(stat), [0, 1])
+        gmin, gmedian, gmax, gstd = stat[1]
+        self.assertEqual((gmin, gmax), (4, 6))
+        self.assertAlmostEqual(gmedian, 5, delta=0.05)
+        self.assertAlmostEqual(gstd, (2 / 3.0) ** 0.5)
+
+    def test_histograms(self):
+        """Histograms are accepted instead of timings"""
+        stat = generate_stat_for_concurrent_thread(
+            'test-2', [LatencyHistogram([1, 2])], self.stat_file_name, 2, 1)
+        self.assertEqual(stat[0][0], 1)
+        self.assertEqual(stat[0][2], 2)
+
+
+class TimeResultStatsTestCase(unittest2.TestCase):
+    """Tests for :func:`bucket_stats` and :func:`time_result_stats`."""
+
+    def setUp(self):
+        if stat.numpy is None:
+            self.skipTest('numpy is not installed')
+        rand = random.Random(42)
+        self.time_result_dict = {
+            'thread-{0}'.format(i): [
+                rand.lognormvariate(0, 1) for _ in range(1000)]
+            for i in range(4)
+        }
+
+    def assertRowsAlmostEqual(self, rows, expected_rows):
+        """Stat rows are equal, percentiles up to the histogram precision"""
+        self.assertEqual(len(rows), len(expected_rows))
+        for row, expected in zip(rows, expected_rows):
+            for index in (0, 2, 3, 4):
+                self.assertAlmostEqual(row[index], expected[index])
+            for index in (1, 5, 6, 7):
+                self.assertAlmostEqual(
+                    row[index] / expected[index], 1,
+                    delta=stat.HISTOGRAM_PRECISION)
+
+    def test_bucket_stats(self):
+        """Vectorized bucket stats match the histogram fallback"""
+        time_list = self.time_result_dict['thread-0'][:950]
+        rows = bucket_stats(time_list, 100)
+        self.assertEqual(len(rows), 9)
+        self.assertEqual(rows[0][0], min(time_list[:100]))
+        self.assertEqual(rows[0][1], _percentile(time_list[:100], 50))
+        with mock.patch.object(stat, 'numpy', None):
+            self.assertRowsAlmostEqual(rows, bucket_stats(time_list, 100))
+        self.assertEqual(bucket_stats(time_list[:10], 100), [])
+
+    def test_time_result_stats(self):
+        """All the stat are computed at once and match the fallback"""
+        stats = time_result_stats(self.time_result_dict, 100, 5)
+        with mock.patch.object(stat, 'numpy', None):
+            expected = time_result_stats(self.time_result_dict, 100, 5)
+        self.assertEqual(len(stats['per_client_bucketized']), 4)
+        for rows, expected_rows in zip(
+                stats['per_client_bucketized'],
+                expected['per_client_bucketized']):
+            self.assertEqual(len(rows), 10)
+            self.assertRowsAlmostEqual(rows, expected_rows)
+        self.assertEqual(len(stats['per_test_bucketized']), 5)
+        self.assertRowsAlmostEqual(
+            stats['per_test_bucketized'], expected['per_test_bucketized'])
+        self.assertRowsAlmostEqual(
+            stats['per_client'], expected['per_client'])
+        self.assertRowsAlmostEqual(
+            [stats['per_test']], [expected['per_test']])
+        all_values = sum(self.time_result_dict.values(), [])
+        self.assertEqual(stats['per_test'][3], max(all_values))
+        bucket = sum(
+            (time_list[100:200]
+             for time_list in self.time_result_dict.values()), [])
+        self.assertEqual(
+            stats['per_test_bucketized'][1][1], _percentile(bucket, 50))
+
+    def test_uneven_clients(self):
+        """Clients with different numbers of timings use the fallback"""
+        self.time_result_dict['thread-1'] = (
+            self.time_result_dict['thread-1'][:500])
+        stats = time_result_stats(self.time_result_dict, 100, 5)
+        self.assertEqual(len(stats['per_client_bucketized'][0]), 10)
+        self.assertEqual(len(stats['per_client_bucketized'][1]), 5)
+        self.assertEqual(len(stats['per_test_bucketized']), 5)
+
+    def test_uneven_clients_match(self):
+        """Uneven clients get the same stat as the vectorized computation"""
+        stats = time_result_stats(self.time_result_dict, 100, 5)
+        self.time_result_dict['thread-1'] = (
+            self.time_result_dict['thread-1'] + [1.0])
+        uneven = time_result_stats(self.time_result_dict, 100, 5)
+        for key in ('per_client_bucketized', 'per_test_bucketized'):
+            self.assertEqual(uneven[key], stats[key])
+        for index in (0, 2, 3):
+            self.assertEqual(
+                uneven['per_client'][index], stats['per_client'][index])
+
+
+class WriteStatRowsTestCase(unittest2.TestCase):
+    """Tests for :func:`write_stat_rows`."""
+
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.stat_file_name = os.path.join(tmpdir, 'stat.csv')
+
+    def test_write_stat_rows(self):
+        """Rows are labelled by bucket and summarized for the graphs"""
+        stat_dict = write_stat_rows(
+            'test-2',
+            [(1, 2, 3, 4, 5, 6, 7, 8), (2, 3, 4, 5, 6, 7, 8, 9)],
+            self.stat_file_name,
+            10
+        )
+        self.assertEqual(stat_dict, {0: (1, 2, 4, 5), 1: (2, 3, 5, 6)})
+        with open(self.stat_file_name) as handler:
+            rows = list(csv.reader(handler))
+        self.assertEqual(rows[1], ['test-2'])
+        self.assertEqual(rows[3][0], '1-10')
+        self.assertEqual(rows[4], ['11-20', '2', '3', '4', '5', '6', '7',
+                                   '8', '9'])
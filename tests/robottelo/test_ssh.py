@@ -1,22 +1,40 @@
 """Tests for module ``robottelo.ssh``."""
 # (too-many-public-methods) pylint: disable=R0904
+import itertools
 import os
 import paramiko
+import re
+import shutil
 import six
+import socket
+import sys
+import tempfile
 
 from robottelo import ssh
-from unittest2 import TestCase
+from unittest2 import skipIf, TestCase
 
 if six.PY2:
     import mock
 else:
     from unittest import mock
 
+if sys.version_info >= (3, 5):
+    import asyncio
+
 
 class MockChannel(object):
     def __init__(self, ret):
         self.ret = ret
 
+    def recv_ready(self):
+        return False
+
+    def recv_stderr_ready(self):
+        return False
+
+    def exit_status_ready(self):
+        return True
+
     def recv_exit_status(self):
         return self.ret
 
@@ -30,6 +48,19 @@ class MockStdout(object):
         return self.cmd
 
 
+class MockTransport(object):
+    """A mock ``paramiko.Transport`` object."""
+    def __init__(self):
+        self.active = True
+        self.keepalive = None
+
+    def is_active(self):
+        return self.active
+
+    def set_keepalive(self, interval):
+        self.keepalive = interval
+
+
 class MockSSHClient(object):
     """A mock ``paramiko.SSHClient`` object."""
     def __init__(self):
@@ -77,6 +108,8 @@ class MockSSHClient(object):
     def close(self):
         """A no-op stub method."""
         self.close_ += 1
+        if hasattr(self, 'transport'):
+            self.transport.active = False
 
     def exec_command(self, cmd, *args, **kwargs):
         return (
@@ -269,6 +302,22 @@ class SSHTestCase(TestCase):
         self.assertEquals(ret.stdout, [{u'a': u'1', u'b': u'2', u'c': u'3'}])
         self.assertIsInstance(ret, ssh.SSHCommandResult)
 
+    def test_build_result_csv(self):
+        """Rails log lines, color codes and empty quotes are removed before
+        parsing csv, failed commands keep their output lines"""
+        stdout = (
+            b'[ INFO 2017-01-01] Started\n'
+            b'Id,Name,Label\n'
+            b'1,\x1b[32mname\x1b[0m,""\n'
+            b'[ INFO 2017-01-01] Completed'
+        )
+        result = ssh._build_result(stdout, b'', 0, 'csv')
+        self.assertEqual(
+            result.stdout, [{u'id': u'1', u'name': u'name', u'label': u''}])
+        failed = ssh._build_result(stdout, b'error', 1, 'csv')
+        self.assertEqual(
+            failed.stdout, [u'Id,Name,Label', u'1,name,'])
+
     @mock.patch('robottelo.ssh.settings')
     def test_parse_json(self, settings):
         ssh._call_paramiko_sshclient = MockSSHClient  # pylint:disable=W0212
@@ -286,3 +335,872 @@ class SSHTestCase(TestCase):
             ssh._call_paramiko_sshclient(),
             (paramiko.SSHClient, MockSSHClient)
         )
+
+
+class TimedMockSSHClient(MockSSHClient):
+    """A mock ``paramiko.SSHClient`` whose commands report remote times."""
+    timing_regex = re.compile(r"\\n(\w+) %3R %3U %3S'; time \{ ")
+
+    def exec_command(self, cmd, *args, **kwargs):
+        token = self.timing_regex.search(cmd).group(1)
+        stderr = u'warning\n\n{0} 1.500 0,250 0.125\n'.format(token)
+        return (
+            0,
+            MockStdout(cmd.encode('utf-8'), 0),
+            MockStdout(stderr.encode('utf-8'), 0)
+        )
+
+
+@mock.patch('robottelo.ssh.settings')
+class CommandTimingTestCase(TestCase):
+    """Tests for the :class:`robottelo.ssh.CommandTiming` of results."""
+
+    def test_client_timing(self, settings):
+        """Client side events are recorded in order"""
+        ssh._call_paramiko_sshclient = MockSSHClient  # pylint:disable=W0212
+        ret = ssh.command('ls -la', pooled=False)
+        timing = ret.timing
+        self.assertIsInstance(timing, ssh.CommandTiming)
+        self.assertLessEqual(0, timing.connected)
+        self.assertLessEqual(timing.connected, timing.channel_opened)
+        self.assertLessEqual(timing.channel_opened, timing.exit_status)
+        # only observed along with the remote times
+        self.assertIsNone(timing.first_byte)
+        self.assertEqual(timing.real, timing.elapsed)
+        self.assertIsNone(timing.remote_real)
+        self.assertIsNone(timing.cpu)
+
+    def test_remote_timing(self, settings):
+        """Remote times are parsed and removed from stderr"""
+        ssh._call_paramiko_sshclient = TimedMockSSHClient
+        ret = ssh.command('ls -la', pooled=False, remote_timing=True)
+        self.assertEqual(ret.stderr, u'warning\n')
+        self.assertIn(u'time { ls -la\n}', u'\n'.join(ret.stdout))
+        self.assertEqual(ret.timing.remote_real, 1.5)
+        self.assertLessEqual(
+            ret.timing.channel_opened, ret.timing.first_byte)
+        self.assertLessEqual(ret.timing.first_byte, ret.timing.exit_status)
+        self.assertEqual(ret.timing.real, 1.5)
+        self.assertEqual(ret.timing.cpu, 0.375)
+
+    def test_missing_remote_timing(self, settings):
+        """stderr is kept when the remote times are not found"""
+        timing = ssh.CommandTiming()
+        stderr = ssh._pop_remote_timing(b'real 0.01\n', 'abc', timing)
+        self.assertEqual(stderr, b'real 0.01\n')
+        self.assertIsNone(timing.remote_real)
+
+    def test_wait_first_byte(self, settings):
+        """The channel is selected on until it has some output"""
+        channel = mock.Mock()
+        channel.recv_ready.return_value = False
+        channel.recv_stderr_ready.return_value = False
+        channel.exit_status_ready.return_value = False
+        with mock.patch('robottelo.ssh.select.select') as select:
+            ssh._wait_first_byte(channel, 5)
+            select.assert_called_once_with([channel], [], [], 5)
+            channel.recv_ready.return_value = True
+            ssh._wait_first_byte(channel, 5)
+            self.assertEqual(select.call_count, 1)
+
+
+class MockShellChannel(object):
+    """A mock ``paramiko.Channel`` running a shell.
+
+    Every command sent is echoed back on ``stdout`` as the real command
+    output, followed by the session markers. Commands starting with ``fail``
+    write to ``stderr`` and exit with status 1.
+    """
+    script_regex = re.compile(
+        r'^\{ (?P<cmd>.*)\n\} < /dev/null\n'
+        r'printf "\\n(?P<token>\w+) %d\\n" \$\?\n', re.DOTALL)
+
+    def __init__(self):
+        self.closed = False
+        self.exec_command_ = None
+        self.stdout = b''
+        self.stderr = b''
+        self.commands = []
+
+    def exec_command(self, cmd):
+        self.exec_command_ = cmd
+
+    def exit_status_ready(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+    def sendall(self, data):
+        match = self.script_regex.match(data.decode('utf-8'))
+        cmd, token = match.group('cmd'), match.group('token')
+        self.commands.append(cmd)
+        if cmd.startswith('fail'):
+            ret, out, err = 1, '', cmd + '\n'
+        else:
+            ret, out, err = 0, cmd, ''
+        self.stdout += u'{0}\n{1} {2}\n'.format(out, token, ret).encode()
+        self.stderr += u'{0}\n{1}\n'.format(err, token).encode()
+
+    def recv_ready(self):
+        return len(self.stdout) > 0
+
+    def recv_stderr_ready(self):
+        return len(self.stderr) > 0
+
+    def recv(self, size):
+        data, self.stdout = self.stdout[:size], self.stdout[size:]
+        return data
+
+    def recv_stderr(self, size):
+        data, self.stderr = self.stderr[:size], self.stderr[size:]
+        return data
+
+
+class PooledMockSSHClient(MockSSHClient):
+    """A mock ``paramiko.SSHClient`` which exposes a transport."""
+    def __init__(self):
+        super(PooledMockSSHClient, self).__init__()
+        self.transport = MockTransport()
+        self.transport.open_session = MockShellChannel
+
+    def get_transport(self):
+        return self.transport
+
+
+class SSHConnectionPoolTestCase(TestCase):
+    """Tests for :class:`robottelo.ssh.SSHConnectionPool`."""
+
+    def setUp(self):
+        self.client_patcher = mock.patch(
+            'robottelo.ssh._call_paramiko_sshclient', PooledMockSSHClient)
+        self.client_patcher.start()
+        self.settings_patcher = mock.patch('robottelo.ssh.settings')
+        settings = self.settings_patcher.start()
+        settings.server.hostname = 'example.com'
+        settings.server.ssh_username = 'nobody'
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'test_password'
+        self.pool = ssh.SSHConnectionPool(
+            max_size=2, idle_timeout=60, keepalive=15)
+
+    def tearDown(self):
+        self.pool.clear()
+        self.client_patcher.stop()
+        self.settings_patcher.stop()
+
+    def test_reuse_connection(self):
+        """A released connection is handed out again for the same key"""
+        client = self.pool.acquire()
+        self.assertEqual(client.transport.keepalive, 15)
+        self.pool.release(client)
+        self.assertEqual(self.pool.size(), 1)
+        self.assertIs(self.pool.acquire(), client)
+        self.assertEqual(client.connect_, 1)
+        self.assertEqual(client.close_, 0)
+
+    def test_separate_keys(self):
+        """Connections are not shared between different hosts or users"""
+        client = self.pool.acquire()
+        self.pool.release(client)
+        other = self.pool.acquire(hostname='other.example.com')
+        self.assertIsNot(other, client)
+        self.assertEqual(other.hostname, 'other.example.com')
+        other_user = self.pool.acquire(username='somebody')
+        self.assertIsNot(other_user, client)
+        self.assertEqual(self.pool.size(), 1)
+
+    def test_discard_dead_connection(self):
+        """A connection whose transport is not active is replaced"""
+        client = self.pool.acquire()
+        self.pool.release(client)
+        client.transport.active = False
+        new_client = self.pool.acquire()
+        self.assertIsNot(new_client, client)
+        self.assertEqual(client.close_, 1)
+
+    def test_release_discard(self):
+        """A discarded connection is closed and not kept"""
+        client = self.pool.acquire()
+        self.pool.release(client, discard=True)
+        self.assertEqual(client.close_, 1)
+        self.assertEqual(self.pool.size(), 0)
+
+    def test_max_size(self):
+        """No more than ``max_size`` idle connections are kept per key"""
+        clients = [self.pool.acquire() for _ in range(3)]
+        for client in clients:
+            self.pool.release(client)
+        self.assertEqual(self.pool.size(), 2)
+        self.assertEqual(clients[2].close_, 1)
+
+    @mock.patch('robottelo.ssh.time')
+    def test_idle_eviction(self, time):
+        """Idle connections older than ``idle_timeout`` are closed"""
+        time.time.return_value = 1000
+        client = self.pool.acquire()
+        self.pool.release(client)
+        time.time.return_value = 1061
+        new_client = self.pool.acquire()
+        self.assertIsNot(new_client, client)
+        self.assertEqual(client.close_, 1)
+
+    def test_reset_pool(self):
+        """The pool is replaced without closing the inherited connections"""
+        with mock.patch('robottelo.ssh._pool', self.pool):
+            client = self.pool.acquire()
+            self.pool.release(client)
+            pool = ssh.reset_pool()
+            self.assertIs(ssh.get_pool(), pool)
+            self.assertIsNot(pool, self.pool)
+        self.assertEqual(pool.size(), 0)
+        self.assertEqual(client.close_, 0)
+
+    def test_clear(self):
+        """Clearing the pool closes all idle connections"""
+        client = self.pool.acquire()
+        self.pool.release(client)
+        self.pool.clear()
+        self.assertEqual(client.close_, 1)
+        self.assertEqual(self.pool.size(), 0)
+
+    def test_command_uses_pool(self):
+        """``ssh.command`` borrows the connection from the shared pool"""
+        with mock.patch('robottelo.ssh._pool', self.pool):
+            ssh.command('ls -la')
+            ssh.command('ls -la')
+            self.assertEqual(self.pool.size(), 1)
+            with ssh.get_connection(pooled=True) as connection:
+                self.assertEqual(connection.connect_, 1)
+                self.assertEqual(self.pool.size(), 0)
+
+    def test_error_discards_connection(self):
+        """A connection is not given back to the pool after an error"""
+        with self.assertRaises(RuntimeError):
+            with mock.patch('robottelo.ssh._pool', self.pool):
+                with ssh.get_connection(pooled=True) as connection:
+                    raise RuntimeError()
+        self.assertEqual(connection.close_, 1)
+        self.assertEqual(self.pool.size(), 0)
+
+    def test_interrupt_discards_connection(self):
+        """A connection is not given back to the pool after an interrupt"""
+        with self.assertRaises(KeyboardInterrupt):
+            with mock.patch('robottelo.ssh._pool', self.pool):
+                with ssh.get_connection(pooled=True) as connection:
+                    raise KeyboardInterrupt()
+        self.assertEqual(connection.close_, 1)
+        self.assertEqual(self.pool.size(), 0)
+
+    def test_fork(self):
+        """A forked process forgets the inherited connections"""
+        client = self.pool.acquire()
+        borrowed = self.pool.acquire()
+        self.pool.release(client)
+        with mock.patch('os.getpid', return_value=os.getpid() + 1):
+            self.assertEqual(self.pool.size(), 0)
+            new_client = self.pool.acquire()
+            self.assertIsNot(new_client, client)
+            self.pool.release(borrowed)
+            self.pool.release(new_client)
+            self.assertEqual(self.pool.size(), 1)
+            self.pool.clear()
+        self.assertEqual(client.close_, 0)
+        self.assertEqual(borrowed.close_, 0)
+        self.assertEqual(new_client.close_, 1)
+
+
+class SSHSessionTestCase(TestCase):
+    """Tests for :class:`robottelo.ssh.SSHSession`."""
+
+    def setUp(self):
+        self.client_patcher = mock.patch(
+            'robottelo.ssh._call_paramiko_sshclient', PooledMockSSHClient)
+        self.client_patcher.start()
+        self.settings_patcher = mock.patch('robottelo.ssh.settings')
+        settings = self.settings_patcher.start()
+        settings.server.hostname = 'example.com'
+        settings.server.ssh_username = 'nobody'
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'test_password'
+        self.pool = ssh.SSHConnectionPool()
+        self.pool_patcher = mock.patch('robottelo.ssh._pool', self.pool)
+        self.pool_patcher.start()
+
+    def tearDown(self):
+        self.pool.clear()
+        self.pool_patcher.stop()
+        self.client_patcher.stop()
+        self.settings_patcher.stop()
+
+    def test_run_many_commands(self):
+        """All commands are run in the same shell and framed back"""
+        with ssh.SSHSession() as session:
+            channel = session._channel
+            first = session.run('ls -la')
+            second = session.run(b'ls /tmp', output_format='plain')
+            self.assertIs(session._channel, channel)
+        self.assertEqual(channel.exec_command_, ssh.SSHSession.shell)
+        self.assertEqual(channel.commands, ['ls -la', 'ls /tmp'])
+        self.assertIsInstance(first, ssh.SSHCommandResult)
+        self.assertEqual(first.stdout, [u'ls -la'])
+        self.assertEqual(first.return_code, 0)
+        self.assertEqual(second.stdout, u'ls /tmp')
+        self.assertLessEqual(
+            second.timing.channel_opened, second.timing.first_byte)
+        self.assertLessEqual(
+            second.timing.first_byte, second.timing.exit_status)
+        self.assertTrue(channel.closed)
+        self.assertEqual(self.pool.size(), 1)
+
+    def test_run_return_code_and_stderr(self):
+        """Exit status and stderr of the command are returned"""
+        with ssh.SSHSession() as session:
+            result = session.run('fail now')
+        self.assertEqual(result.return_code, 1)
+        self.assertEqual(result.stderr, u'fail now\n')
+
+    def test_run_output_format(self):
+        """Hammer output formats are parsed as with ``ssh.command``"""
+        with ssh.SSHSession() as session:
+            csv = session.run('a,b\n1,2', output_format='csv')
+            json = session.run('{"a": 1}', output_format='json')
+        self.assertEqual(csv.stdout, [{u'a': u'1', u'b': u'2'}])
+        self.assertEqual(json.stdout, {u'a': u'1'})
+
+    def test_reopen_dead_shell(self):
+        """A new shell is started when the previous one has exited"""
+        session = ssh.SSHSession()
+        session.open()
+        channel = session._channel
+        channel.close()
+        session.run('ls')
+        self.assertIsNot(session._channel, channel)
+        session.close()
+
+    def test_fork(self):
+        """A forked process starts its own shell"""
+        session = ssh.SSHSession()
+        session.open()
+        channel = session._channel
+        with mock.patch('os.getpid', return_value=os.getpid() + 1):
+            session.run('ls')
+            self.assertIsNot(session._channel, channel)
+            session.close()
+        self.assertFalse(channel.closed)
+
+    def test_shell_exits_while_running(self):
+        """An error is raised and the connection discarded if the shell dies
+        """
+        session = ssh.SSHSession()
+        session.open()
+        client = session._client
+        session._channel.sendall = lambda data: session._channel.close()
+        with self.assertRaises(ssh.SSHSessionError):
+            session.run('ls')
+        self.assertIsNone(session._channel)
+        self.assertEqual(client.close_, 1)
+        self.assertEqual(self.pool.size(), 0)
+
+
+class MockExecChannel(MockShellChannel):
+    """A mock ``paramiko.Channel`` running a single command.
+
+    The command is echoed back on ``stdout``. Commands starting with ``fail``
+    write to ``stderr`` and exit with status 1, commands starting with
+    ``hang`` never exit.
+    """
+    def exec_command(self, cmd):
+        self.exec_command_ = cmd
+        self.exit_status = 0
+        if cmd.startswith('fail'):
+            self.exit_status = 1
+            self.stderr = cmd.encode('utf-8')
+        elif not cmd.startswith('hang'):
+            self.stdout = cmd.encode('utf-8')
+
+    def exit_status_ready(self):
+        return not self.exec_command_.startswith('hang')
+
+    def recv_exit_status(self):
+        return self.exit_status
+
+
+class LateOutputExecChannel(MockExecChannel):
+    """A mock ``paramiko.Channel`` receiving the end of its output along
+    with the exit status, after it was last checked for data."""
+    def exit_status_ready(self):
+        if not self.exec_command_.endswith(u' late'):
+            self.stdout += b' late'
+            self.stderr += b'warning'
+            self.exec_command_ += u' late'
+        return True
+
+
+class ExecMockSSHClient(PooledMockSSHClient):
+    """A mock ``paramiko.SSHClient`` opening single command channels."""
+    def __init__(self):
+        super(ExecMockSSHClient, self).__init__()
+        self.transport.open_session = MockExecChannel
+
+
+class LateOutputMockSSHClient(PooledMockSSHClient):
+    """A mock ``paramiko.SSHClient`` opening late output channels."""
+    def __init__(self):
+        super(LateOutputMockSSHClient, self).__init__()
+        self.transport.open_session = LateOutputExecChannel
+
+
+@skipIf(sys.version_info < (3, 5), 'asyncio API needs Python 3.5 or later')
+class SSHAsyncTestCase(TestCase):
+    """Tests for the asyncio API of ``robottelo.ssh``."""
+
+    def setUp(self):
+        self.client_patcher = mock.patch(
+            'robottelo.ssh._call_paramiko_sshclient', ExecMockSSHClient)
+        self.client_patcher.start()
+        self.settings_patcher = mock.patch('robottelo.ssh.settings')
+        settings = self.settings_patcher.start()
+        settings.server.hostname = 'example.com'
+        settings.server.ssh_username = 'nobody'
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'test_password'
+        self.pool = ssh.SSHConnectionPool()
+        self.pool_patcher = mock.patch('robottelo.ssh._pool', self.pool)
+        self.pool_patcher.start()
+
+    def tearDown(self):
+        self.pool.clear()
+        self.pool_patcher.stop()
+        self.settings_patcher.stop()
+        self.client_patcher.stop()
+
+    def _run(self, coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    def test_command_async(self):
+        """The coroutine returns the same result as ``ssh.command``"""
+        result = self._run(ssh.command_async('ls -la'))
+        self.assertIsInstance(result, ssh.SSHCommandResult)
+        self.assertEqual(result.stdout, [u'ls -la'])
+        self.assertEqual(result.return_code, 0)
+        failed = self._run(
+            ssh.command_async(b'fail now', output_format='plain'))
+        self.assertEqual(failed.return_code, 1)
+        self.assertEqual(failed.stderr, u'fail now')
+        self.assertEqual(self.pool.size(), 1)
+
+    def test_command_async_late_output(self):
+        """Output buffered along with the exit status is returned"""
+        with mock.patch('robottelo.ssh._call_paramiko_sshclient',
+                        LateOutputMockSSHClient):
+            result = self._run(
+                ssh.command_async('ls', output_format='plain'))
+        self.assertEqual(result.stdout, u'ls late')
+        self.assertEqual(result.stderr, u'warning')
+
+    def test_command_async_timeout(self):
+        """A command not exiting in time raises and drops the connection"""
+        with self.assertRaises(socket.timeout):
+            self._run(ssh.command_async('hang', command_timeout=0.05))
+        self.assertEqual(self.pool.size(), 0)
+
+    def test_gather(self):
+        """Results are returned in the order of the commands"""
+        commands = ['echo {0}'.format(i) for i in range(20)]
+        commands.append({'cmd': 'ls', 'hostname': 'other.example.com'})
+        results = ssh.gather(commands, limit=4)
+        self.assertEqual(
+            [result.stdout for result in results],
+            [[command] for command in commands[:-1]] + [[u'ls']]
+        )
+        self.assertLessEqual(self.pool.size(), 4)
+        self.assertEqual(self.pool.size(hostname='other.example.com'), 1)
+
+    def test_gather_return_exceptions(self):
+        """Failures can be returned instead of raised"""
+        results = ssh.gather(
+            ['ls', {'cmd': 'hang', 'command_timeout': 0.05}],
+            return_exceptions=True
+        )
+        self.assertEqual(results[0].stdout, [u'ls'])
+        self.assertIsInstance(results[1], socket.timeout)
+
+    def test_gather_async(self):
+        """The coroutine runs on the loop awaiting it"""
+        results = self._run(ssh.gather_async(['ls', 'pwd'], limit=1))
+        self.assertEqual(
+            [result.stdout for result in results], [[u'ls'], [u'pwd']])
+
+
+class FanOutTestCase(TestCase):
+    """Tests for :func:`robottelo.ssh.fan_out`."""
+
+    def setUp(self):
+        self.settings_patcher = mock.patch('robottelo.ssh.settings')
+        settings = self.settings_patcher.start()
+        settings.server.hostname = 'example.com'
+
+    def tearDown(self):
+        self.settings_patcher.stop()
+
+    @staticmethod
+    def _command(cmd, hostname=None, **kwargs):
+        if hostname == 'unreachable':
+            raise socket.error('No route to host')
+        return_code = 1 if cmd.startswith('fail') else 0
+        return ssh.SSHCommandResult(
+            [u'{0}@{1}'.format(cmd, hostname)], u'', return_code)
+
+    @mock.patch('robottelo.ssh.command')
+    def test_one_command_many_hosts(self, command):
+        """A command runs once on every host, results keep the host order"""
+        command.side_effect = self._command
+        hosts = ['host{0}'.format(i) for i in range(10)]
+        results = ssh.fan_out('ls', hosts, workers=3, timeout=5)
+        self.assertIsInstance(results, ssh.FanOutResult)
+        self.assertEqual([item.hostname for item in results], hosts)
+        self.assertEqual(
+            [item.result.stdout for item in results],
+            [[u'ls@{0}'.format(host)] for host in hosts]
+        )
+        self.assertEqual(len(results.succeeded), 10)
+        self.assertGreaterEqual(results.duration, 0)
+        command.assert_any_call('ls', hostname='host0', timeout=5)
+
+    @mock.patch('robottelo.ssh.command')
+    def test_many_commands_one_host(self, command):
+        """Many commands run on the configured server by default"""
+        command.side_effect = self._command
+        results = ssh.fan_out(['ls', 'fail', 'pwd'])
+        self.assertEqual(
+            [item.cmd for item in results], ['ls', 'fail', 'pwd'])
+        self.assertEqual(
+            list(results.by_host()), ['example.com'])
+        self.assertEqual(
+            [item.cmd for item in results.failed], ['fail'])
+
+    @mock.patch('robottelo.ssh.command')
+    def test_failures_are_recorded(self, command):
+        """Exceptions are recorded on their item instead of being raised"""
+        command.side_effect = self._command
+        results = ssh.fan_out('ls', ['host1', 'unreachable'])
+        self.assertTrue(results[0].succeeded)
+        failed = results.failed
+        self.assertEqual(len(failed), 1)
+        self.assertEqual(failed[0].hostname, 'unreachable')
+        self.assertIsNone(failed[0].result)
+        self.assertIsInstance(failed[0].error, socket.error)
+
+    def test_many_commands_many_hosts(self):
+        """Many commands can not be fanned out to many hosts"""
+        with self.assertRaises(ValueError):
+            ssh.fan_out(['ls', 'pwd'], ['host1', 'host2'])
+
+
+class MockStreamChannel(object):
+    """A mock ``paramiko.Channel`` sending its output in chunks.
+
+    Each call to ``recv`` returns the next chunk of ``stdout_chunks``, an
+    endless output can be simulated by passing an infinite iterator.
+    """
+    stdout_chunks = ()
+    stderr_chunks = ()
+    exit_status = 0
+
+    def __init__(self):
+        self.closed = False
+        self.exec_command_ = None
+        self._stdout = iter(self.stdout_chunks)
+        self._stderr = list(self.stderr_chunks)
+        self._next_stdout = next(self._stdout, None)
+
+    def exec_command(self, cmd):
+        self.exec_command_ = cmd
+
+    def recv_ready(self):
+        return self._next_stdout is not None
+
+    def recv(self, size):
+        data, self._next_stdout = self._next_stdout, next(self._stdout, None)
+        return data
+
+    def recv_stderr_ready(self):
+        return len(self._stderr) > 0
+
+    def recv_stderr(self, size):
+        return self._stderr.pop(0)
+
+    def exit_status_ready(self):
+        return self._next_stdout is None
+
+    def recv_exit_status(self):
+        return self.exit_status
+
+    def close(self):
+        self.closed = True
+
+
+class LateOutputStreamChannel(MockStreamChannel):
+    """A mock ``paramiko.Channel`` receiving the end of its output along
+    with the exit status, after it was last checked for data."""
+    late = True
+
+    def exit_status_ready(self):
+        if self.late:
+            self.late = False
+            self._next_stdout = b'late\nlast'
+            self._stderr.append(b'failed')
+        return True
+
+
+class SSHCommandStreamTestCase(TestCase):
+    """Tests for :class:`robottelo.ssh.SSHCommandStream`."""
+
+    def setUp(self):
+        self.channel = None
+
+        def open_session():
+            self.channel = MockStreamChannel()
+            return self.channel
+
+        class Client(PooledMockSSHClient):
+            def __init__(client):
+                super(Client, client).__init__()
+                client.transport.open_session = open_session
+
+        self.client_patcher = mock.patch(
+            'robottelo.ssh._call_paramiko_sshclient', Client)
+        self.client_patcher.start()
+        self.settings_patcher = mock.patch('robottelo.ssh.settings')
+        settings = self.settings_patcher.start()
+        settings.server.hostname = 'example.com'
+        settings.server.ssh_username = 'nobody'
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'test_password'
+        self.pool = ssh.SSHConnectionPool()
+        self.pool_patcher = mock.patch('robottelo.ssh._pool', self.pool)
+        self.pool_patcher.start()
+
+    def tearDown(self):
+        self.pool.clear()
+        self.pool_patcher.stop()
+        self.settings_patcher.stop()
+        self.client_patcher.stop()
+
+    def test_lines_across_chunks(self):
+        """Lines and multi-byte characters split across chunks are rebuilt
+        and color codes removed"""
+        snowman = u'☃'.encode('utf-8')
+        with mock.patch.multiple(
+                MockStreamChannel,
+                stdout_chunks=(b'fir', b'st\nsec\x1b[31mond', b'\n' +
+                               snowman[:1], snowman[1:] + b'\nlast'),
+                stderr_chunks=(b'warn', b'ing\nfail', b'ed'),
+                exit_status=2):
+            stream = ssh.SSHCommandStream(b'cat file')
+            lines = list(stream)
+        self.assertEqual(lines, [u'first', u'second', u'☃', u'last'])
+        self.assertEqual(self.channel.exec_command_, u'cat file')
+        self.assertTrue(self.channel.closed)
+        result = stream.result
+        self.assertIsInstance(result, ssh.SSHCommandResult)
+        self.assertEqual(result.stdout, lines)
+        self.assertEqual(result.stderr, u'warning\nfailed\n')
+        self.assertEqual(result.return_code, 2)
+        self.assertEqual(self.pool.size(), 1)
+
+    def test_late_output(self):
+        """Output buffered along with the exit status is not lost"""
+        with mock.patch('robottelo.ssh._get_transport') as get_transport:
+            get_transport.return_value.open_session = LateOutputStreamChannel
+            with mock.patch.object(
+                    MockStreamChannel, 'stdout_chunks', (b'first\n',)):
+                stream = ssh.SSHCommandStream('cat file')
+                lines = list(stream)
+        self.assertEqual(lines, [u'first', u'late', u'last'])
+        self.assertEqual(stream.result.stderr, u'failed\n')
+
+    def test_keep_lines(self):
+        """Only the last lines are retained for the result"""
+        with mock.patch.object(
+                MockStreamChannel, 'stdout_chunks',
+                [u'{0}\n'.format(i).encode() for i in range(100)]):
+            result = ssh.SSHCommandStream('seq 100', keep_lines=3).result
+        self.assertEqual(result.stdout, [u'97', u'98', u'99'])
+        self.assertEqual(result.return_code, 0)
+
+    def test_stop_early(self):
+        """Leaving the iteration closes the channel of an endless command"""
+        endless = (u'{0}\n'.format(i).encode() for i in itertools.count())
+        with mock.patch.object(MockStreamChannel, 'stdout_chunks', endless):
+            with ssh.SSHCommandStream('yes') as stream:
+                for line in stream:
+                    if line == u'5':
+                        break
+        self.assertTrue(self.channel.closed)
+        self.assertEqual(stream.result.return_code, -1)
+        self.assertEqual(stream.result.stdout[-1], u'5')
+        self.assertEqual(self.pool.size(), 1)
+
+    def test_command_timeout(self):
+        """A command not exiting in time raises and drops the connection"""
+        endless = (b'' for _ in itertools.count())
+        with mock.patch.object(MockStreamChannel, 'stdout_chunks', endless):
+            stream = ssh.SSHCommandStream('hang', command_timeout=0.05)
+            with self.assertRaises(socket.timeout):
+                list(stream)
+        self.assertTrue(self.channel.closed)
+        self.assertEqual(self.pool.size(), 0)
+
+
+class MockSFTPFile(object):
+    """A mock ``paramiko.SFTPFile`` backed by a local file."""
+    def __init__(self, path, mode):
+        self.file = open(path, mode)
+        self.pipelined = False
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.file.close()
+
+    def set_pipelined(self, pipelined=True):
+        self.pipelined = pipelined
+
+    def readv(self, chunks):
+        for offset, size in chunks:
+            self.file.seek(offset)
+            yield self.file.read(size)
+
+
+class MockSFTPClient(object):
+    """A mock ``paramiko.SFTPClient`` storing remote files under ``root``."""
+    def __init__(self, root):
+        self.root = root
+        self.sock = mock.Mock(closed=False)
+        self.put_ = []
+
+    def _path(self, remote_file):
+        return os.path.join(self.root, remote_file.lstrip('/'))
+
+    def put(self, local_file, remote_file):
+        self.put_.append(remote_file)
+        shutil.copy(local_file, self._path(remote_file))
+
+    def putfo(self, local_file, remote_file):
+        self.put_.append(remote_file)
+        with open(self._path(remote_file), 'wb') as handler:
+            handler.write(local_file.read())
+
+    def get(self, remote_file, local_file):
+        shutil.copy(self._path(remote_file), local_file)
+
+    def open(self, remote_file, mode):
+        return MockSFTPFile(self._path(remote_file), mode)
+
+    def stat(self, remote_file):
+        return os.stat(self._path(remote_file))
+
+    def truncate(self, remote_file, size):
+        with open(self._path(remote_file), 'r+b') as handler:
+            handler.truncate(size)
+
+
+class SFTPTestCase(TestCase):
+    """Tests for the SFTP helpers of ``robottelo.ssh``."""
+
+    def setUp(self):
+        self.local = tempfile.mkdtemp()
+        self.remote = tempfile.mkdtemp()
+        self.sessions = []
+
+        def open_sftp():
+            sftp = MockSFTPClient(self.remote)
+            self.sessions.append(sftp)
+            return sftp
+
+        class Client(PooledMockSSHClient):
+            def __init__(client):
+                super(Client, client).__init__()
+                client.open_sftp = open_sftp
+
+        self.client_patcher = mock.patch(
+            'robottelo.ssh._call_paramiko_sshclient', Client)
+        self.client_patcher.start()
+        self.settings_patcher = mock.patch('robottelo.ssh.settings')
+        settings = self.settings_patcher.start()
+        settings.server.hostname = 'example.com'
+        settings.server.ssh_username = 'nobody'
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'test_password'
+        self.pool = ssh.SSHConnectionPool()
+        self.pool_patcher = mock.patch('robottelo.ssh._pool', self.pool)
+        self.pool_patcher.start()
+
+    def tearDown(self):
+        self.pool.clear()
+        self.pool_patcher.stop()
+        self.settings_patcher.stop()
+        self.client_patcher.stop()
+        shutil.rmtree(self.local)
+        shutil.rmtree(self.remote)
+
+    def _local_file(self, name, content):
+        path = os.path.join(self.local, name)
+        with open(path, 'wb') as handler:
+            handler.write(content)
+        return path
+
+    def _read(self, path):
+        with open(path, 'rb') as handler:
+            return handler.read()
+
+    def test_session_reused(self):
+        """Transfers to the same host share one cached SFTP session"""
+        path = self._local_file('key', b'gpg key')
+        ssh.upload_file(path, '/key')
+        ssh.upload_file(six.BytesIO(b'manifest'), '/manifest')
+        ssh.download_file('/key', os.path.join(self.local, 'key.copy'))
+        self.assertEqual(len(self.sessions), 1)
+        self.assertEqual(self.sessions[0].put_, ['/key', '/manifest'])
+        self.assertEqual(
+            self._read(os.path.join(self.local, 'key.copy')), b'gpg key')
+        self.assertEqual(self.pool.size(), 1)
+
+    def test_closed_session_reopened(self):
+        """A closed cached SFTP session is replaced"""
+        ssh.upload_file(six.BytesIO(b'first'), '/first')
+        self.sessions[0].sock.closed = True
+        ssh.upload_file(six.BytesIO(b'second'), '/second')
+        self.assertEqual(len(self.sessions), 2)
+
+    def test_bulk_transfer_chunked(self):
+        """Big files are uploaded and downloaded in parallel chunks"""
+        content = os.urandom(100 * 1024 + 7)
+        big = self._local_file('big.iso', content)
+        small = self._local_file('small.txt', b'small')
+        with mock.patch('robottelo.ssh.SFTP_BLOCK_SIZE', 1000):
+            ssh.upload_files(
+                [(big, '/big.iso'), (small, '/small.txt')],
+                workers=3, chunked_threshold=1024)
+            self.assertEqual(self.sessions[0].put_, ['/small.txt'])
+            self.assertEqual(
+                self._read(os.path.join(self.remote, 'big.iso')), content)
+            self.assertEqual(
+                self._read(os.path.join(self.remote, 'small.txt')), b'small')
+            ssh.download_files(
+                [('/big.iso', os.path.join(self.local, 'big.copy'))],
+                workers=3, chunked_threshold=1024)
+        self.assertEqual(
+            self._read(os.path.join(self.local, 'big.copy')), content)
+        self.assertGreater(len(self.sessions), 1)
+        self.assertLessEqual(len(self.sessions), 4)